@@ -1,8 +1,42 @@
-"""input_to_protocol.py"""
+"""input_to_protocol.py
+
+Interactive use: python input_to_protocol.py
+Batch use:       python input_to_protocol.py --batch wells.csv --outfile worklist.csv
+
+A batch table has one row per well and reagent, with the columns well, reagent, stock and
+final (concentrations in the same unit, e.g. mM) and optionally final_volume (ml); wells without
+a final_volume use --final_volume. The worklist lists the volume of every reagent and the water
+to add to each well, in microliters, one reagent at a time.
+"""
+import argparse
+import csv
+import sys
+
+WORKLIST_COLUMNS = ["well", "reagent", "volume_ul"]
+WATER = "water"
+
+
+def get_cli_args():
+    """Parse the optional batch-mode arguments"""
+    parser = argparse.ArgumentParser(description="Calculate solution recipes interactively or for a table of wells")
+    parser.add_argument('--batch', type=str, help="CSV table of wells x reagents (well, reagent, stock, final)")
+    parser.add_argument('--outfile', type=str, default='worklist.csv', help="Liquid-handler worklist CSV to write")
+    parser.add_argument('--final_volume', type=float,
+                        help="Final volume (ml) of wells without a final_volume column value")
+    return parser.parse_args()
 
 
 def main():
-    """Get user inputs"""
+    """Get user inputs, or calculate a batch of recipes with --batch"""
+    args = get_cli_args()
+    if args.batch:
+        try:
+            recipes = run_batch(args.batch, args.outfile, args.final_volume)
+        except ValueError as err:
+            sys.exit(f"Error: {err}")
+        print(f"Wrote {len(recipes)} transfers for {recipes['well'].nunique()} wells to {args.outfile}")
+        return
+
     final_volume = float(input("Please enter the final volume of the solution (ml): "))
 
     # For NaCl
@@ -32,5 +66,108 @@ def calculate_volume(stock_concentration, final_concentration, final_volume):
     return (final_concentration * final_volume) / stock_concentration
 
 
+def read_recipe_table(infile, final_volume=None):
+    """
+    Read a table of wells x reagents into a DataFrame with a final_volume for every row.
+    """
+    import pandas as pd
+    table = pd.read_csv(infile, dtype={"well": str, "reagent": str})
+    missing = {"well", "reagent", "stock", "final"} - set(table.columns)
+    if missing:
+        raise ValueError(f"The table is missing the column(s) {', '.join(sorted(missing))}")
+    if "final_volume" not in table.columns:
+        table["final_volume"] = final_volume
+    elif final_volume is not None:
+        table["final_volume"] = table["final_volume"].fillna(final_volume)
+    if table["final_volume"].isna().any():
+        raise ValueError("Wells without a final_volume need --final_volume")
+    return table
+
+
+def _report_wells(wells, message):
+    """Raise a ValueError naming the first few offending wells or table rows"""
+    wells = list(dict.fromkeys(wells))
+    shown = ", ".join(wells[:5]) + (f" and {len(wells) - 5} more" if len(wells) > 5 else "")
+    raise ValueError(f"{message}: {shown}")
+
+
+def calculate_recipes(table):
+    """
+    Calculate the volume (ml) of every reagent in every well with one vectorized call of
+    calculate_volume, check the recipes, and add the water that fills each well to its final volume.
+    Returns a DataFrame with the columns well, reagent and volume_ml.
+    """
+    import numpy as np
+    import pandas as pd
+    # missing names get the code -1; blank ones are found among the unique names only
+    blank = np.zeros(len(table), dtype=bool)
+    for column in ("well", "reagent"):
+        codes, names = pd.factorize(table[column])
+        blank_names = np.array([not str(name).strip() for name in names] + [True])
+        blank |= blank_names[codes]  # code -1 picks the final True
+    if blank.any():
+        _report_wells([str(row) for row in np.flatnonzero(blank) + 1], "Missing well or reagent in table row(s)")
+    # a repeated reagent would be dispensed twice into its well
+    repeated = table.duplicated(["well", "reagent"]).to_numpy()
+    if repeated.any():
+        pairs = zip(table["well"][repeated], table["reagent"][repeated])
+        _report_wells([f"{well} {reagent}" for well, reagent in pairs], "Reagent listed more than once in well(s)")
+
+    stock = table["stock"].to_numpy(dtype=float)
+    final = table["final"].to_numpy(dtype=float)
+    final_volume = table["final_volume"].to_numpy(dtype=float)
+    wells = table["well"].to_numpy()
+
+    # a reagent cannot be diluted from a weaker or missing stock
+    invalid = ~(stock > 0) | ~(final >= 0) | ~(final <= stock) | ~(final_volume > 0)
+    if invalid.any():
+        _report_wells(wells[invalid], "Invalid stock, final concentration or final volume in well(s)")
+
+    well_codes, well_names = pd.factorize(wells)
+    well_volume = np.full(len(well_names), np.nan)
+    well_volume[well_codes] = final_volume
+    if not np.array_equal(well_volume[well_codes], final_volume):
+        _report_wells(wells[well_volume[well_codes] != final_volume], "Conflicting final volumes in well(s)")
+
+    volumes = calculate_volume(stock, final, final_volume)
+    # the reagents of a well must fit into its final volume; allow for rounding of the inputs
+    water = well_volume - np.bincount(well_codes, weights=volumes, minlength=len(well_names))
+    overfilled = water < -1e-9 * well_volume
+    if overfilled.any():
+        _report_wells(well_names[overfilled], "Reagents exceed the final volume in well(s)")
+
+    return pd.DataFrame({"well": np.concatenate([wells, well_names]),
+                         "reagent": np.concatenate([table["reagent"].to_numpy(), np.full(len(well_names), WATER)]),
+                         "volume_ml": np.concatenate([volumes, np.maximum(water, 0)])})
+
+
+def write_worklist(recipes, outfile):
+    """
+    Write the recipes as a liquid-handler worklist CSV (well, reagent, volume_ul), grouped by
+    reagent in order of first appearance (water last) so each source is dispensed across the
+    plate before the next, wells in input order. Transfers of zero volume are left out.
+    """
+    import numpy as np
+    import pandas as pd
+    worklist = recipes.assign(volume_ul=(recipes["volume_ml"] * 1000).round(3))
+    worklist = worklist[worklist["volume_ul"] > 0]
+    # a stable sort of the reagent codes is much faster than sorting the reagent names
+    reagent_codes, _ = pd.factorize(worklist["reagent"])
+    worklist = worklist.iloc[np.argsort(reagent_codes, kind="stable")][WORKLIST_COLUMNS]
+    # csv.writer quotes names such as "NaCl, 5M" and, with preformatted volumes, is several
+    # times faster than DataFrame.to_csv with floats
+    with open(outfile, "w", newline="") as file:
+        writer = csv.writer(file, lineterminator="\n")
+        writer.writerow(WORKLIST_COLUMNS)
+        writer.writerows(zip(worklist["well"].tolist(), worklist["reagent"].tolist(),
+                             [f"{volume:.3f}" for volume in worklist["volume_ul"].tolist()]))
+    return worklist
+
+
+def run_batch(infile, outfile, final_volume=None):
+    """Read a table of wells x reagents, calculate and check the recipes, and write the worklist"""
+    return write_worklist(calculate_recipes(read_recipe_table(infile, final_volume)), outfile)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,60 @@
+"""test_input_to_protocol.py Tests for the batch mode of input_to_protocol.py"""
+import csv
+import re
+import pytest
+from input_to_protocol import calculate_volume, run_batch
+
+
+def write_table(tmp_path, text):
+    """Write a batch table and return its path"""
+    path = tmp_path / "wells.csv"
+    path.write_text(text)
+    return str(path)
+
+
+def read_worklist(path):
+    """Read a worklist back as (well, reagent, volume_ul) rows"""
+    with open(path, newline="") as file:
+        return list(csv.reader(file))
+
+
+def test_calculate_volume():
+    """A 10x stock is diluted to a tenth of the final volume"""
+    assert calculate_volume(100, 10, 0.2) == pytest.approx(0.02)
+
+
+def test_run_batch_volumes_and_water(tmp_path):
+    """Reagent volumes in microliters, one reagent at a time, and the water of each well last"""
+    infile = write_table(tmp_path, "well,reagent,stock,final,final_volume\n"
+                                   "A1,NaCl,1000,150,0.2\nA1,MgCl2,100,10,0.2\n"
+                                   "A2,NaCl,1000,100,\nA2,MgCl2,100,0,\n")
+    outfile = str(tmp_path / "worklist.csv")
+    run_batch(infile, outfile, final_volume=0.1)
+    assert read_worklist(outfile) == [["well", "reagent", "volume_ul"],
+                                      ["A1", "NaCl", "30.000"], ["A2", "NaCl", "10.000"],
+                                      ["A1", "MgCl2", "20.000"],
+                                      ["A1", "water", "150.000"], ["A2", "water", "90.000"]]
+
+
+def test_run_batch_quotes_names(tmp_path):
+    """Names containing commas or quotes are quoted so the worklist keeps three columns"""
+    infile = write_table(tmp_path, 'well,reagent,stock,final\nA1,"NaCl, 5M",5000,500\nA1,"Tris ""pH 8""",1000,100\n')
+    outfile = str(tmp_path / "worklist.csv")
+    run_batch(infile, outfile, final_volume=0.1)
+    with open(outfile) as file:
+        assert file.read().splitlines()[1] == 'A1,"NaCl, 5M",10.000'
+    assert [row[1] for row in read_worklist(outfile)[1:]] == ["NaCl, 5M", 'Tris "pH 8"', "water"]
+
+
+@pytest.mark.parametrize("table, message", [
+    ("A1,NaCl,1000,600,0.1\nA1,MgCl2,100,50,0.1\n", "exceed the final volume in well(s): A1"),
+    ("A1,NaCl,1000,150,0.1\nA1,MgCl2,100,10,0.2\n", "Conflicting final volumes in well(s): A1"),
+    ("A1,NaCl,100,150,0.1\n", "Invalid stock, final concentration or final volume in well(s): A1"),
+    ("A1,NaCl,1000,150,0.1\nA1,NaCl,1000,150,0.1\n", "Reagent listed more than once in well(s): A1 NaCl"),
+    ("A1,NaCl,1000,150,0.1\n , MgCl2,100,10,0.1\n", "Missing well or reagent in table row(s): 2"),
+])
+def test_run_batch_rejects_invalid_recipes(tmp_path, table, message):
+    """Invalid recipes stop the batch with the offending wells or table rows"""
+    infile = write_table(tmp_path, "well,reagent,stock,final,final_volume\n" + table)
+    with pytest.raises(ValueError, match=re.escape(message)):
+        run_batch(infile, str(tmp_path / "worklist.csv"))
@@ -0,0 +1,350 @@
+"""query_service.py: Utility
+A small asyncio HTTP/1.1 server answering JSON lookups of genes, CCDS records and sequences.
+Gene descriptions, CCDS attributes and a byte-offset index of the CCDS FASTA file are loaded
+once into a QueryIndex, so each request is a dictionary or bisect lookup instead of a re-parse.
+"""
+import asyncio
+import json
+import mmap
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, namedtuple
+from urllib.parse import parse_qs, unquote, urlsplit
+from assignment4.assignment4_utils import read_file_lines, parse_lines_to_dict
+
+CcdsRecord = namedtuple("CcdsRecord", ["chromosome", "gene", "gene_id", "ccds_id", "status", "strand",
+                                       "cds_from", "cds_to", "cds_locations"])
+
+MAX_BATCH_QUERIES = 10000
+MAX_BODY_BYTES = 16 * 1024 * 1024
+MAX_HEADER_LINES = 100
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large"}
+
+
+class QueryError(ValueError):
+    """A lookup that cannot be answered; status is the HTTP status code to reply with."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def read_ccds_attributes(file_path: str) -> list[CcdsRecord]:
+    """
+    Reads a CCDS attributes file (CCDS.current.txt layout); records without coordinates are skipped.
+    @param file_path: The path to the tab-separated CCDS attributes file.
+    @return: A list of CcdsRecord namedtuples.
+    """
+    records = []
+    for line in read_file_lines(file_path):
+        if not line or line.startswith('#'):
+            continue
+        parts = line.split('\t')
+        if len(parts) < 10 or not parts[7].isdigit() or not parts[8].isdigit():
+            continue
+        records.append(CcdsRecord(chromosome=normalize_chromosome(parts[0]), gene=parts[2], gene_id=parts[3],
+                                  ccds_id=parts[4], status=parts[5], strand=parts[6], cds_from=int(parts[7]),
+                                  cds_to=int(parts[8]), cds_locations=parts[9]))
+    return records
+
+
+def index_fasta(file_path: str) -> dict[str, tuple[int, int]]:
+    """
+    Builds a byte-offset index of a FASTA file, keyed by the header's first '|'-separated field.
+    @param file_path: The path to the FASTA file.
+    @return: A dictionary mapping record IDs to the (start, end) byte offsets of their sequence lines.
+    """
+    index = {}
+    record_id, start, offset = None, 0, 0
+    with open(file_path, 'rb') as file:
+        for line in file:
+            if line.startswith(b'>'):
+                if record_id is not None:
+                    index[record_id] = (start, offset)
+                record_id = line[1:].strip().split(b'|')[0].split()[0].decode()
+                start = offset + len(line)
+            offset += len(line)
+    if record_id is not None:
+        index[record_id] = (start, offset)
+    return index
+
+
+def normalize_chromosome(chromosome: str) -> str:
+    """
+    Normalizes a chromosome name so that 'chr21', 'Chr21' and '21' match.
+    @param chromosome: The chromosome name.
+    @return: The name without a 'chr' prefix.
+    """
+    chromosome = str(chromosome).strip()
+    return chromosome[3:] if chromosome.lower().startswith('chr') else chromosome
+
+
+class QueryIndex:
+    """
+    In-memory lookup tables for gene symbols, CCDS IDs and CCDS coordinates, plus sequence
+    retrieval from a memory-mapped FASTA file.
+    """
+
+    def __init__(self, gene_dict: dict[str, str], ccds_records: list[CcdsRecord] = (), fasta_path: str = None):
+        """
+        @param gene_dict: A dictionary mapping gene symbols to their descriptions.
+        @param ccds_records: CCDS records, e.g. from `read_ccds_attributes`.
+        @param fasta_path: The path to a FASTA file of CCDS sequences, optional.
+        """
+        self.genes = {symbol.lower(): (symbol, description) for symbol, description in gene_dict.items()}
+        self.ccds = {record.ccds_id: record for record in ccds_records}
+        self.ccds_by_gene = defaultdict(list)
+        by_chromosome = defaultdict(list)
+        for record in ccds_records:
+            self.ccds_by_gene[record.gene.lower()].append(record)
+            by_chromosome[record.chromosome].append(record)
+        # per chromosome: records sorted by start, their starts, and the longest record for the overlap window
+        self.intervals = {}
+        for chromosome, records in by_chromosome.items():
+            records.sort(key=lambda record: (record.cds_from, record.cds_to))
+            self.intervals[chromosome] = (records, [record.cds_from for record in records],
+                                          max(record.cds_to - record.cds_from for record in records))
+        self.fasta_index = index_fasta(fasta_path) if fasta_path else {}
+        self._fasta = None
+        if self.fasta_index:
+            with open(fasta_path, 'rb') as file:
+                self._fasta = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        """
+        Releases the memory-mapped FASTA file.
+        @return: None
+        """
+        if self._fasta is not None:
+            self._fasta.close()
+            self._fasta = None
+
+    def sequence(self, ccds_id: str):
+        """
+        Reads a sequence from the FASTA file.
+        @param ccds_id: The record ID.
+        @return: The sequence, or None if the ID is not in the FASTA index.
+        """
+        if ccds_id not in self.fasta_index or self._fasta is None:
+            return None
+        start, end = self.fasta_index[ccds_id]
+        return self._fasta[start:end].decode().replace('\r', '').replace('\n', '')
+
+    def lookup_symbol(self, symbol: str) -> dict:
+        """
+        Looks up a gene symbol, case-insensitively.
+        @param symbol: The gene symbol.
+        @return: The symbol, its description and its CCDS records.
+        """
+        key = symbol.strip().lower()
+        records = self.ccds_by_gene.get(key, [])
+        if key not in self.genes and not records:
+            raise QueryError(f"Unknown gene symbol: {symbol}", 404)
+        found_symbol, description = self.genes.get(key, (records[0].gene if records else symbol, None))
+        return {"symbol": found_symbol, "description": description,
+                "ccds": [record._asdict() for record in records]}
+
+    def lookup_ccds(self, ccds_id: str, with_sequence: bool = False) -> dict:
+        """
+        Looks up a CCDS ID.
+        @param ccds_id: The CCDS ID, e.g. 'CCDS13573.1'.
+        @param with_sequence: Whether to add the record's sequence from the FASTA file.
+        @return: The CCDS record, with a 'sequence' entry if requested.
+        """
+        record = self.ccds.get(ccds_id.strip())
+        if record is None and ccds_id.strip() not in self.fasta_index:
+            raise QueryError(f"Unknown CCDS ID: {ccds_id}", 404)
+        result = record._asdict() if record is not None else {"ccds_id": ccds_id.strip()}
+        if with_sequence:
+            result["sequence"] = self.sequence(ccds_id.strip())
+        return result
+
+    def lookup_region(self, chromosome: str, start: int, end: int) -> dict:
+        """
+        Finds the CCDS records overlapping a region, in the coordinates of the CCDS attributes file.
+        @param chromosome: The chromosome, with or without a 'chr' prefix.
+        @param start: The first position of the region.
+        @param end: The last position of the region.
+        @return: The region and the overlapping records, sorted by start.
+        """
+        if end < start:
+            raise QueryError("Region end must not be before its start")
+        chromosome = normalize_chromosome(chromosome)
+        records, starts, longest = self.intervals.get(chromosome, ([], [], 0))
+        # only records starting within `longest` before the region can reach into it
+        first, last = bisect_left(starts, start - longest), bisect_right(starts, end)
+        return {"chromosome": chromosome, "start": start, "end": end,
+                "ccds": [record._asdict() for record in records[first:last] if record.cds_to >= start]}
+
+    def query(self, query: dict):
+        """
+        Answers one query of a batch.
+        @param query: A dictionary with 'symbol', 'ccds_id' (and optional 'sequence'), or 'chromosome',
+        'start' and 'end'.
+        @return: The lookup result.
+        """
+        if not isinstance(query, dict):
+            raise QueryError("Each query must be a JSON object")
+        if 'symbol' in query:
+            return self.lookup_symbol(str(query['symbol']))
+        if 'ccds_id' in query:
+            return self.lookup_ccds(str(query['ccds_id']), bool(query.get('sequence', False)))
+        if 'chromosome' in query:
+            return self.lookup_region(str(query['chromosome']), _int_field(query, 'start'), _int_field(query, 'end'))
+        raise QueryError("A query needs a 'symbol', a 'ccds_id', or a 'chromosome' with 'start' and 'end'")
+
+
+def _int_field(query: dict, name: str) -> int:
+    """Reads a required integer field of a query."""
+    try:
+        return int(query[name])
+    except (KeyError, TypeError, ValueError):
+        raise QueryError(f"'{name}' must be an integer") from None
+
+
+def load_query_index(gene_file: str, ccds_attributes: str = None, fasta: str = None) -> QueryIndex:
+    """
+    Loads all lookup data once.
+    @param gene_file: The path to the gene description file (e.g. chr21_genes.txt).
+    @param ccds_attributes: The path to a CCDS attributes file, optional.
+    @param fasta: The path to a FASTA file of CCDS sequences, optional.
+    @return: A QueryIndex.
+    """
+    gene_dict = parse_lines_to_dict(read_file_lines(gene_file, skip_header=True))
+    ccds_records = read_ccds_attributes(ccds_attributes) if ccds_attributes else []
+    return QueryIndex(gene_dict, ccds_records, fasta)
+
+
+def route(index: QueryIndex, method: str, target: str, body: bytes = b'') -> tuple[int, object]:
+    """
+    Answers one HTTP request.
+    Routes: GET /gene/<symbol>, GET /ccds/<id>[?sequence=1], GET /region?chromosome=&start=&end=,
+    GET /health, and POST /query with a JSON list of queries (see `QueryIndex.query`).
+    @param index: The QueryIndex.
+    @param method: The HTTP method.
+    @param target: The request target (path and query string).
+    @param body: The request body.
+    @return: A tuple of (HTTP status, JSON-serializable payload).
+    """
+    url = urlsplit(target)
+    parts = [unquote(part) for part in url.path.strip('/').split('/')]
+    params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+    try:
+        if parts[0] == 'query':
+            if method != 'POST':
+                raise QueryError("Batch queries must be POSTed", 405)
+            try:
+                queries = json.loads(body or b'null')
+            except ValueError:
+                raise QueryError("The request body is not valid JSON") from None
+            if not isinstance(queries, list):
+                raise QueryError("The request body must be a JSON list of queries")
+            if len(queries) > MAX_BATCH_QUERIES:
+                raise QueryError(f"A batch may hold at most {MAX_BATCH_QUERIES} queries", 413)
+            return 200, [_batch_result(index, query) for query in queries]
+        if method != 'GET':
+            raise QueryError(f"{method} is not supported for /{parts[0]}", 405)
+        if parts == ['health']:
+            return 200, {"genes": len(index.genes), "ccds": len(index.ccds), "sequences": len(index.fasta_index)}
+        if len(parts) == 2 and parts[0] == 'gene':
+            return 200, index.lookup_symbol(parts[1])
+        if len(parts) == 2 and parts[0] == 'ccds':
+            return 200, index.lookup_ccds(parts[1], params.get('sequence', '0').lower() in ('1', 'true', 'yes'))
+        if parts == ['region']:
+            return 200, index.query({"chromosome": '', **params})
+        raise QueryError(f"No route for {url.path}", 404)
+    except QueryError as err:
+        return err.status, {"error": str(err)}
+
+
+def _batch_result(index: QueryIndex, query) -> dict:
+    """Answers one query of a batch; failures are reported per query instead of failing the batch."""
+    try:
+        return {"query": query, "result": index.query(query)}
+    except QueryError as err:
+        return {"query": query, "error": str(err), "status": err.status}
+
+
+def _response(status: int, payload, keep_alive: bool) -> bytes:
+    """Encodes a JSON HTTP/1.1 response."""
+    body = json.dumps(payload, separators=(',', ':')).encode()
+    return (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode() + body
+
+
+async def handle_connection(index: QueryIndex, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """
+    Serves the requests of one connection, keeping it open between requests unless the client
+    asks to close it.
+    @param index: The QueryIndex.
+    @param reader: The connection's stream reader.
+    @param writer: The connection's stream writer.
+    @return: None
+    """
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+            try:
+                method, target, version = request_line.decode('latin-1').split()
+            except ValueError:
+                writer.write(_response(400, {"error": "Malformed request line"}, False))
+                break
+            headers = {}
+            for _ in range(MAX_HEADER_LINES):
+                line = await reader.readline()
+                if not line.strip():
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            connection = headers.get('connection', '').lower()
+            keep_alive = connection == 'keep-alive' or (version == 'HTTP/1.1' and connection != 'close')
+            try:
+                length = int(headers.get('content-length', 0) or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                writer.write(_response(400, {"error": "Malformed Content-Length header"}, False))
+                break
+            if length > MAX_BODY_BYTES:
+                writer.write(_response(413, {"error": "The request body is too large"}, False))
+                break
+            body = await reader.readexactly(length) if length else b''
+            status, payload = route(index, method.upper(), target, body)
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(index: QueryIndex, host: str = '127.0.0.1', port: int = 8021) -> asyncio.AbstractServer:
+    """
+    Starts serving a QueryIndex.
+    @param index: The QueryIndex.
+    @param host: The address to listen on.
+    @param port: The port to listen on (0 for any free port).
+    @return: The running asyncio server.
+    """
+    return await asyncio.start_server(lambda reader, writer: handle_connection(index, reader, writer), host, port)
+
+
+async def serve(index: QueryIndex, host: str = '127.0.0.1', port: int = 8021):
+    """
+    Serves a QueryIndex until the process is interrupted.
+    @param index: The QueryIndex.
+    @param host: The address to listen on.
+    @param port: The port to listen on.
+    @return: None
+    """
+    server = await start_server(index, host, port)
+    print(f"Serving {len(index.genes)} genes, {len(index.ccds)} CCDS records and {len(index.fasta_index)} "
+          f"sequences on http://{host}:{server.sockets[0].getsockname()[1]}")
+    async with server:
+        await server.serve_forever()
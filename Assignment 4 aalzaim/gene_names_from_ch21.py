@@ -1,6 +1,8 @@
 """gene_names_from_ch21.py"""
 import argparse
+import asyncio
 from assignment4.assignment4_utils import read_file_lines, parse_lines_to_dict
+from assignment4.query_service import load_query_index, serve
 
 
 def get_cli_args():
@@ -12,6 +14,14 @@ def get_cli_args():
     parser = argparse.ArgumentParser(description="Open chr21_genes.txt, and ask user for a gene name")
     parser.add_argument('-i', '--infile', type=str, required=False,
                         default='chr21_genes.txt', help="Path to the chr21_genes.txt file")
+    parser.add_argument('--serve', action='store_true',
+                        help="Answer JSON lookups over HTTP instead of asking interactively")
+    parser.add_argument('--host', type=str, default='127.0.0.1', help="Address to serve on")
+    parser.add_argument('--port', type=int, default=8021, help="Port to serve on")
+    parser.add_argument('--ccds_attributes', type=str, required=False,
+                        help="Path to a CCDS attributes file (CCDS.current.txt) for CCDS and region lookups")
+    parser.add_argument('--fasta', type=str, required=False,
+                        help="Path to a FASTA file of CCDS sequences for sequence lookups")
     return parser.parse_args()
 
 
@@ -37,12 +47,23 @@ def print_output(gene_dict: dict):
 def main():
     """
     Main function to execute the script's workflow: reads gene descriptions from a file,
-    then allows the user to query this data interactively.
+    then allows the user to query this data interactively, or serves it over HTTP with --serve.
     @return: None
     """
     # parse cli arguments
     args = get_cli_args()
 
+    if args.serve:
+        # load everything once, then answer requests until interrupted
+        index = load_query_index(args.infile, args.ccds_attributes, args.fasta)
+        try:
+            asyncio.run(serve(index, args.host, args.port))
+        except KeyboardInterrupt:
+            print("Thanks for querying the data.")
+        finally:
+            index.close()
+        return
+
     # read file and parse gene descriptions, sets headers to skip
     lines = read_file_lines(args.infile, skip_header=True)
     # sets parse_lines_to_dict to lowercase
@@ -0,0 +1,152 @@
+"""load_test_query_service.py
+Sends concurrent lookups to a running query service (gene_names_from_ch21.py --serve) over
+keep-alive connections and reports the latency percentiles and throughput.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from assignment4.assignment4_utils import read_file_lines, parse_lines_to_dict
+
+
+def get_cli_args():
+    """
+    Sets up command-line arguments for the script and parses them.
+    @return: Namespace object with command-line arguments as attributes.
+    """
+    # define and parse cli arguments
+    parser = argparse.ArgumentParser(description="Measure the request latency of the gene query service")
+    parser.add_argument('-i', '--infile', type=str, required=False,
+                        default='chr21_genes.txt', help="Gene file to draw the queried symbols from")
+    parser.add_argument('--host', type=str, default='127.0.0.1', help="Address of the query service")
+    parser.add_argument('--port', type=int, default=8021, help="Port of the query service")
+    parser.add_argument('-n', '--requests', type=int, default=10000, help="Total number of requests")
+    parser.add_argument('-c', '--concurrency', type=int, default=32, help="Number of concurrent connections")
+    parser.add_argument('--batch', type=int, default=0,
+                        help="Send POST /query batches of this many symbols instead of single GET lookups")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the random choice of symbols")
+    return parser.parse_args()
+
+
+def percentile(latencies: list[float], fraction: float) -> float:
+    """
+    Computes a percentile by the nearest-rank method.
+    @param latencies: The measured latencies.
+    @param fraction: The percentile as a fraction, e.g. 0.99.
+    @return: The smallest latency not exceeded by that fraction of the measurements.
+    """
+    ordered = sorted(latencies)
+    rank = max(math.ceil(fraction * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def build_request(host: str, symbols: list[str], batch: int) -> bytes:
+    """
+    Builds one HTTP/1.1 request: a GET lookup of one symbol, or a POST batch of `batch` symbols.
+    @param host: The service address for the Host header.
+    @param symbols: The symbols to choose from.
+    @param batch: The batch size (0 for a single GET lookup).
+    @return: The encoded request.
+    """
+    if not batch:
+        return f"GET /gene/{random.choice(symbols)} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode()
+    body = json.dumps([{"symbol": symbol} for symbol in random.choices(symbols, k=batch)]).encode()
+    return (f"POST /query HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    """
+    Reads one HTTP response.
+    @param reader: The connection's stream reader.
+    @return: The HTTP status code.
+    """
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if not line.strip():
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def run_client(host: str, port: int, requests: int, symbols: list[str], batch: int,
+                     latencies: list[float], statuses: dict[int, int]):
+    """
+    Sends requests one after another over one keep-alive connection, recording each latency.
+    @param host: The service address.
+    @param port: The service port.
+    @param requests: The number of requests to send.
+    @param symbols: The symbols to choose from.
+    @param batch: The batch size (0 for single GET lookups).
+    @param latencies: The list the latencies (in seconds) are appended to.
+    @param statuses: The dictionary counting the response status codes.
+    @return: None
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(requests):
+            request = build_request(host, symbols, batch)
+            started = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status = await read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def load_test(host: str, port: int, requests: int, concurrency: int, symbols: list[str],
+                    batch: int = 0) -> dict:
+    """
+    Runs the load test over `concurrency` connections.
+    @param host: The service address.
+    @param port: The service port.
+    @param requests: The total number of requests.
+    @param concurrency: The number of concurrent connections.
+    @param symbols: The symbols to choose from.
+    @param batch: The batch size (0 for single GET lookups).
+    @return: A dictionary of the request count, status counts, throughput and latency percentiles (ms).
+    """
+    latencies, statuses = [], {}
+    concurrency = max(min(concurrency, requests), 1)
+    shares = [requests // concurrency + (client < requests % concurrency) for client in range(concurrency)]
+    started = time.perf_counter()
+    await asyncio.gather(*(run_client(host, port, share, symbols, batch, latencies, statuses)
+                           for share in shares))
+    elapsed = time.perf_counter() - started
+    return {"requests": len(latencies), "statuses": statuses,
+            "requests_per_second": len(latencies) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 0.50) * 1000, "p99_ms": percentile(latencies, 0.99) * 1000,
+            "max_ms": max(latencies) * 1000}
+
+
+def main():
+    """
+    Main function to execute the script's workflow: reads the gene symbols, sends the requests
+    and prints the latency report.
+    @return: None
+    """
+    # parse cli arguments
+    args = get_cli_args()
+    random.seed(args.seed)
+
+    # query the symbols of the gene file, as users would
+    symbols = list(parse_lines_to_dict(read_file_lines(args.infile, skip_header=True)))
+    report = asyncio.run(load_test(args.host, args.port, args.requests, args.concurrency, symbols, args.batch))
+
+    statuses = ', '.join(f"{status}: {count}" for status, count in sorted(report['statuses'].items()))
+    print(f"Requests: {report['requests']} ({statuses})")
+    print(f"Throughput: {report['requests_per_second']:.0f} requests/s")
+    print(f"Latency p50: {report['p50_ms']:.3f} ms, p99: {report['p99_ms']:.3f} ms, max: {report['max_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
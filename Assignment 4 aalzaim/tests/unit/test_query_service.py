@@ -0,0 +1,124 @@
+"""test_query_service.py: Tests for query_service.py"""
+import asyncio
+import json
+import pytest
+from assignment4.query_service import (QueryError, index_fasta, load_query_index, read_ccds_attributes,
+                                       route, start_server)
+
+GENES = "Gene Symbol\tDescription\tCategory\nTPTE\ttensin\t1.1\nAPP\tamyloid beta precursor protein\t1.1\n"
+CCDS = ("#chromosome\tnc_accession\tgene\tgene_id\tccds_id\tccds_status\tcds_strand\tcds_from\tcds_to\t"
+        "cds_locations\tmatch_type\n"
+        "21\tNC_000021.9\tAPP\t351\tCCDS13576.1\tPublic\t-\t100\t900\t[100-200, 800-900]\tIdentical\n"
+        "21\tNC_000021.9\tTPTE\t7179\tCCDS13573.1\tPublic\t+\t5000\t5100\t[5000-5100]\tIdentical\n"
+        "21\tNC_000021.9\tOLD\t1\tCCDS1.1\tWithdrawn\t+\t-\t-\t-\tIdentical\n")
+FASTA = ">CCDS13576.1|Hs110|chr21\nATGCC\nGGTAA\n>CCDS13573.1|Hs110|chr21\nATGTGA\n"
+
+
+@pytest.fixture
+def index(tmp_path):
+    """
+    Builds a QueryIndex from small gene, CCDS attribute and FASTA files.
+    @return: The QueryIndex.
+    """
+    (tmp_path / "genes.txt").write_text(GENES)
+    (tmp_path / "ccds.txt").write_text(CCDS)
+    (tmp_path / "ccds.fna").write_text(FASTA)
+    query_index = load_query_index(str(tmp_path / "genes.txt"), str(tmp_path / "ccds.txt"), str(tmp_path / "ccds.fna"))
+    yield query_index
+    query_index.close()
+
+
+def test_read_ccds_attributes_and_index_fasta(tmp_path):
+    """
+    Tests that CCDS records without coordinates are skipped and that FASTA offsets cover the sequence lines.
+    @return: None
+    """
+    (tmp_path / "ccds.txt").write_text(CCDS)
+    (tmp_path / "ccds.fna").write_text(FASTA)
+    records = read_ccds_attributes(str(tmp_path / "ccds.txt"))
+    assert [record.ccds_id for record in records] == ["CCDS13576.1", "CCDS13573.1"], "Withdrawn record kept"
+    offsets = index_fasta(str(tmp_path / "ccds.fna"))
+    data = (tmp_path / "ccds.fna").read_bytes()
+    start, end = offsets["CCDS13576.1"]
+    assert data[start:end] == b"ATGCC\nGGTAA\n", "Offsets should span the record's sequence lines"
+
+
+def test_lookups(index):
+    """
+    Tests symbol, CCDS ID and region lookups.
+    @return: None
+    """
+    result = index.lookup_symbol("tpte")
+    assert result["symbol"] == "TPTE" and result["description"] == "tensin", "Symbol lookup is case-insensitive"
+    assert [record["ccds_id"] for record in result["ccds"]] == ["CCDS13573.1"]
+    assert index.lookup_ccds("CCDS13576.1", with_sequence=True)["sequence"] == "ATGCCGGTAA"
+    # regions overlapping the end, the inside and neither of the records
+    assert [r["ccds_id"] for r in index.lookup_region("chr21", 850, 5000)["ccds"]] == ["CCDS13576.1", "CCDS13573.1"]
+    assert [r["ccds_id"] for r in index.lookup_region("21", 300, 400)["ccds"]] == ["CCDS13576.1"]
+    assert index.lookup_region("21", 901, 4999)["ccds"] == [], "No record overlaps the gap"
+    with pytest.raises(QueryError):
+        index.lookup_symbol("NOPE")
+    with pytest.raises(QueryError):
+        index.lookup_region("21", 10, 5)
+
+
+def test_route(index):
+    """
+    Tests the HTTP routes, including per-query errors of a batch.
+    @return: None
+    """
+    assert route(index, 'GET', '/gene/APP')[1]["description"] == "amyloid beta precursor protein"
+    assert route(index, 'GET', '/region?chromosome=21&start=5050&end=5060')[1]["ccds"][0]["gene"] == "TPTE"
+    assert route(index, 'GET', '/region?chromosome=21&start=x&end=1')[0] == 400
+    assert route(index, 'GET', '/nothing')[0] == 404
+    assert route(index, 'GET', '/query')[0] == 405
+    status, results = route(index, 'POST', '/query', json.dumps([{"symbol": "app"}, {"ccds_id": "CCDS9.9"}]).encode())
+    assert status == 200 and results[0]["result"]["symbol"] == "APP"
+    assert results[1]["status"] == 404, "A failed query should not fail the whole batch"
+    assert route(index, 'POST', '/query', b'{not json')[0] == 400
+
+
+def test_server_keep_alive(index):
+    """
+    Tests two requests over one keep-alive connection to a running server.
+    @return: None
+    """
+    async def exchange():
+        server = await start_server(index, '127.0.0.1', 0)
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.sockets[0].getsockname()[1])
+        bodies = []
+        body = json.dumps([{"chromosome": "21", "start": 0, "end": 100}]).encode()
+        for request in (b"GET /ccds/CCDS13573.1?sequence=1 HTTP/1.1\r\n\r\n",
+                        b"POST /query HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body)):
+            writer.write(request)
+            assert (await reader.readline()).startswith(b"HTTP/1.1 200")
+            headers = (await reader.readuntil(b"\r\n\r\n")).decode()
+            length = int(headers.split("Content-Length: ")[1].split("\r\n")[0])
+            bodies.append(json.loads(await reader.readexactly(length)))
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return bodies
+
+    ccds, batch = asyncio.run(exchange())
+    assert ccds["sequence"] == "ATGTGA"
+    assert batch[0]["result"]["ccds"][0]["ccds_id"] == "CCDS13576.1"
+
+
+def test_server_bad_content_length(index):
+    """
+    Tests that a non-numeric Content-Length header gets a 400 response instead of a dropped connection.
+    @return: None
+    """
+    async def exchange():
+        server = await start_server(index, '127.0.0.1', 0)
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.sockets[0].getsockname()[1])
+        writer.write(b"POST /query HTTP/1.1\r\nContent-Length: ten\r\n\r\n[]")
+        response = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response
+
+    response = asyncio.run(exchange())
+    assert response.startswith(b"HTTP/1.1 400") and b"Content-Length header" in response
@@ -1,8 +1,83 @@
-from sequence_attributes.utils.io_utils import FileHandler
-from sequence_attributes.sequence_formats.fasta_format import get_fasta_lists
-from sequence_attributes.utils.seq_attribute_utils import (gc_content,
-                                                           get_tm_from_dna_sequence, lookup_by_ccds,
-                                                           get_sequence_composition, extract_kmers,
-                                                           protein_translation, return_standard_genetic_code,
-                                                           calculate_amino_acid_content,
-                                                           get_additional_sequence_attributes)
+"""sequence_attributes
+Submodules are imported on first use of one of their names (PEP 562), so
+`from sequence_attributes import gc_content` does not import pandas, the
+annotation loaders or the pipeline.
+"""
+import importlib
+
+_EXPORTS = {
+    'sequence_attributes.utils.io_utils': ['FileHandler'],
+    'sequence_attributes.utils.cache_utils': ['AttributeCache'],
+    'sequence_attributes.sequence_formats.fasta_format': ['get_fasta_lists', 'iter_fasta_records',
+                                                          'get_fasta_headers', 'get_record_boundaries',
+                                                          'iter_fasta_records_in_range', 'write_fasta_record'],
+    'sequence_attributes.sequence_formats.packed_format': ['PackedSequenceStore'],
+    'sequence_attributes.sequence_formats.header_format': ['FastaHeader', 'parse_header', 'parse_ccds_header',
+                                                           'build_header_index', 'read_indexed_records'],
+    'sequence_attributes.sequence_formats.fasta_lint': ['lint_fasta', 'check_fasta', 'format_lint_report',
+                                                        'LintIssue', 'LintReport'],
+    'sequence_attributes.sequence_formats.fastq_format': ['iter_fastq_records', 'iter_fastq_batches', 'FastqBatch',
+                                                          'read_statistics', 'FastqProfile', 'fastq_statistics'],
+    'sequence_attributes.sequence_formats.interval_format': ['Interval', 'read_ccds_intervals', 'read_bed_intervals',
+                                                             'read_gtf_intervals'],
+    'sequence_attributes.utils.seq_attribute_utils': ['gc_content',
+                                                      'get_tm_from_dna_sequence', 'lookup_by_ccds',
+                                                      'get_sequence_composition', 'extract_kmers',
+                                                      'protein_translation', 'return_standard_genetic_code',
+                                                      'calculate_amino_acid_content',
+                                                      'return_amino_acid_residue_masses',
+                                                      'get_amino_acid_profile', 'calculate_molecular_weight',
+                                                      'get_amino_acid_profile_matrix', 'compute_sequence_attributes',
+                                                      'compute_sequence_attributes_chunk',
+                                                      'assemble_sequence_attributes',
+                                                      'pack_sequences', 'gc_content_batch',
+                                                      'get_sequence_composition_batch',
+                                                      'get_tm_from_dna_sequence_batch', 'protein_translation_batch',
+                                                      'calculate_amino_acid_content_batch',
+                                                      'return_nearest_neighbor_parameters',
+                                                      'get_additional_sequence_attributes'],
+    'sequence_attributes.utils.codon_utils': ['CODONS', 'codon_histogram', 'codon_histogram_batch',
+                                              'codon_histograms', 'merge_codon_histograms', 'rscu',
+                                              'relative_adaptiveness', 'codon_adaptation_index',
+                                              'codon_usage_rows'],
+    'sequence_attributes.utils.orf_utils': ['ORF', 'find_orfs', 'find_orfs_batch', 'return_genetic_code'],
+    'sequence_attributes.utils.window_utils': ['gc_content_windows', 'tm_windows', 'profile_windows',
+                                               'write_window_profiles'],
+    'sequence_attributes.utils.pipeline_utils': ['run_pipeline', 'compute_fasta_attributes_pipelined'],
+    'sequence_attributes.utils.annotation_utils': ['load_ccds_attributes', 'load_ensembl_genes',
+                                                   'load_merged_annotation', 'build_annotation_snapshot',
+                                                   'load_annotation_snapshot', 'snapshot_is_fresh'],
+    'sequence_attributes.utils.dedup_utils': ['SequenceDeduplicator', 'DedupStats', 'dedup_fasta',
+                                              'sequence_digest'],
+    'sequence_attributes.utils.strand_utils': ['complement', 'reverse_complement', 'reverse_complement_packed',
+                                               'normalize_case', 'hard_mask', 'mask_intervals'],
+    'sequence_attributes.utils.extract_utils': ['index_fasta', 'extract_features'],
+    'sequence_attributes.utils.sketch_utils': ['KmerSketch', 'CountMinSketch', 'HyperLogLog', 'kmer_codes',
+                                               'encode_kmer'],
+    'sequence_attributes.utils.minhash_utils': ['minhash_signature', 'build_signatures', 'lsh_candidate_pairs',
+                                                'all_vs_all_similarity', 'write_similarity_edges'],
+    'sequence_attributes.utils.motif_utils': ['AhoCorasick', 'SuffixArrayIndex', 'MotifHit', 'COMMON_MOTIFS',
+                                              'expand_iupac', 'search_records'],
+    'sequence_attributes.utils.excel_utils': ['write_excel', 'write_tsv_shards', 'plan_excel_parts',
+                                              'limit_cell_lengths', 'ExcelParts', 'EXCEL_MAX_ROWS',
+                                              'DEFAULT_MAX_CELLS_PER_FILE', 'excel_side_path'],
+    'sequence_attributes.utils.shard_utils': ['prepare_shards', 'run_shard', 'incomplete_shards',
+                                              'load_shard_rows', 'iter_shard_rows'],
+    'sequence_attributes.utils.topk_utils': ['TopKSelector'],
+}
+_MODULE_OF = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = list(_MODULE_OF)
+
+
+def __getattr__(name):
+    """Imports the submodule that defines `name` and caches the attribute on the package."""
+    if name not in _MODULE_OF:
+        raise AttributeError(f"module 'sequence_attributes' has no attribute '{name}'")
+    value = getattr(importlib.import_module(_MODULE_OF[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
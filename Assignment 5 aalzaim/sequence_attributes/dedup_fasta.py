@@ -0,0 +1,47 @@
+"""dedup_fasta.py
+Collapses byte-identical sequences of a FASTA file: the first record of each unique
+sequence is written to the output FASTA file, and every input header is mapped to that
+representative in a tab-separated mapping file.
+Usage:
+python -m sequence_attributes.dedup_fasta --infile <FASTA file>
+--outfile <collapsed FASTA file> --mapping_outfile <ID mapping file> [--line_width <width>] [--lint]
+"""
+import argparse
+import sys
+from sequence_attributes.sequence_formats.fasta_format import iter_fasta_records
+from sequence_attributes.sequence_formats.fasta_lint import check_fasta
+from sequence_attributes.utils.io_utils import FileHandler
+from sequence_attributes.utils.dedup_utils import dedup_fasta, format_dedup_stats
+
+
+def get_cli_args():
+    """
+        Parses and returns command-line arguments for FASTA deduplication.
+
+        @return: The parsed arguments from the command line.
+        """
+    parser = argparse.ArgumentParser(description="Collapse identical sequences of a FASTA file.")
+    parser.add_argument("--infile", required=True, help="Path to the FASTA file.")
+    parser.add_argument("--outfile", required=True, help="Path for the collapsed FASTA file.")
+    parser.add_argument("--mapping_outfile", required=True,
+                        help="Path for the header to representative header mapping (TSV).")
+    parser.add_argument("--line_width", type=int, default=70,
+                        help="Sequence line width of the output (0 for one line per record).")
+    parser.add_argument("--lint", action="store_true",
+                        help="Check the FASTA file for duplicate IDs and empty records before running.")
+    return parser.parse_args()
+
+
+def main():
+    """Streams the FASTA records through the deduplicator into the output files."""
+    args = get_cli_args()
+    if args.lint:
+        check_fasta(args.infile, alphabet=None)
+    with FileHandler(args.outfile, mode='w') as fasta_outfile, \
+            FileHandler(args.mapping_outfile, mode='w') as mapping_outfile:
+        stats = dedup_fasta(iter_fasta_records(args.infile), fasta_outfile, mapping_outfile, args.line_width)
+    print(format_dedup_stats(stats), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
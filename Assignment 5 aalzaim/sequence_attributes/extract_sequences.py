@@ -0,0 +1,64 @@
+"""extract_sequences.py
+Extracts CDS, exon or other interval sequences from a chromosome FASTA file, using the
+coordinates of a CCDS attributes file, a BED file or a GTF file. Exons of one feature are
+spliced together and minus-strand features are reverse complemented, so the output can be
+passed to main.py as --infile_ccds_fasta.
+Usage:
+python -m sequence_attributes.extract_sequences --infile_fasta <chromosome FASTA file>
+(--infile_ccds_attributes <CCDS file> | --infile_bed <BED file> | --infile_gtf <GTF file>)
+--outfile <FASTA file> [--gtf_feature CDS] [--gtf_group_by transcript_id] [--line_width 70] [--keep_case]
+[--lint]
+"""
+import argparse
+import sys
+from sequence_attributes.sequence_formats.fasta_lint import check_fasta
+from sequence_attributes.sequence_formats.interval_format import (read_ccds_intervals, read_bed_intervals,
+                                                                  read_gtf_intervals)
+from sequence_attributes.utils.io_utils import FileHandler
+from sequence_attributes.utils.extract_utils import extract_features
+
+
+def get_cli_args():
+    """
+        Parses and returns command-line arguments for sequence extraction.
+
+        @return: The parsed arguments from the command line.
+        """
+    parser = argparse.ArgumentParser(description="Extract interval sequences from a chromosome FASTA file.")
+    parser.add_argument("--infile_fasta", required=True, help="Path to the chromosome FASTA file (uncompressed).")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--infile_ccds_attributes", help="CCDS attributes file; extracts spliced CDS per CCDS ID.")
+    source.add_argument("--infile_bed", help="BED file; BED12 lines are spliced by their blocks.")
+    source.add_argument("--infile_gtf", help="GTF file; lines of one feature type are spliced per group.")
+    parser.add_argument("--gtf_feature", default="CDS", help="GTF feature type to extract.")
+    parser.add_argument("--gtf_group_by", default="transcript_id", help="GTF attribute that groups the lines.")
+    parser.add_argument("--outfile", required=True, help="Path for the extracted FASTA file.")
+    parser.add_argument("--line_width", type=int, default=70,
+                        help="Sequence line width of the output (0 for one line per record).")
+    parser.add_argument("--keep_case", action="store_true",
+                        help="Keep soft-masked (lower-case) bases; by default the output is upper case, as main.py "
+                             "requires.")
+    parser.add_argument("--lint", action="store_true",
+                        help="Check the chromosome FASTA file for duplicate names and non-IUPAC characters "
+                             "before extracting.")
+    return parser.parse_args()
+
+
+def main():
+    """Reads the intervals and writes the extracted sequences."""
+    args = get_cli_args()
+    if args.lint:
+        check_fasta(args.infile_fasta, alphabet="iupac")
+    if args.infile_ccds_attributes:
+        features = read_ccds_intervals(args.infile_ccds_attributes)
+    elif args.infile_bed:
+        features = read_bed_intervals(args.infile_bed)
+    else:
+        features = read_gtf_intervals(args.infile_gtf, args.gtf_feature, args.gtf_group_by)
+    with FileHandler(args.outfile, mode='w') as outfile:
+        stats = extract_features(args.infile_fasta, features, outfile, args.line_width, args.keep_case)
+    print(f"Extracted {stats.features} features ({stats.bases} bases)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""fastq_stats.py
+Profiles a FASTQ file (plain or gzip-compressed) in one streaming pass: a summary of read
+count, lengths, GC content and base qualities is printed, and the per-position quality and
+base composition table, per-read statistics (length, GC, mean quality, base counts) and the
+reads as FASTA, for the FASTA tools of this package, can be written.
+Usage:
+python -m sequence_attributes.fastq_stats --infile <FASTQ file> [--position_outfile <TSV file>]
+[--per_read_outfile <TSV file>] [--fasta_outfile <FASTA file>] [--phred_offset 33]
+[--max_positions 1000] [--batch_size 65536] [--line_width 70]
+"""
+import argparse
+import sys
+from contextlib import nullcontext
+from sequence_attributes.sequence_formats.fastq_format import fastq_statistics
+from sequence_attributes.utils.io_utils import FileHandler
+
+
+def get_cli_args():
+    """
+        Parses and returns command-line arguments for FASTQ statistics.
+
+        @return: The parsed arguments from the command line.
+        """
+    parser = argparse.ArgumentParser(description="Profile the reads and base qualities of a FASTQ file.")
+    parser.add_argument("--infile", required=True, help="Path to the FASTQ file (plain or gzip-compressed).")
+    parser.add_argument("--position_outfile", default=None,
+                        help="Optional path for the per-position quality and base composition table.")
+    parser.add_argument("--per_read_outfile", default=None,
+                        help="Optional path for per-read length, GC, mean quality and base counts.")
+    parser.add_argument("--fasta_outfile", default=None, help="Optional path for the reads as FASTA.")
+    parser.add_argument("--phred_offset", type=int, choices=[33, 64], default=33,
+                        help="ASCII offset of the quality scores (64 for old Illumina files).")
+    parser.add_argument("--max_positions", type=int, default=1000,
+                        help="Read positions profiled separately; later positions are pooled.")
+    parser.add_argument("--batch_size", type=int, default=65536, help="Reads processed per batch.")
+    parser.add_argument("--line_width", type=int, default=70,
+                        help="Sequence line width of the FASTA output (0 for one line per record).")
+    return parser.parse_args()
+
+
+def main():
+    """Profiles the FASTQ file and writes the requested tables."""
+    args = get_cli_args()
+    with (FileHandler(args.per_read_outfile, mode='w') if args.per_read_outfile else nullcontext()) as read_outfile, \
+            (FileHandler(args.fasta_outfile, mode='w') if args.fasta_outfile else nullcontext()) as fasta_outfile:
+        profile = fastq_statistics(args.infile, args.phred_offset, args.max_positions, args.batch_size,
+                                   read_outfile, fasta_outfile, args.line_width)
+    if args.position_outfile:
+        rows = profile.position_rows()
+        with FileHandler(args.position_outfile, mode='w') as outfile:
+            if rows:
+                outfile.write("\t".join(rows[0]) + "\n")
+            outfile.writelines("\t".join(str(value) for value in row.values()) + "\n" for row in rows)
+    summary = profile.summary()
+    print(f"{summary.reads} reads, {summary.bases} bases (length {summary.min_length}-{summary.max_length}), "
+          f"GC {summary.gc}%, mean quality {summary.mean_quality}, Q30 {100 * summary.q30_fraction:.2f}%",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
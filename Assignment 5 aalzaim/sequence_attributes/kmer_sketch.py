@@ -0,0 +1,81 @@
+"""kmer_sketch.py
+Counts the k-mers of one or more FASTA files approximately, in fixed memory: a count-min
+sketch estimates per-k-mer counts and a HyperLogLog the number of distinct k-mers. Files are
+counted in parallel worker processes and their sketches merged; saved sketches can be merged
+into later runs.
+Usage:
+python -m sequence_attributes.kmer_sketch --infile <FASTA file> [<FASTA file> ...] --k 21
+[--memory_mb 64] [--canonical] [--workers 4] [--outfile <sketch.npz>]
+[--merge <sketch.npz> ...] [--query <k-mer> ...]
+"""
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from sequence_attributes.sequence_formats.fasta_format import iter_fasta_records
+from sequence_attributes.utils.sketch_utils import KmerSketch
+
+
+def get_cli_args():
+    """
+        Parses and returns command-line arguments for approximate k-mer counting.
+
+        @return: The parsed arguments from the command line.
+        """
+    parser = argparse.ArgumentParser(description="Approximate k-mer counts and distinct k-mers in fixed memory.")
+    parser.add_argument("--infile", nargs="*", default=[], help="Paths to FASTA files.")
+    parser.add_argument("--k", type=int, required=True, help="K-mer length (1 to 32).")
+    parser.add_argument("--memory_mb", type=int, default=64, help="Memory for the count-min sketch counters.")
+    parser.add_argument("--depth", type=int, default=4, help="Count-min sketch rows (confidence 1 - e^-depth).")
+    parser.add_argument("--precision", type=int, default=14,
+                        help="HyperLogLog precision (2^precision registers, error 1.04 / sqrt(2^precision)).")
+    parser.add_argument("--canonical", action="store_true", help="Count k-mers with their reverse complements.")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes, one input file each.")
+    parser.add_argument("--merge", nargs="*", default=[], help="Saved sketches to merge into the result.")
+    parser.add_argument("--outfile", required=False, default=None, help="Path to save the sketch (.npz).")
+    parser.add_argument("--query", nargs="*", default=[], help="K-mers whose estimated counts are printed.")
+    args = parser.parse_args()
+    wrong_length = [kmer for kmer in args.query if len(kmer) != args.k]
+    if wrong_length:  # checked before counting, not after
+        parser.error(f"--query k-mers must have length {args.k}: {' '.join(wrong_length)}")
+    return args
+
+
+def sketch_file(infile, k, memory_mb, depth, precision, canonical):
+    """
+        Counts the k-mers of one FASTA file (run in a worker process).
+
+        @return: The file's KmerSketch.
+        """
+    sketch = KmerSketch.from_memory(k, memory_mb * 1024 ** 2, depth, precision, canonical)
+    sketch.add_records(iter_fasta_records(infile))
+    return sketch
+
+
+def main():
+    """Counts, merges and reports the sketches."""
+    args = get_cli_args()
+    sketch = KmerSketch.from_memory(args.k, args.memory_mb * 1024 ** 2, args.depth, args.precision, args.canonical)
+    sketch_args = (args.k, args.memory_mb, args.depth, args.precision, args.canonical)
+    if args.workers > 1 and len(args.infile) > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            for file_sketch in executor.map(sketch_file, args.infile, *[[arg] * len(args.infile)
+                                                                        for arg in sketch_args]):
+                sketch.merge(file_sketch)
+    else:
+        for infile in args.infile:
+            sketch.merge(sketch_file(infile, *sketch_args))
+    for path in args.merge:
+        sketch.merge(KmerSketch.load(path))
+
+    errors = sketch.errors()
+    print(f"{sketch.counts.total} k-mers, about {sketch.distinct_count():.0f} distinct "
+          f"(relative error {errors.distinct_relative_error:.2%}); counts overestimate by at most "
+          f"{errors.count_error:.1f} with probability {errors.count_confidence:.3f}", file=sys.stderr)
+    for kmer, count in zip(args.query, sketch.estimate(args.query) if args.query else []):
+        print(f"{kmer}\t{count}")
+    if args.outfile:
+        sketch.save(args.outfile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""lint_fasta.py
+Checks a FASTA file for duplicate IDs, empty records, illegal characters, blank lines,
+mixed line widths and Windows line endings in one streaming pass, reporting each problem
+with its line number, and optionally writes a normalized copy. Exits with status 1 if
+errors (not just warnings) were found.
+Usage:
+python -m sequence_attributes.lint_fasta --infile <FASTA file> [--alphabet acgt|dna|rna|iupac|protein|any]
+[--outfile <normalized FASTA file>] [--line_width 70] [--max_issues 100]
+"""
+import argparse
+import sys
+from contextlib import nullcontext
+from sequence_attributes.sequence_formats.fasta_lint import ALPHABETS, lint_fasta, format_lint_report, has_errors
+from sequence_attributes.utils.io_utils import FileHandler
+
+
+def get_cli_args():
+    """
+        Parses and returns command-line arguments for FASTA linting.
+
+        @return: The parsed arguments from the command line.
+        """
+    parser = argparse.ArgumentParser(description="Validate and optionally normalize a FASTA file.")
+    parser.add_argument("--infile", required=True, help="Path to the FASTA file.")
+    parser.add_argument("--alphabet", choices=sorted(ALPHABETS) + ["any"], default="dna",
+                        help="Allowed sequence characters ('any' skips the character check).")
+    parser.add_argument("--outfile", required=False, default=None,
+                        help="Optional path for a normalized copy: LF line endings, fixed line width, duplicate "
+                             "IDs and empty records dropped, illegal characters replaced with N (X for protein).")
+    parser.add_argument("--line_width", type=int, default=70,
+                        help="Sequence line width of the normalized copy (0 for one line per record).")
+    parser.add_argument("--max_issues", type=int, default=100, help="Issues listed per issue type.")
+    return parser.parse_args()
+
+
+def main():
+    """Lints the FASTA file and prints the report to stderr."""
+    args = get_cli_args()
+    alphabet = None if args.alphabet == "any" else args.alphabet
+    with (FileHandler(args.outfile, mode='w') if args.outfile else nullcontext()) as fasta_outfile:
+        report = lint_fasta(args.infile, alphabet, fasta_outfile, args.line_width, args.max_issues)
+    print(format_lint_report(report), file=sys.stderr)
+    if has_errors(report):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,11 +8,45 @@ python main.py --infile_ccds_fasta <FASTA file>
 --infile_ccds_attributes <CCDS attributes>
 --infile_ensembl_gene <Ensembl gene data>
 --excel_outfile <output Excel file>
+[--annotation_snapshot <snapshot file>] [--lint] [--codon_usage] [--strand +|-]
+[--max_rows_per_sheet <rows>] [--max_cells_per_file <cells>] [--detail_tsv] [--writer_workers <workers>]
+python main.py build-annotation --infile_ccds_attributes <CCDS attributes>
+--infile_ensembl_gene <Ensembl gene data> --snapshot <snapshot file>
+python main.py merge-shards --shard_dir <shard directory> --excel_outfile <output Excel file>
+[--summary_only] [--codon_usage]
+[--max_rows_per_sheet <rows>] [--max_cells_per_file <cells>] [--detail_tsv] [--writer_workers <workers>]
 """
 import argparse
+import math
+import numbers
 import sys
+from contextlib import nullcontext
 import pandas as pd
-from sequence_attributes import *
+from sequence_attributes import (AttributeCache, get_fasta_lists, get_fasta_headers, return_standard_genetic_code,
+                                 get_additional_sequence_attributes, compute_fasta_attributes_pipelined,
+                                 load_merged_annotation, build_annotation_snapshot, SequenceDeduplicator,
+                                 prepare_shards, run_shard, load_shard_rows, iter_shard_rows, parse_ccds_header,
+                                 check_fasta, TopKSelector, codon_histograms, merge_codon_histograms,
+                                 relative_adaptiveness, codon_adaptation_index, rscu, codon_usage_rows, CODONS,
+                                 write_excel, write_tsv_shards, excel_side_path, EXCEL_MAX_ROWS,
+                                 DEFAULT_MAX_CELLS_PER_FILE)
+
+
+def add_writer_args(parser):
+    """
+        Adds the arguments that control how the detail table is written.
+
+        @param parser: The argparse parser of a command that writes the outputs.
+        """
+    parser.add_argument("--max_rows_per_sheet", type=int, required=False, default=EXCEL_MAX_ROWS - 1,
+                        help="Records per Excel sheet; larger tables continue on further sheets.")
+    parser.add_argument("--max_cells_per_file", type=int, required=False, default=DEFAULT_MAX_CELLS_PER_FILE,
+                        help="Cells per Excel file; larger tables continue in <name>.part2.xlsx and so on.")
+    parser.add_argument("--detail_tsv", action="store_true",
+                        help="Also write every record as TSV shards <name>.detail.part0001.tsv, ... of "
+                             "--max_rows_per_sheet records each.")
+    parser.add_argument("--writer_workers", type=int, required=False, default=0,
+                        help="Worker processes writing Excel files and TSV shards in parallel.")
 
 
 def get_cli_args():
@@ -32,68 +66,212 @@ def get_cli_args():
                         required=True, help="Path to the Ensembl gene data file.")
     parser.add_argument("--excel_outfile",
                         required=True, help="Path for the output Excel file.")
+    parser.add_argument("--cache_path", required=False, default=None,
+                        help="Path to a persistent attribute cache; unchanged sequences are not recomputed.")
+    parser.add_argument("--cache_max_mb", type=int, required=False, default=1024,
+                        help="Size cap of the attribute cache in megabytes (least recently used entries are evicted).")
+    parser.add_argument("--workers", type=int, required=False, default=0,
+                        help="Number of worker processes; with 1 or more, FASTA parsing, attribute computation "
+                             "and row assembly run as an overlapped pipeline.")
+    parser.add_argument("--chunk_size", type=int, required=False, default=256,
+                        help="Records per pipeline chunk.")
+    parser.add_argument("--queue_size", type=int, required=False, default=8,
+                        help="Maximum chunks waiting between pipeline stages.")
+    parser.add_argument("--csv_engine", choices=["c", "pyarrow"], required=False, default="c",
+                        help="pandas engine for reading the CCDS and Ensembl tables (pyarrow if installed).")
+    parser.add_argument("--annotation_snapshot", required=False, default=None,
+                        help="Merged annotation snapshot from the build-annotation command; "
+                             "used instead of the TSV files while their hashes still match.")
+    parser.add_argument("--no_dedup", action="store_true",
+                        help="Compute attributes for every record, even when its sequence appeared earlier.")
+    parser.add_argument("--shard_dir", required=False, default=None,
+                        help="Directory for sharded, resumable runs; finished checkpoints are not recomputed.")
+    parser.add_argument("--num_shards", type=int, required=False, default=1,
+                        help="Number of shards the FASTA file is split into (by byte ranges at record starts).")
+    parser.add_argument("--shard_index", type=int, required=False, default=None,
+                        help="Run only this shard (0-based) and skip the outputs, e.g. for one cluster job; "
+                             "combine the shards with merge-shards. By default all shards are run and merged.")
+    parser.add_argument("--checkpoint_every", type=int, required=False, default=1000,
+                        help="Records per shard checkpoint.")
+    parser.add_argument("--lint", action="store_true",
+                        help="Check the FASTA file for duplicate IDs, empty records and characters other than "
+                             "upper-case ACGT (which the melting temperature rejects) before running.")
+    parser.add_argument("--codon_usage", action="store_true",
+                        help="Add codon adaptation index and RSCU columns to the Excel output and write the "
+                             "codon usage of the whole set to a .codon_usage.tsv file.")
+    parser.add_argument("--strand", choices=["+", "-"], required=False, default="+",
+                        help="'-' to compute the attributes of the reverse complement of every sequence, e.g. for "
+                             "minus-strand CDS in genomic orientation. CCDS nucleotide files are already in coding "
+                             "orientation.")
+    add_writer_args(parser)
     return parser.parse_args()
 
 
-def main():
-    """"Main Business Logic
+def get_build_annotation_args(argv):
+    """
+        Parses the arguments of the build-annotation command.
 
-        Main function to orchestrate the processing of CCDS and Ensembl gene data along with FASTA sequences,
-        and output the results to an Excel file.
+        @param argv: The command-line arguments after 'build-annotation'.
+        @return: The parsed arguments.
+        """
+    parser = argparse.ArgumentParser(prog="main.py build-annotation",
+                                     description="Merge the CCDS and Ensembl tables into a binary snapshot.")
+    parser.add_argument("--infile_ccds_attributes",
+                        required=True, help="Path to the CCDS attributes file.")
+    parser.add_argument("--infile_ensembl_gene",
+                        required=True, help="Path to the Ensembl gene data file.")
+    parser.add_argument("--snapshot", required=True,
+                        help="Output path ending in .feather or .parquet (need pyarrow) or .pkl.")
+    parser.add_argument("--csv_engine", choices=["c", "pyarrow"], required=False, default="c",
+                        help="pandas engine for reading the CCDS and Ensembl tables (pyarrow if installed).")
+    return parser.parse_args(argv)
 
-        This function does the following:
-        - Parses command-line arguments for input and output files.
-        - Loads and processes CCDS attributes and Ensembl gene data from provided input files.
-        - Merges CCDS and Ensembl data frames on the gene column.
-        - Retrieves FASTA sequences and headers using `get_fasta_lists`.
-        - Extracts additional sequence attributes for each FASTA sequence.
-        - Compiles a summary DataFrame of the top and bottom 10 sequences based on proline composition.
-        - Saves the summary to a TSV file and detailed attributes to an Excel file.
+
+def build_annotation(argv):
+    """Builds the merged annotation snapshot used by `--annotation_snapshot`."""
+    args = get_build_annotation_args(argv)
+    n_rows = build_annotation_snapshot(args.infile_ccds_attributes, args.infile_ensembl_gene,
+                                       args.snapshot, engine=args.csv_engine)
+    print(f"Wrote {n_rows} annotation rows to {args.snapshot}", file=sys.stderr)
+
+
+def get_merge_shards_args(argv):
+    """
+        Parses the arguments of the merge-shards command.
+
+        @param argv: The command-line arguments after 'merge-shards'.
+        @return: The parsed arguments.
         """
-    args = get_cli_args()
-    # load and preprocess ccds and ensembl data
-    ccds_attributes_df = pd.read_csv(args.infile_ccds_attributes, sep='\t')
-    ccds_attributes_df.rename(columns={
-        'gene_id': 'refseq_gene_id', '#chromosome': 'chrom'}, inplace=True)
+    parser = argparse.ArgumentParser(prog="main.py merge-shards",
+                                     description="Merge finished shards into the TSV and Excel outputs.")
+    parser.add_argument("--shard_dir", required=True, help="Directory of a sharded run.")
+    parser.add_argument("--codon_usage", action="store_true",
+                        help="Add codon usage columns and the .codon_usage.tsv file, as in a single run.")
+    parser.add_argument("--summary_only", action="store_true",
+                        help="Write only the proline summary TSV, streaming the shard rows instead of loading them.")
+    parser.add_argument("--excel_outfile",
+                        required=True, help="Path for the output Excel file.")
+    add_writer_args(parser)
+    return parser.parse_args(argv)
 
-    ensembl_gene_df = pd.read_csv(args.infile_ensembl_gene, sep='\t')
-    ensembl_gene_df.rename(
-        columns={
-            'ID': 'ensembl_gene_id', 'Canonical Transcript': 'ensembl_canonical_transcript_id',
-            'Gene': 'gene', 'Description': 'description', 'Biotype': 'biotype'}, inplace=True)
 
-    # merge ccds and ensembl data on gene names
-    merged_df = pd.merge(ccds_attributes_df, ensembl_gene_df, on='gene', how='left')
+def merge_shards(argv):
+    """Writes the outputs of a sharded run once all of its shards have finished."""
+    args = get_merge_shards_args(argv)
+    if args.summary_only:
+        selector, float_columns = select_proline_summary(iter_shard_rows(args.shard_dir))
+        write_proline_summary(selector, float_columns, args.excel_outfile)
+        return
+    write_outputs(load_shard_rows(args.shard_dir), args.excel_outfile, codon_usage=args.codon_usage,
+                  writer_args=args)
+
+
+def add_codon_usage(all_data, excel_outfile):
+    """
+        Adds the codon adaptation index and RSCU of every record to its row, and writes the codon
+        usage of the whole set to a TSV file. The CAI weights come from the whole set's codon usage.
+
+        @param all_data: The row dictionaries of every record.
+        @param excel_outfile: Path for the output Excel file; the codon usage file name is derived from it.
+        @return: The row dictionaries with the columns codon_adaptation_index and rscu added.
+        """
+    genetic_code = return_standard_genetic_code()
+    histograms = codon_histograms(row['dna_sequence'] for row in all_data)
+    aggregate = merge_codon_histograms(histograms)
+    weights = relative_adaptiveness(aggregate, genetic_code)
+    cai_values = codon_adaptation_index(histograms, weights, genetic_code)
+    rscu_values = rscu(histograms, genetic_code)
+
+    pd.DataFrame(codon_usage_rows(aggregate, genetic_code, weights)).to_csv(
+        excel_outfile.replace('.xlsx', '.codon_usage.tsv'), sep='\t', index=False)
+    return [dict(row, codon_adaptation_index=round(float(cai), 3),
+                 rscu={codon: round(float(value), 2) for codon, value in zip(CODONS, values)
+                           if not math.isnan(value)})
+            for row, cai, values in zip(all_data, cai_values, rscu_values)]
+
+
+SUMMARY_COLUMNS = [
+    'ccds_id', 'refseq_gene_id', 'biotype', 'ensembl_gene_id',
+    'description', 'protein_sequence_length', 'proline_comp']
+
+
+def _track_float_columns(row, column_kinds):
+    """
+        Records, for each summary column, whether the whole table's column holds only numbers
+        and whether any of them is a float or missing; pandas infers such columns as float64.
+        """
+    gene_info = row.get('additional_gene_info') or {}
+    for column, kinds in column_kinds.items():
+        value = gene_info[column] if column in gene_info else row.get(column)
+        if value is None or value != value:  # missing or NaN
+            kinds[1] = True
+        elif isinstance(value, numbers.Number) and not isinstance(value, bool):
+            kinds[1] = kinds[1] or not isinstance(value, numbers.Integral)
+        else:
+            kinds[0] = False
+
+
+def select_proline_summary(row_groups):
+    """
+        Selects the top and bottom 10 records by proline composition and protein length without
+        sorting every record; the order and ties are those of sorting the whole table.
+
+        @param row_groups: Iterables of row dictionaries in input order, e.g. one per shard; each
+        group is selected separately and the selections are merged.
+        @return: A tuple of (the merged TopKSelector, the summary columns that are float64 in the
+        whole table, e.g. integer IDs with a missing value in a row that was not selected).
+        """
+    selector = TopKSelector(10, ['proline_comp', 'protein_sequence_length'], ascending=[False, False])
+    column_kinds = {column: [True, False] for column in SUMMARY_COLUMNS}  # [only numbers, float or missing]
+    for group_index, rows in enumerate(row_groups):
+        group_selector = TopKSelector(selector.k, selector.columns, selector.ascending)
+        for row_index, row in enumerate(rows):
+            group_selector.add(row, (group_index, row_index))
+            _track_float_columns(row, column_kinds)
+        selector.merge(group_selector)
+    float_columns = [column for column, (numbers_only, has_float) in column_kinds.items()
+                     if numbers_only and has_float]
+    return selector, float_columns
 
-    # retrieve and process fasta sequences
-    seq_header, sequence = get_fasta_lists(args.infile_ccds_fasta)
-    all_data = []
-    for i, (header, dna_sequence) in enumerate(zip(seq_header, sequence)):
-        attributes = get_additional_sequence_attributes(header,
-                                                        dna_sequence, merged_df, return_standard_genetic_code())
-        all_data.append(attributes._asdict())
-        if i == sys.maxsize:  # sys.maxsize:   50:
-            break  # break for dev purposes
 
+def write_proline_summary(selector, float_columns, excel_outfile):
+    """
+        Writes the top and bottom 10 proline summary to a TSV file, with the column types the
+        whole table would have.
+
+        @param selector: The TopKSelector from `select_proline_summary`.
+        @param float_columns: The float64 summary columns from `select_proline_summary`.
+        @param excel_outfile: Path for the output Excel file; the TSV file name is derived from it.
+        """
     # compile and format data for tsv
-    final_df_tsv = pd.DataFrame(all_data)
-    additional_info_df = final_df_tsv['additional_gene_info'].apply(pd.Series)
-    final_df_tsv = pd.concat([final_df_tsv.drop(
+    summary_df = pd.DataFrame(selector.head(10) + selector.tail(10))
+    additional_info_df = summary_df['additional_gene_info'].apply(pd.Series)
+    summary_df = pd.concat([summary_df.drop(
         'additional_gene_info', axis=1), additional_info_df], axis=1)
-    final_df_tsv.sort_values(
-        by=['proline_comp', 'protein_sequence_length'], ascending=[False, False], inplace=True)
-
-    columns_for_tsv = [
-        'ccds_id', 'refseq_gene_id', 'biotype', 'ensembl_gene_id',
-        'description', 'protein_sequence_length', 'proline_comp']
-    filtered_df_tsv = final_df_tsv[columns_for_tsv]
-    top_10 = filtered_df_tsv.head(10)
-    bottom_10 = filtered_df_tsv.tail(10)
-    summary_df = pd.concat([top_10, bottom_10])
 
-    tsv_filename = args.excel_outfile.replace('.xlsx', '.tsv')
+    summary_df = summary_df[SUMMARY_COLUMNS].astype({column: float for column in float_columns})
+    tsv_filename = excel_outfile.replace('.xlsx', '.tsv')
     summary_df.to_csv(tsv_filename, sep='\t', index=False)
 
+
+def write_outputs(all_data, excel_outfile, codon_usage=False, writer_args=None):
+    """
+        Writes the top and bottom 10 proline summary to a TSV file and every record to an Excel file,
+        split across sheets and files if it exceeds Excel's limits (see `write_excel`).
+
+        @param all_data: The row dictionaries of every record, in FASTA order.
+        @param excel_outfile: Path for the output Excel file; the TSV file name is derived from it.
+        @param codon_usage: Also add codon usage columns to the Excel file (see `add_codon_usage`).
+        @param writer_args: Parsed arguments from `add_writer_args`; the defaults if None.
+        """
+    if writer_args is None:
+        writer_args = argparse.Namespace(max_rows_per_sheet=EXCEL_MAX_ROWS - 1, detail_tsv=False,
+                                         max_cells_per_file=DEFAULT_MAX_CELLS_PER_FILE, writer_workers=0)
+    if codon_usage:
+        all_data = add_codon_usage(all_data, excel_outfile)
+    selector, float_columns = select_proline_summary([all_data])
+    write_proline_summary(selector, float_columns, excel_outfile)
+
     # compile and format data for xlsx
     final_df_xlsx = pd.DataFrame(all_data)
     additional_info_df = final_df_xlsx['additional_gene_info'].apply(pd.Series)
@@ -108,10 +286,116 @@ def main():
                         'dna_sequence_length', 'protein_sequence',
                         'protein_sequence_length', 'gc_content_value',
                         'tm_value', 'amino_acid_content_value',
-                        'kmers_list', 'dna_composition', 'proline_comp']
+                        'kmers_list', 'dna_composition', 'proline_comp',
+                        'amino_acid_profile', 'molecular_weight']
+    if codon_usage:
+        columns_for_xlsx += ['codon_adaptation_index', 'rscu']
 
     filtered_df_xlsx = final_df_xlsx[columns_for_xlsx]
-    filtered_df_xlsx.to_excel(args.excel_outfile, index=False)
+    parts = write_excel(filtered_df_xlsx, excel_outfile, ids=final_df_xlsx['ccds_id'],
+                        max_rows_per_sheet=writer_args.max_rows_per_sheet,
+                        max_cells_per_file=writer_args.max_cells_per_file, workers=writer_args.writer_workers)
+    if len(parts.files) > 1 or parts.sheets > 1 or parts.offloaded or parts.truncated:
+        print(f"Wrote {parts.rows} records to {parts.sheets} sheets in {len(parts.files)} Excel files; "
+              f"{parts.offloaded} long sequences moved to {excel_side_path(excel_outfile, '.sequences.fna')}, "
+              f"{parts.truncated} long cells truncated", file=sys.stderr)
+    if writer_args.detail_tsv:
+        shards = write_tsv_shards(filtered_df_xlsx, excel_side_path(excel_outfile, '.detail.tsv'),
+                                  writer_args.max_rows_per_sheet, writer_args.writer_workers)
+        print(f"Wrote {len(shards)} detail TSV shards", file=sys.stderr)
+
+
+def main():
+    """"Main Business Logic
+
+        Main function to orchestrate the processing of CCDS and Ensembl gene data along with FASTA sequences,
+        and output the results to an Excel file.
+
+        This function does the following:
+        - Parses command-line arguments for input and output files.
+        - Reads the FASTA headers, then loads only the needed columns of the CCDS attributes and
+          Ensembl gene data, for the CCDS IDs present in the FASTA file, using `load_merged_annotation`
+          (or the `--annotation_snapshot` if it is up to date).
+        - Merges CCDS and Ensembl data frames on the gene column.
+        - Retrieves FASTA sequences and headers using `get_fasta_lists`, or streams them through
+          the reader/compute/writer pipeline when `--workers` is 1 or more.
+        - Extracts additional sequence attributes for each FASTA sequence, computing each unique
+          sequence once (unless `--no_dedup`) and reusing the attribute cache (when `--cache_path`
+          is given) for sequences seen in earlier runs.
+        - Compiles a summary DataFrame of the top and bottom 10 sequences based on proline composition.
+        - Saves the summary to a TSV file and detailed attributes to an Excel file.
+
+        With `--shard_dir` the records are computed shard by shard with checkpoints, so an
+        interrupted run resumes where it stopped. `main.py build-annotation ...` instead writes
+        the merged annotation snapshot, and `main.py merge-shards ...` writes the outputs of
+        shards that were run separately with `--shard_index`.
+        """
+    if len(sys.argv) > 1 and sys.argv[1] == 'build-annotation':
+        build_annotation(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'merge-shards':
+        merge_shards(sys.argv[2:])
+        return
+    args = get_cli_args()
+    if args.lint:
+        check_fasta(args.infile_ccds_fasta, alphabet="acgt")
+    # read the fasta headers first, so only the ccds rows they reference are loaded
+    if args.workers > 0 or args.shard_dir is not None:
+        seq_header = get_fasta_headers(args.infile_ccds_fasta)
+    else:
+        seq_header, sequence = get_fasta_lists(args.infile_ccds_fasta)
+    # parse each header once; the rows below take their CCDS ID from these fields
+    parsed_headers = {header: parse_ccds_header(header) for header in seq_header}
+    ccds_ids = {parsed_header.id for parsed_header in parsed_headers.values()}
+
+    # load the needed ccds and ensembl columns and merge them on gene names
+    merged_df = load_merged_annotation(args.infile_ccds_attributes, args.infile_ensembl_gene,
+                                       ccds_ids=ccds_ids, engine=args.csv_engine,
+                                       snapshot_path=args.annotation_snapshot)
+
+    # retrieve and process fasta sequences
+    genetic_code = return_standard_genetic_code()
+    all_data = []
+    with (AttributeCache(args.cache_path, max_bytes=args.cache_max_mb * 1024 ** 2)
+          if args.cache_path else nullcontext()) as cache:
+        if not args.no_dedup:  # compute identical sequences once, in front of the persistent cache
+            cache = SequenceDeduplicator(backing=cache)
+        if args.shard_dir is not None:
+            shard_ranges = prepare_shards(args.shard_dir, args.infile_ccds_fasta, args.num_shards)
+
+            def compute_chunk(chunk):
+                return [get_additional_sequence_attributes(header, dna_sequence, merged_df, genetic_code, cache=cache,
+                                                           strand=args.strand,
+                                                           parsed_header=parsed_headers.get(header))._asdict()
+                        for header, dna_sequence in chunk]
+
+            for shard_index in ([args.shard_index] if args.shard_index is not None else range(len(shard_ranges))):
+                n_computed = run_shard(args.shard_dir, shard_index, compute_chunk,
+                                       checkpoint_every=args.checkpoint_every)
+                print(f"Shard {shard_index}: computed {n_computed} records", file=sys.stderr)
+        elif args.workers > 0:
+            all_data, queues = compute_fasta_attributes_pipelined(
+                args.infile_ccds_fasta, merged_df, genetic_code, cache=cache, workers=args.workers,
+                chunk_size=args.chunk_size, queue_size=args.queue_size, strand=args.strand,
+                parsed_headers=parsed_headers)
+            for pipeline_queue in queues:
+                print(pipeline_queue.report(), file=sys.stderr)
+        else:
+            for i, (header, dna_sequence) in enumerate(zip(seq_header, sequence)):
+                attributes = get_additional_sequence_attributes(header, dna_sequence, merged_df, genetic_code,
+                                                                cache=cache, strand=args.strand,
+                                                                parsed_header=parsed_headers[header])
+                all_data.append(attributes._asdict())
+                if i == sys.maxsize:  # sys.maxsize:   50:
+                    break  # break for dev purposes
+        if cache is not None:
+            print(cache.report(), file=sys.stderr)
+
+    if args.shard_dir is not None:
+        if args.shard_index is not None:
+            return  # the outputs are written by merge-shards once every shard has finished
+        all_data = load_shard_rows(args.shard_dir)
+    write_outputs(all_data, args.excel_outfile, codon_usage=args.codon_usage, writer_args=args)
 
 
 if __name__ == "__main__":
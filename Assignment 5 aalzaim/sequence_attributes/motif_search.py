@@ -0,0 +1,65 @@
+"""motif_search.py
+Finds exact and IUPAC-degenerate motifs (e.g. Kozak consensus, polyadenylation signals,
+restriction sites) in the records of a FASTA file, on one or both strands, and writes every
+hit as a tab-separated row (record, pattern, position, strand, match). Patterns are given by
+name (see COMMON_MOTIFS), as NAME=PATTERN or as a bare pattern. With --index_dir, a suffix
+array of the file is built once and memory-mapped by later runs until the file changes.
+Usage:
+python -m sequence_attributes.motif_search --infile <FASTA file> --pattern <pattern> [<pattern> ...]
+--outfile <hits TSV> [--strand both|+|-] [--index_dir <index directory>] [--lint]
+"""
+import argparse
+import os
+import sys
+from sequence_attributes.sequence_formats.fasta_format import iter_fasta_records
+from sequence_attributes.sequence_formats.fasta_lint import check_fasta
+from sequence_attributes.utils.io_utils import FileHandler
+from sequence_attributes.utils.motif_utils import (COMMON_MOTIFS, SuffixArrayIndex, resolve_patterns,
+                                                   search_records, write_motif_hits)
+
+
+def get_cli_args():
+    """
+        Parses and returns command-line arguments for motif search.
+
+        @return: The parsed arguments from the command line.
+        """
+    parser = argparse.ArgumentParser(description="Find exact and IUPAC motifs in a FASTA file.")
+    parser.add_argument("--infile", required=True, help="Path to the FASTA file.")
+    parser.add_argument("--pattern", nargs="+", required=True,
+                        help=f"Motif names ({', '.join(COMMON_MOTIFS)}), NAME=PATTERN or IUPAC patterns.")
+    parser.add_argument("--strand", choices=["both", "+", "-"], default="both",
+                        help="Strand(s) to search; minus-strand hits are reported at forward-strand positions.")
+    parser.add_argument("--outfile", required=True, help="Path for the tab-separated hits.")
+    parser.add_argument("--index_dir",
+                        help="Suffix array directory: loaded if it was built from the current --infile, otherwise "
+                             "(re)built from --infile and saved.")
+    parser.add_argument("--lint", action="store_true",
+                        help="Check the FASTA file for duplicate IDs and non-IUPAC characters before searching.")
+    return parser.parse_args()
+
+
+def main():
+    """Searches the FASTA file and writes the hits."""
+    args = get_cli_args()
+    if args.lint:
+        check_fasta(args.infile, alphabet="iupac")
+    patterns = resolve_patterns(args.pattern)
+    if args.index_dir:
+        if SuffixArrayIndex.is_fresh(args.index_dir, args.infile):
+            index = SuffixArrayIndex.load(args.index_dir)
+        else:
+            if os.path.exists(os.path.join(args.index_dir, "ids.json")):
+                print(f"{args.infile} changed since {args.index_dir} was built; rebuilding it", file=sys.stderr)
+            index = SuffixArrayIndex.build(iter_fasta_records(args.infile))
+            index.save(args.index_dir, source=args.infile)
+        hits = index.search(patterns, args.strand)
+    else:
+        hits = search_records(iter_fasta_records(args.infile), patterns, args.strand)
+    with FileHandler(args.outfile, mode='w') as outfile:
+        n_hits = write_motif_hits(hits, outfile)
+    print(f"Found {n_hits} hits of {len(patterns)} patterns", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
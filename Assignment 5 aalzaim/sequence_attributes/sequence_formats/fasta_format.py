@@ -2,7 +2,7 @@
 This script reads FASTA files, extracting headers and sequences into separate lists.
 It ensures headers and sequences align properly, throwing an error otherwise.
 """
-from typing import Tuple, List
+from typing import Iterator, Tuple, List
 from sequence_attributes.utils.io_utils import FileHandler
 
 
@@ -19,28 +19,130 @@ def _verify_lists(header_list: List[str], seq_list: List[str]) -> bool:
     return True
 
 
-def get_fasta_lists(infile: str) -> Tuple[List[str], List[str]]:
+def iter_fasta_records(infile: str) -> Iterator[Tuple[str, str]]:
     """
-        Parses a FASTA file into separate lists for headers and sequences.
+        Streams the records of a FASTA file one at a time, so only the current
+        record is held in memory.
 
         @param infile: Path to the FASTA file.
-        @return: A tuple of two lists - (headers, sequences).
+        @return: An iterator of (header, sequence) tuples, headers without the leading '>'.
         """
-    headers = []
-    sequences = []
-    seq = ""  # initialization
+    header = None
+    seq_lines = []
     with FileHandler(infile, mode='r', encoding='utf-8') as file:
         for line in file:  # open file and iterate over each line
             if line.startswith('>'):  # check if the line is a header
-                if seq or headers:
-                    sequences.append(seq)
-                    seq = ""  # reset sequence variable
+                if header is not None:
+                    yield header, "".join(seq_lines)
+                elif any(seq_lines):  # sequence before the first header
+                    raise ValueError("Header and sequence lists have different lengths.")
                 header = line.strip().lstrip('>')
-                headers.append(header)
+                seq_lines = []  # reset sequence lines
             else:
-                seq += line.strip()  # add sequence line to current sequence string
-        if seq or headers:
-            sequences.append(seq)
+                seq_lines.append(line.strip())  # collect sequence lines of the current record
+        if header is not None:
+            yield header, "".join(seq_lines)
+        elif any(seq_lines):
+            raise ValueError("Header and sequence lists have different lengths.")
+
+
+def get_record_boundaries(infile: str, n_parts: int) -> List[Tuple[int, int]]:
+    """
+        Splits a FASTA file into byte ranges of roughly equal size that start at record headers.
+
+        @param infile: Path to the FASTA file.
+        @param n_parts: The number of ranges.
+        @return: A list of n_parts (start, end) byte offsets covering the whole file; a range is
+        empty (start == end) if no header falls inside it.
+        """
+    if n_parts < 1:
+        raise ValueError("The number of parts must be positive")
+    with open(infile, 'rb') as file:
+        size = file.seek(0, 2)
+        starts = [0]
+        for part in range(1, n_parts):
+            offset = max(size * part // n_parts, starts[-1])
+            file.seek(offset)
+            if offset > 0:
+                file.readline()  # skip to the start of the next line
+                offset = file.tell()
+            line = file.readline()
+            while line and not line.startswith(b'>'):
+                offset = file.tell()
+                line = file.readline()
+            starts.append(max(offset if line else size, starts[-1]))
+    return list(zip(starts, starts[1:] + [size]))
+
+
+def iter_fasta_records_in_range(infile: str, start: int, end: int) -> Iterator[Tuple[str, str]]:
+    """
+        Streams the records whose headers start within a byte range of a FASTA file,
+        as returned by `get_record_boundaries`.
+
+        @param infile: Path to the FASTA file.
+        @param start: Byte offset of the first header of the range.
+        @param end: Byte offset where the range ends.
+        @return: An iterator of (header, sequence) tuples, as from `iter_fasta_records`.
+        """
+    header = None
+    seq_lines = []
+    with open(infile, 'rb') as file:
+        file.seek(start)
+        position = start
+        for raw_line in file:
+            if raw_line.startswith(b'>'):
+                if header is not None:
+                    yield header, "".join(seq_lines)
+                if position >= end:
+                    return
+                header = raw_line.decode('utf-8').strip().lstrip('>')
+                seq_lines = []
+            elif header is not None:
+                seq_lines.append(raw_line.decode('utf-8').strip())
+            position += len(raw_line)
+    if header is not None:
+        yield header, "".join(seq_lines)
+
+
+def write_fasta_record(outfile, header: str, sequence: str, line_width: int = 70):
+    """
+        Writes one FASTA record, wrapping the sequence at a fixed line width.
+
+        @param outfile: An open, writable text file.
+        @param header: The header without the leading '>'.
+        @param sequence: The sequence.
+        @param line_width: Sequence line width (0 for the whole sequence on one line).
+        """
+    outfile.write(f">{header}\n")
+    if line_width > 0:
+        outfile.writelines(sequence[i:i + line_width] + "\n" for i in range(0, len(sequence), line_width))
+    else:
+        outfile.write(sequence + "\n")
+
+
+def get_fasta_headers(infile: str) -> List[str]:
+    """
+        Reads only the headers of a FASTA file, without joining any sequences.
+
+        @param infile: Path to the FASTA file.
+        @return: A list of headers without the leading '>'.
+        """
+    with FileHandler(infile, mode='r', encoding='utf-8') as file:
+        return [line.strip().lstrip('>') for line in file if line.startswith('>')]
+
+
+def get_fasta_lists(infile: str) -> Tuple[List[str], List[str]]:
+    """
+        Parses a FASTA file into separate lists for headers and sequences.
+
+        @param infile: Path to the FASTA file.
+        @return: A tuple of two lists - (headers, sequences).
+        """
+    headers = []
+    sequences = []
+    for header, seq in iter_fasta_records(infile):
+        headers.append(header)
+        sequences.append(seq)
     _verify_lists(headers, sequences)
     return headers, sequences  # return the lists of headers and sequences
 
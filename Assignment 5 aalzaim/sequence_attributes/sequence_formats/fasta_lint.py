@@ -0,0 +1,197 @@
+"""fasta_lint.py
+Validates a FASTA file in one streaming pass: sequence before the first header, empty
+headers, duplicate IDs, empty records, illegal characters, blank lines inside records,
+mixed line widths and Windows line endings, each reported with its line number. Characters
+are checked with byte-level translation tables, not per character in Python. The records can
+also be written out normalized (LF line endings, fixed line width, duplicates and empty
+records dropped, illegal characters replaced), and `check_fasta` is a pre-flight check for
+the other tools.
+"""
+import sys
+from collections import Counter, namedtuple
+from typing import Optional
+from sequence_attributes.sequence_formats.fasta_format import write_fasta_record
+
+LintIssue = namedtuple("LintIssue", ["line", "code", "record", "message"])
+LintReport = namedtuple("LintReport", ["records", "bases", "counts", "issues"])
+
+# allowed sequence characters per alphabet (lower case is allowed too, e.g. soft-masking, except
+# in the upper-case-only alphabets)
+ALPHABETS = {
+    'acgt': b"ACGT",
+    'dna': b"ACGTN",
+    'rna': b"ACGUN",
+    'iupac': b"ACGTURYSWKMBDHVN-",
+    'protein': b"ACDEFGHIKLMNPQRSTVWYBZXUO*-",
+}
+# the character that replaces illegal characters in normalized output
+REPAIR_CHARACTERS = {'acgt': b"N", 'dna': b"N", 'rna': b"N", 'iupac': b"N", 'protein': b"X"}
+# alphabets of main.py's melting temperature, which rejects N and soft-masked bases
+UPPER_CASE_ALPHABETS = {'acgt'}
+ERROR_CODES = ("sequence_before_header", "empty_header", "duplicate_id", "empty_record", "illegal_character")
+WARNING_CODES = ("blank_line", "mixed_line_width", "windows_line_ending")
+
+
+def _allowed_bytes(alphabet: str) -> bytes:
+    """Returns the bytes an alphabet allows (both cases, unless it is upper-case only)."""
+    if alphabet not in ALPHABETS:
+        raise ValueError(f"Unknown alphabet {alphabet}; choose one of {sorted(ALPHABETS)}")
+    if alphabet in UPPER_CASE_ALPHABETS:
+        return ALPHABETS[alphabet]
+    return ALPHABETS[alphabet] + ALPHABETS[alphabet].lower()
+
+
+def _repair_table(alphabet: str) -> bytes:
+    """Returns a translation table that keeps allowed bytes and replaces every other byte."""
+    table = bytearray(REPAIR_CHARACTERS[alphabet] * 256)
+    for byte in _allowed_bytes(alphabet):
+        table[byte] = byte
+        if alphabet in UPPER_CASE_ALPHABETS:  # soft-masked bases are upper-cased, not replaced
+            table[ord(chr(byte).lower())] = byte
+    return bytes(table)
+
+
+def lint_fasta(infile: str, alphabet: Optional[str] = "dna", fasta_outfile=None, line_width: int = 70,
+               max_issues: int = 100) -> LintReport:
+    """
+    Checks a FASTA file in one pass, optionally writing a normalized copy.
+
+    @param infile: Path to the FASTA file.
+    @param alphabet: 'acgt', 'dna', 'rna', 'iupac', 'protein', or None to skip the character check.
+    @param fasta_outfile: Optional open, writable text file for the normalized records; only
+    the current record is held in memory.
+    @param line_width: Sequence line width of the normalized output (0 for one line per record).
+    @param max_issues: The number of issues kept per issue code; all of them are counted.
+    @return: A LintReport namedtuple (records, bases, counts per issue code, kept issues).
+    """
+    allowed = _allowed_bytes(alphabet) if alphabet is not None else None
+    repair = _repair_table(alphabet) if alphabet is not None and fasta_outfile is not None else None
+    counts = Counter()
+    issues = []
+    first_seen = {}
+    n_records = n_bases = 0
+
+    def report(line_number, code, record, message):
+        counts[code] += 1
+        if counts[code] <= max_issues:
+            issues.append(LintIssue(line_number, code, record, message))
+
+    header = record_id = None
+    keep = False
+    seq_parts = []
+    first_width = previous_width = previous_line = blank_line = None
+    mixed = False
+
+    def finish_record():
+        if header is None:
+            return
+        if first_width is None:
+            report(header_line, "empty_record", record_id, "header without sequence")
+        elif not mixed and previous_width > first_width:
+            report(previous_line, "mixed_line_width", record_id,
+                   f"last line has {previous_width} characters, more than the first line ({first_width})")
+        if fasta_outfile is not None and keep and first_width is not None:
+            sequence = b"".join(seq_parts)
+            if repair is not None:
+                sequence = sequence.translate(repair)
+            write_fasta_record(fasta_outfile, header, sequence.decode('ascii', 'replace'), line_width)
+
+    with open(infile, 'rb') as file:
+        for line_number, raw_line in enumerate(file, 1):
+            if raw_line.endswith(b'\r\n'):
+                if not counts["windows_line_ending"]:
+                    report(line_number, "windows_line_ending", record_id, "CRLF line ending (reported once)")
+                else:
+                    counts["windows_line_ending"] += 1
+            line = raw_line.rstrip(b'\r\n')
+
+            if line.startswith(b'>'):
+                finish_record()
+                n_records += 1
+                header = line[1:].strip().decode('utf-8', 'replace')
+                record_id = header.split(maxsplit=1)[0] if header else ""
+                header_line, keep = line_number, False
+                if not record_id:
+                    report(line_number, "empty_header", record_id, "empty header")
+                elif record_id in first_seen:
+                    report(line_number, "duplicate_id", record_id, f"ID first seen on line {first_seen[record_id]}")
+                else:
+                    first_seen[record_id] = line_number
+                    keep = True
+                seq_parts = []
+                first_width = previous_width = previous_line = blank_line = None
+                mixed = False
+            elif not line.strip():
+                if header is not None and blank_line is None:
+                    blank_line = line_number
+            elif header is None:
+                if not counts["sequence_before_header"]:
+                    report(line_number, "sequence_before_header", None, "sequence before the first header")
+                else:
+                    counts["sequence_before_header"] += 1
+            else:
+                if blank_line is not None:
+                    report(blank_line, "blank_line", record_id, "blank line inside a record")
+                    blank_line = None
+                if allowed is not None:
+                    illegal = line.translate(None, allowed)
+                    if illegal:
+                        column = min(line.find(bytes([byte])) for byte in set(illegal)) + 1
+                        characters = "".join(sorted(set(illegal.decode('utf-8', 'replace'))))
+                        report(line_number, "illegal_character", record_id,
+                               f"illegal characters {characters!r} (first at column {column})")
+                if first_width is None:
+                    first_width = len(line)
+                elif previous_width != first_width and not mixed:
+                    report(previous_line, "mixed_line_width", record_id,
+                           f"line has {previous_width} characters, the first line {first_width}")
+                    mixed = True
+                previous_width, previous_line = len(line), line_number
+                n_bases += len(line)
+                if fasta_outfile is not None and keep:
+                    seq_parts.append(line.replace(b' ', b'').replace(b'\t', b''))
+        finish_record()
+    issues.sort(key=lambda issue: issue.line)
+    return LintReport(records=n_records, bases=n_bases, counts=dict(counts), issues=issues)
+
+
+def has_errors(report: LintReport) -> bool:
+    """
+    Tells whether a lint report contains errors (as opposed to only warnings).
+
+    @param report: A LintReport namedtuple.
+    @return: True if any issue code in ERROR_CODES was found.
+    """
+    return any(report.counts.get(code) for code in ERROR_CODES)
+
+
+def format_lint_report(report: LintReport) -> str:
+    """
+    Describes a lint report, one line per kept issue followed by a summary line.
+
+    @param report: A LintReport namedtuple.
+    @return: The report text.
+    """
+    lines = [f"line {issue.line}: [{issue.code}] " + (f"{issue.record}: " if issue.record else "") + issue.message
+             for issue in report.issues]
+    summary = ", ".join(f"{report.counts[code]} {code}" for code in ERROR_CODES + WARNING_CODES
+                        if report.counts.get(code))
+    lines.append(f"{report.records} records, {report.bases} bases: {summary or 'no issues'}")
+    return "\n".join(lines)
+
+
+def check_fasta(infile: str, alphabet: Optional[str] = "dna") -> LintReport:
+    """
+    Pre-flight check for the tools that read FASTA files: warnings are printed to stderr and
+    errors raise a ValueError describing them.
+
+    @param infile: Path to the FASTA file.
+    @param alphabet: 'acgt', 'dna', 'rna', 'iupac', 'protein', or None to skip the character check.
+    @return: The LintReport namedtuple, if the file has no errors.
+    """
+    report = lint_fasta(infile, alphabet, max_issues=10)
+    if has_errors(report):
+        raise ValueError(f"{infile} failed the FASTA check:\n{format_lint_report(report)}")
+    if report.issues:
+        print(format_lint_report(report), file=sys.stderr)
+    return report
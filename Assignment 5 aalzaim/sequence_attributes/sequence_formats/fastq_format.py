@@ -0,0 +1,269 @@
+"""fastq_format.py
+Streams 4-line FASTQ records (plain or gzip-compressed) in batches of bytes. Each batch packs
+its sequences and quality strings into (buffer, offsets) arrays, so per-read composition, GC
+content and mean quality are computed with the vectorized batch functions, and `FastqProfile`
+aggregates per-position quality and base summaries into fixed-size arrays. Only one batch is
+held in memory, however many reads the file has.
+"""
+import gzip
+from collections import namedtuple
+from itertools import islice
+from typing import Dict, Iterator, List, Tuple
+import numpy as np
+from sequence_attributes.sequence_formats.fasta_format import write_fasta_record
+from sequence_attributes.utils.seq_attribute_utils import (_byte_lookup, _record_index, gc_content_batch,
+                                                           get_sequence_composition_batch)
+
+FastqBatch = namedtuple("FastqBatch", ["headers", "sequences", "qualities", "offsets"])
+ReadStats = namedtuple("ReadStats", ["ids", "length", "gc", "mean_quality", "composition"])
+FastqSummary = namedtuple("FastqSummary", ["reads", "bases", "min_length", "max_length", "gc", "mean_quality",
+                                           "q30_fraction"])
+
+READ_STATISTICS_HEADER = "id\tlength\tgc\tmean_quality\tA\tT\tC\tG\n"
+# Phred scores 0 to 93, the printable range of Sanger / Illumina 1.8+ quality strings
+N_QUALITIES = 94
+# A, C, G, T in either case -> 0..3, anything else (N, IUPAC codes) -> 4
+_FASTQ_BASE_CODES = _byte_lookup({"A": 0, "C": 1, "G": 2, "T": 3, "a": 0, "c": 1, "g": 2, "t": 3}, 4)
+
+
+def _open_fastq(infile: str):
+    """Opens a FASTQ file for binary reading, decompressing it if it starts with the gzip magic bytes."""
+    with open(infile, 'rb') as file:
+        compressed = file.read(2) == b'\x1f\x8b'
+    return gzip.open(infile, 'rb') if compressed else open(infile, 'rb')
+
+
+def _pack_lines(lines: List[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+    """Packs lines (without line endings) into a byte buffer plus record offsets."""
+    offsets = np.zeros(len(lines) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, lines), dtype=np.int64, count=len(lines)), out=offsets[1:])
+    return np.frombuffer(b"".join(lines), dtype=np.uint8), offsets
+
+
+def iter_fastq_batches(infile: str, batch_size: int = 65536) -> Iterator[FastqBatch]:
+    """
+    Streams the records of a 4-line FASTQ file (plain or gzip-compressed) in batches.
+
+    @param infile: Path to the FASTQ file.
+    @param batch_size: The number of records per batch.
+    @return: An iterator of FastqBatch namedtuples: headers (without the leading '@'), the
+    sequence and quality byte buffers, and the record offsets they share.
+    """
+    first_line = 1
+    with _open_fastq(infile) as file:
+        while True:
+            lines = [line.rstrip(b'\r\n') for line in islice(file, 4 * batch_size)]
+            if not lines:
+                return
+            if len(lines) % 4:
+                raise ValueError(f"{infile}: truncated record at line {first_line + len(lines) - len(lines) % 4}")
+            header_lines, sequence_lines, separators, quality_lines = (lines[0::4], lines[1::4], lines[2::4],
+                                                                       lines[3::4])
+            for record, (header, separator) in enumerate(zip(header_lines, separators)):
+                if header[:1] != b'@' or separator[:1] != b'+':
+                    raise ValueError(f"{infile}: line {first_line + 4 * record} does not start a FASTQ record "
+                                     f"(expected '@' header, sequence, '+' line and quality)")
+            sequences, offsets = _pack_lines(sequence_lines)
+            qualities, quality_offsets = _pack_lines(quality_lines)
+            if not np.array_equal(offsets, quality_offsets):
+                record = int(np.flatnonzero(np.diff(offsets) != np.diff(quality_offsets))[0])
+                raise ValueError(f"{infile}: sequence and quality lengths differ at line {first_line + 4 * record}")
+            headers = [header[1:].decode('utf-8', 'replace') for header in header_lines]
+            yield FastqBatch(headers, sequences, qualities, offsets)
+            first_line += len(lines)
+
+
+def iter_fastq_records(infile: str, batch_size: int = 65536) -> Iterator[Tuple[str, str, str]]:
+    """
+    Streams the records of a FASTQ file one at a time.
+
+    @param infile: Path to the FASTQ file (plain or gzip-compressed).
+    @param batch_size: The number of records read at once.
+    @return: An iterator of (header, sequence, quality) tuples, headers without the leading '@'.
+    """
+    for batch in iter_fastq_batches(infile, batch_size):
+        sequences, qualities = batch.sequences.tobytes(), batch.qualities.tobytes()
+        for header, start, end in zip(batch.headers, batch.offsets[:-1].tolist(), batch.offsets[1:].tolist()):
+            yield header, sequences[start:end].decode('ascii', 'replace'), qualities[start:end].decode('ascii')
+
+
+def _phred_scores(batch: FastqBatch, phred_offset: int) -> np.ndarray:
+    """Converts a batch's quality characters to Phred scores, checking they are in range."""
+    scores = batch.qualities.astype(np.int16) - phred_offset
+    if len(scores) and (scores.min() < 0 or scores.max() >= N_QUALITIES):
+        raise ValueError(f"Quality characters outside the Phred+{phred_offset} range; check the Phred offset")
+    return scores
+
+
+def read_statistics(batch: FastqBatch, phred_offset: int = 33) -> ReadStats:
+    """
+    Calculates per-read statistics for a batch with vectorized operations.
+
+    @param batch: A FastqBatch namedtuple from `iter_fastq_batches`.
+    @param phred_offset: The ASCII offset of the quality scores (33 for Sanger / Illumina 1.8+).
+    @return: A ReadStats namedtuple of the read IDs and arrays of lengths, GC percentages, mean
+    Phred scores (0.0 for empty reads) and (n, 4) counts of 'A', 'T', 'C' and 'G'.
+    """
+    packed = (batch.sequences, batch.offsets)
+    lengths = np.diff(batch.offsets)
+    quality_sums = np.bincount(_record_index(batch.offsets), weights=_phred_scores(batch, phred_offset),
+                               minlength=len(lengths))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_quality = np.where(lengths > 0, quality_sums / lengths, 0.0)
+    return ReadStats(ids=[header.split(maxsplit=1)[0] if header else "" for header in batch.headers],
+                     length=lengths, gc=gc_content_batch(packed), mean_quality=mean_quality,
+                     composition=get_sequence_composition_batch(packed))
+
+
+def write_read_statistics(stats: ReadStats, outfile):
+    """
+    Writes per-read statistics as tab-separated rows, with the columns of READ_STATISTICS_HEADER.
+
+    @param stats: A ReadStats namedtuple from `read_statistics`.
+    @param outfile: An open, writable text file.
+    """
+    outfile.writelines(f"{read_id}\t{length}\t{gc:.2f}\t{quality:.2f}\t" + "\t".join(map(str, counts)) + "\n"
+                       for read_id, length, gc, quality, counts in zip(
+                           stats.ids, stats.length.tolist(), stats.gc.tolist(), stats.mean_quality.tolist(),
+                           stats.composition.tolist()))
+
+
+class FastqProfile:
+    """
+    Per-position quality and base summaries of any number of reads, in fixed-size arrays: a
+    histogram of Phred scores and counts of A, C, G, T and other bases per read position.
+    Positions from max_positions on are pooled into the last row. Profiles of different files
+    or processes merge by addition.
+    """
+    def __init__(self, max_positions: int = 1000, phred_offset: int = 33):
+        if max_positions < 1:
+            raise ValueError("The number of positions must be positive")
+        self.max_positions = max_positions
+        self.phred_offset = phred_offset
+        self.quality = np.zeros((max_positions, N_QUALITIES), dtype=np.int64)
+        self.bases = np.zeros((max_positions, 5), dtype=np.int64)
+        self.reads = 0
+        self.pooled_reads = 0  # reads reaching the last (pooled) position
+        self.min_length = None
+        self.max_length = 0
+
+    def add(self, batch: FastqBatch):
+        """
+        Adds the reads of a batch.
+
+        @param batch: A FastqBatch namedtuple from `iter_fastq_batches`.
+        """
+        lengths = np.diff(batch.offsets)
+        record_index = _record_index(batch.offsets)
+        positions = np.arange(len(batch.sequences)) - batch.offsets[record_index]
+        np.minimum(positions, self.max_positions - 1, out=positions)
+        scores = _phred_scores(batch, self.phred_offset)
+        self.quality += np.bincount(positions * N_QUALITIES + scores,
+                                    minlength=self.quality.size).reshape(self.quality.shape)
+        self.bases += np.bincount(positions * 5 + _FASTQ_BASE_CODES[batch.sequences],
+                                  minlength=self.bases.size).reshape(self.bases.shape)
+        if len(lengths):
+            self.reads += len(lengths)
+            self.pooled_reads += int(np.count_nonzero(lengths >= self.max_positions))
+            self.min_length = min(int(lengths.min()), self.min_length if self.min_length is not None
+                                  else int(lengths.min()))
+            self.max_length = max(int(lengths.max()), self.max_length)
+
+    def merge(self, other: 'FastqProfile') -> 'FastqProfile':
+        """
+        Adds another profile with the same number of positions and Phred offset.
+
+        @param other: The other FastqProfile.
+        @return: This profile.
+        """
+        if (other.max_positions, other.phred_offset) != (self.max_positions, self.phred_offset):
+            raise ValueError("Only profiles with equal max_positions and phred_offset can be merged")
+        self.quality += other.quality
+        self.bases += other.bases
+        if other.reads:
+            self.min_length = other.min_length if self.min_length is None else min(self.min_length,
+                                                                                   other.min_length)
+        self.reads += other.reads
+        self.pooled_reads += other.pooled_reads
+        self.max_length = max(self.max_length, other.max_length)
+        return self
+
+    def summary(self) -> FastqSummary:
+        """
+        Summarizes all reads added so far.
+
+        @return: A FastqSummary namedtuple; gc is a percentage of all bases, mean_quality the
+        mean Phred score of all bases and q30_fraction the fraction of bases with a score of 30 or more.
+        """
+        histogram = self.quality.sum(axis=0)
+        bases = int(histogram.sum())
+        base_counts = self.bases.sum(axis=0)
+        return FastqSummary(
+            reads=self.reads, bases=bases, min_length=self.min_length or 0, max_length=self.max_length,
+            gc=round(float(100 * (base_counts[1] + base_counts[2]) / bases), 2) if bases else 0.0,
+            mean_quality=round(float(histogram @ np.arange(N_QUALITIES) / bases), 2) if bases else 0.0,
+            q30_fraction=round(float(histogram[30:].sum() / bases), 4) if bases else 0.0)
+
+    def position_rows(self) -> List[Dict[str, object]]:
+        """
+        Summarizes the quality and base composition of every read position.
+
+        @return: One dictionary per position (1-based; the last may read e.g. '1000+' if positions
+        were pooled) with the number of reads reaching it, the mean, quartiles and 10th percentile
+        of its Phred scores, and the percentages of A, C, G, T and N (other bases).
+        """
+        n_positions = min(self.max_length, self.max_positions)
+        histogram = self.quality[:n_positions]
+        counts = histogram.sum(axis=1)  # bases per position; the pooled row has several per read
+        reads = counts.tolist()
+        if n_positions == self.max_positions:
+            reads[-1] = self.pooled_reads
+        cumulative = np.cumsum(histogram, axis=1)
+
+        def percentile(fraction):
+            return np.argmax(cumulative >= np.maximum(np.ceil(fraction * counts), 1)[:, None], axis=1)
+
+        means = histogram @ np.arange(N_QUALITIES) / np.maximum(counts, 1)
+        p10, q1, median, q3 = (percentile(fraction).tolist() for fraction in (0.1, 0.25, 0.5, 0.75))
+        percentages = 100 * self.bases[:n_positions] / np.maximum(counts, 1)[:, None]
+        rows = []
+        for position in range(n_positions):
+            label = position + 1
+            if position == self.max_positions - 1 and self.max_length > self.max_positions:
+                label = f"{self.max_positions}+"
+            row = {"position": label, "reads": reads[position], "mean_quality": round(float(means[position]), 2),
+                   "p10": p10[position], "q1": q1[position], "median": median[position], "q3": q3[position]}
+            row.update({base: round(float(percentage), 2) for base, percentage in zip("ACGTN", percentages[position])})
+            rows.append(row)
+        return rows
+
+
+def fastq_statistics(infile: str, phred_offset: int = 33, max_positions: int = 1000, batch_size: int = 65536,
+                     read_outfile=None, fasta_outfile=None, line_width: int = 70) -> FastqProfile:
+    """
+    Profiles a FASTQ file in one streaming pass, optionally writing per-read statistics and the
+    reads as FASTA.
+
+    @param infile: Path to the FASTQ file (plain or gzip-compressed).
+    @param phred_offset: The ASCII offset of the quality scores.
+    @param max_positions: The number of read positions profiled separately.
+    @param batch_size: The number of records per batch.
+    @param read_outfile: Optional open, writable text file for per-read statistics.
+    @param fasta_outfile: Optional open, writable text file for the reads as FASTA records; empty
+    reads are left out.
+    @param line_width: Sequence line width of the FASTA output (0 for one line per record).
+    @return: The FastqProfile of all reads.
+    """
+    profile = FastqProfile(max_positions, phred_offset)
+    if read_outfile is not None:
+        read_outfile.write(READ_STATISTICS_HEADER)
+    for batch in iter_fastq_batches(infile, batch_size):
+        profile.add(batch)
+        if read_outfile is not None:
+            write_read_statistics(read_statistics(batch, phred_offset), read_outfile)
+        if fasta_outfile is not None:
+            sequences = batch.sequences.tobytes().decode('ascii', 'replace')
+            for header, start, end in zip(batch.headers, batch.offsets[:-1].tolist(), batch.offsets[1:].tolist()):
+                if end > start:
+                    write_fasta_record(fasta_outfile, header, sequences[start:end], line_width)
+    return profile
@@ -0,0 +1,136 @@
+"""header_format.py
+Parses FASTA headers of the CCDS, NCBI and PDB conventions into typed fields once, and builds
+an index of every record of a FASTA file (header fields plus byte offsets), so downstream steps
+can filter records by field and read only the ones they need.
+"""
+import re
+from collections import namedtuple
+from typing import Iterable, Iterator, Optional, Tuple
+
+FastaHeader = namedtuple("FastaHeader", ["convention", "id", "chromosome", "accession", "chain",
+                                         "record_type", "description"])
+
+_CCDS = re.compile(r"^(CCDS\d+(?:\.\d+)?)\|")
+_NCBI_GI = re.compile(r"^gi\|(\d+)\|\w+\|([^|]*)\|?\s*(.*)$")
+_NCBI_ACCESSION = re.compile(r"^([A-Z]{1,2}_[A-Z]*\d+(?:\.\d+)?|[A-Z]{1,2}\d{5,}(?:\.\d+)?)(?:\s+(.*))?$")
+_PDB_SS = re.compile(r"^(\w{4}):(\w+):(sequence|secstr)$")
+_PDB_SEQRES = re.compile(r"^(\w{4})_(\w+)\s+mol:(\w+)\s+length:\d+\s*(.*)$")
+_CHROMOSOME = re.compile(r"\bchromosome\s+([0-9XYMT]+)\b", re.IGNORECASE)
+
+INDEX_COLUMNS = ["offset", "end", "sequence_length"] + list(FastaHeader._fields) + ["header"]
+
+
+def parse_ccds_header(header: str) -> FastaHeader:
+    """
+    Parses a CCDS nucleotide header such as 'CCDS10.1|Hs110|chr1'.
+
+    @param header: The header without the leading '>'.
+    @return: A FastaHeader whose chromosome has the 'chr' prefix removed.
+    """
+    parts = header.split('|')
+    chromosome = next((part[3:] for part in reversed(parts[1:]) if part.startswith('chr')), None)
+    return FastaHeader(convention="ccds", id=parts[0], chromosome=chromosome, accession=None, chain=None,
+                       record_type=None, description=None)
+
+
+def parse_header(header: str, convention: Optional[str] = None) -> FastaHeader:
+    """
+    Parses a FASTA header into typed fields, detecting its convention unless one is given.
+
+    Recognized conventions are 'ccds' (CCDS10.1|Hs110|chr1), 'ncbi' (gi|...|ref|NM_000546.6|
+    or NM_000546.6 description), 'pdb' (101M:A:sequence or 101m_A mol:protein length:154 NAME)
+    and 'generic' (first word as ID, the rest as description).
+
+    @param header: The header without the leading '>'.
+    @param convention: Optional convention name to skip detection.
+    @return: A FastaHeader; fields a convention does not have are None.
+    """
+    header = header.strip().lstrip('>')
+    if convention == "ccds" or (convention is None and _CCDS.match(header)):
+        return parse_ccds_header(header)
+
+    if convention in (None, "ncbi"):
+        match = _NCBI_GI.match(header) or _NCBI_ACCESSION.match(header)
+        if match:
+            if match.re is _NCBI_GI:
+                record_id, accession, description = match.group(1), match.group(2) or None, match.group(3)
+            else:
+                record_id = accession = match.group(1)
+                description = match.group(2)
+            chromosome = _CHROMOSOME.search(description or "")
+            return FastaHeader(convention="ncbi", id=record_id, chromosome=chromosome.group(1) if chromosome else None,
+                               accession=accession, chain=None, record_type=None, description=description or None)
+
+    if convention in (None, "pdb"):
+        match = _PDB_SS.match(header)
+        if match:
+            return FastaHeader(convention="pdb", id=match.group(1), chromosome=None, accession=None,
+                               chain=match.group(2), record_type=match.group(3), description=None)
+        match = _PDB_SEQRES.match(header)
+        if match:
+            return FastaHeader(convention="pdb", id=match.group(1).upper(), chromosome=None, accession=None,
+                               chain=match.group(2), record_type=match.group(3), description=match.group(4) or None)
+
+    if convention not in (None, "generic", "ncbi", "pdb"):
+        raise ValueError(f"Unknown header convention: {convention}")
+    record_id, _, description = header.partition(' ')
+    return FastaHeader(convention="generic", id=record_id, chromosome=None, accession=None, chain=None,
+                       record_type=None, description=description.strip() or None)
+
+
+def iter_header_offsets(infile: str) -> Iterator[Tuple[int, int, int, str]]:
+    """
+    Scans a FASTA file for its headers without building any sequences.
+
+    @param infile: Path to the FASTA file.
+    @return: An iterator of (offset, end, sequence_length, header) per record, where offset is the
+    byte offset of the '>' and end the offset of the next header (or the end of the file).
+    """
+    header = None
+    offset = position = sequence_length = 0
+    with open(infile, 'rb') as file:
+        for raw_line in file:
+            if raw_line.startswith(b'>'):
+                if header is not None:
+                    yield offset, position, sequence_length, header
+                header = raw_line.decode('utf-8').strip().lstrip('>')
+                offset, sequence_length = position, 0
+            else:
+                sequence_length += len(raw_line.strip())
+            position += len(raw_line)
+    if header is not None:
+        yield offset, position, sequence_length, header
+
+
+def build_header_index(infile: str, convention: Optional[str] = None):
+    """
+    Builds a table of every record of a FASTA file with its parsed header fields and byte offsets.
+
+    @param infile: Path to the FASTA file.
+    @param convention: Optional header convention, detected per header if None.
+    @return: A pandas DataFrame with the columns offset, end, sequence_length, the FastaHeader
+    fields and the raw header, indexed by record ID (the id column is kept).
+    """
+    import pandas as pd  # imported here so header parsing does not need pandas
+
+    rows = [(offset, end, sequence_length) + tuple(parse_header(header, convention)) + (header,)
+            for offset, end, sequence_length, header in iter_header_offsets(infile)]
+    index_df = pd.DataFrame(rows, columns=INDEX_COLUMNS)
+    for column in ("convention", "chromosome", "record_type"):
+        index_df[column] = index_df[column].astype('category')
+    return index_df.set_index('id', drop=False)
+
+
+def read_indexed_records(infile: str, offsets: Iterable[Tuple[int, int]]) -> Iterator[Tuple[str, str]]:
+    """
+    Reads selected records of a FASTA file by their byte offsets, e.g. from a filtered header index.
+
+    @param infile: Path to the FASTA file.
+    @param offsets: (offset, end) pairs, e.g. `zip(index_df['offset'], index_df['end'])`.
+    @return: An iterator of (header, sequence) tuples, as from `iter_fasta_records`.
+    """
+    with open(infile, 'rb') as file:
+        for offset, end in offsets:
+            file.seek(offset)
+            lines = file.read(end - offset).decode('utf-8').splitlines()
+            yield lines[0].strip().lstrip('>'), "".join(line.strip() for line in lines[1:])
@@ -0,0 +1,106 @@
+"""interval_format.py
+Reads genomic intervals from BED, GTF and CCDS attribute files into one representation:
+0-based, end-exclusive Interval namedtuples grouped by feature name, so a spliced feature
+(the exons of a CCDS entry, a BED12 line or a GTF transcript) is a list of intervals.
+"""
+import re
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional
+from sequence_attributes.utils.io_utils import FileHandler
+
+Interval = namedtuple("Interval", ["chromosome", "start", "end", "name", "strand"])
+
+_GTF_ATTRIBUTE = re.compile(r'(\S+)\s+"?([^";]*)"?;?')
+_CCDS_LOCATION = re.compile(r"(\d+)-(\d+)")
+
+
+def _add(features: Dict[str, List[Interval]], interval: Interval):
+    """Appends an interval to the list of its feature."""
+    features.setdefault(interval.name, []).append(interval)
+
+
+def parse_ccds_locations(locations: str) -> List[tuple]:
+    """
+    Parses the cds_locations column of a CCDS attributes file, e.g. '[925941-926012, 930154-930335]'.
+    CCDS coordinates are 0-based with inclusive ends.
+
+    @param locations: The cds_locations value.
+    @return: A list of 0-based, end-exclusive (start, end) tuples; empty for '-' (no locations).
+    """
+    return [(int(start), int(end) + 1) for start, end in _CCDS_LOCATION.findall(locations)]
+
+
+def read_ccds_intervals(infile: str, ccds_ids: Optional[Iterable[str]] = None) -> Dict[str, List[Interval]]:
+    """
+    Reads the coding exons of CCDS entries from a CCDS attributes file.
+
+    @param infile: Path to the CCDS attributes file (tab-separated, with a '#chromosome' header).
+    @param ccds_ids: Optional CCDS IDs to keep; all entries with locations are read if None.
+    @return: A dictionary of CCDS ID to its exon intervals, in file order.
+    """
+    wanted = set(ccds_ids) if ccds_ids is not None else None
+    features = {}
+    with FileHandler(infile, mode='r') as file:
+        columns = file.readline().rstrip('\n').lstrip('#').split('\t')
+        chromosome_col, id_col = columns.index('chromosome'), columns.index('ccds_id')
+        strand_col, locations_col = columns.index('cds_strand'), columns.index('cds_locations')
+        for line in file:
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) <= locations_col or (wanted is not None and fields[id_col] not in wanted):
+                continue
+            for start, end in parse_ccds_locations(fields[locations_col]):
+                _add(features, Interval(fields[chromosome_col], start, end, fields[id_col], fields[strand_col]))
+    return features
+
+
+def read_bed_intervals(infile: str) -> Dict[str, List[Interval]]:
+    """
+    Reads a BED file (BED3 to BED12). BED12 lines are split into their blocks, so each line is
+    one spliced feature; lines without a name are named 'chromosome:start-end'.
+
+    @param infile: Path to the BED file.
+    @return: A dictionary of feature name to its intervals.
+    """
+    features = {}
+    with FileHandler(infile, mode='r') as file:
+        for line in file:
+            if not line.strip() or line.startswith(('#', 'track', 'browser')):
+                continue
+            fields = line.rstrip('\n').split('\t')
+            chromosome, start, end = fields[0], int(fields[1]), int(fields[2])
+            name = fields[3] if len(fields) > 3 and fields[3] not in ('', '.') else f"{chromosome}:{start}-{end}"
+            strand = fields[5] if len(fields) > 5 and fields[5] in ('+', '-') else '+'
+            if len(fields) >= 12:
+                sizes = [int(size) for size in fields[10].rstrip(',').split(',')]
+                offsets = [int(offset) for offset in fields[11].rstrip(',').split(',')]
+                for size, offset in zip(sizes, offsets):
+                    _add(features, Interval(chromosome, start + offset, start + offset + size, name, strand))
+            else:
+                _add(features, Interval(chromosome, start, end, name, strand))
+    return features
+
+
+def read_gtf_intervals(infile: str, feature: str = "CDS",
+                       group_by: str = "transcript_id") -> Dict[str, List[Interval]]:
+    """
+    Reads the lines of one feature type from a GTF file, grouped into spliced features.
+    GTF coordinates are 1-based with inclusive ends.
+
+    @param infile: Path to the GTF file.
+    @param feature: The feature type to read (third column), e.g. 'CDS' or 'exon'.
+    @param group_by: The attribute whose value names the spliced feature, e.g. 'transcript_id'.
+    @return: A dictionary of attribute value to its intervals.
+    """
+    features = {}
+    with FileHandler(infile, mode='r') as file:
+        for line in file:
+            if line.startswith('#') or not line.strip():
+                continue
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) < 9 or fields[2] != feature:
+                continue
+            attributes = dict(_GTF_ATTRIBUTE.findall(fields[8]))
+            if group_by not in attributes:
+                raise ValueError(f"GTF line has no {group_by} attribute: {line.strip()}")
+            _add(features, Interval(fields[0], int(fields[3]) - 1, int(fields[4]), attributes[group_by], fields[6]))
+    return features
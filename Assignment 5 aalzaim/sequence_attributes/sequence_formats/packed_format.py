@@ -0,0 +1,310 @@
+"""packed_format.py
+Defines PackedSequenceStore, a 2-bit-per-base container for large nucleotide collections.
+Bases are packed four to a byte; anything other than A, C, G or T (N and other IUPAC codes)
+is kept in a run-length encoded exception mask, and lower-case (soft-masked) stretches in a
+second run-length mask, so the original sequence can always be reproduced exactly.
+"""
+from array import array
+from typing import Iterator, List, Tuple
+import numpy as np
+from sequence_attributes.sequence_formats.fasta_format import iter_fasta_records
+from sequence_attributes.utils.strand_utils import reverse_complement_packed
+
+# A, C, G, T in either case -> 2-bit code; every other byte is stored as an exception
+_TWO_BIT_CODES = np.zeros(256, dtype=np.uint8)
+_IS_BASE = np.zeros(256, dtype=bool)
+for _code, _base in enumerate("ACGT"):
+    _TWO_BIT_CODES[[ord(_base), ord(_base.lower())]] = _code
+    _IS_BASE[[ord(_base), ord(_base.lower())]] = True
+_UPPER_BASES = np.frombuffer(b"ACGT", dtype=np.uint8)
+
+
+def _runs(values: np.ndarray, selected: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Finds runs of consecutive selected positions that share the same value.
+
+    @param values: An array of values.
+    @param selected: A boolean array marking the positions of interest.
+    @return: A tuple of (run start positions, run lengths).
+    """
+    positions = np.flatnonzero(selected)
+    if len(positions) == 0:
+        return positions, positions
+    new_run = np.ones(len(positions), dtype=bool)
+    new_run[1:] = (np.diff(positions) != 1) | (values[positions[1:]] != values[positions[:-1]])
+    starts = positions[new_run]
+    ends = np.append(positions[np.flatnonzero(new_run)[1:] - 1], positions[-1]) + 1
+    return starts, ends - starts
+
+
+def _overlapping(starts: np.ndarray, ends: np.ndarray, begin: int, end: int) -> range:
+    """
+    Returns the indices of the sorted, non-overlapping runs that intersect [begin, end),
+    with two binary searches.
+
+    @param starts: Sorted run start positions.
+    @param ends: Run end positions (exclusive), precomputed so no lookup scans the whole table.
+    @param begin: Start of the query interval.
+    @param end: End of the query interval.
+    @return: A range of run indices.
+    """
+    first = int(np.searchsorted(ends, begin, side='right'))
+    last = int(np.searchsorted(starts, end, side='left'))
+    return range(first, last)
+
+
+def _run_positions(starts: np.ndarray, ends: np.ndarray, begin: int, end: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Expands the runs that intersect [begin, end) into the positions they cover, without a
+    Python loop over the runs.
+
+    @param starts: Sorted run start positions.
+    @param ends: Run end positions (exclusive).
+    @param begin: Start of the query interval.
+    @param end: End of the query interval.
+    @return: A tuple of (positions relative to begin, the run index of each position).
+    """
+    runs = _overlapping(starts, ends, begin, end)
+    run_starts = np.maximum(starts[runs.start:runs.stop], begin)
+    run_lengths = np.minimum(ends[runs.start:runs.stop], end) - run_starts
+    run_of = np.repeat(np.arange(runs.start, runs.stop), run_lengths)
+    # position = run start + offset within the run
+    offsets = np.arange(len(run_of)) - np.repeat(np.cumsum(run_lengths) - run_lengths, run_lengths)
+    return np.repeat(run_starts - begin, run_lengths) + offsets, run_of
+
+
+class PackedSequenceStore:
+    """
+    Holds many nucleotide sequences at 2 bits per base, with O(1) access to any record and
+    coordinate range. Records are padded to a whole byte, so each one starts on a byte boundary.
+    """
+    def __init__(self):
+        self.headers: List[str] = []
+        self._packed = bytearray()
+        self._starts = array('q')   # base offset of each record in the packed data
+        self._lengths = array('q')
+        # runs of all records in flat buffers, sorted by global base position; records without
+        # ambiguity symbols or soft-masking add nothing to them
+        self._exception_starts = array('q')
+        self._exception_lengths = array('q')
+        self._exception_chars = bytearray()
+        self._soft_starts = array('q')
+        self._soft_lengths = array('q')
+        self._frozen = None
+
+    @classmethod
+    def from_sequences(cls, headers: List[str], sequences: List[str]) -> "PackedSequenceStore":
+        """
+        Builds a store from parallel lists of headers and sequences.
+
+        @param headers: List of header strings.
+        @param sequences: List of sequence strings.
+        @return: A PackedSequenceStore holding every record.
+        """
+        store = cls()
+        for header, sequence in zip(headers, sequences):
+            store.append(header, sequence)
+        return store
+
+    @classmethod
+    def from_fasta(cls, infile: str) -> "PackedSequenceStore":
+        """
+        Builds a store from a FASTA file, packing one record at a time so that the
+        whole file is never held as Python strings.
+
+        @param infile: Path to the FASTA file.
+        @return: A PackedSequenceStore holding every record of the file.
+        """
+        store = cls()
+        for header, sequence in iter_fasta_records(infile):
+            store.append(header, sequence)
+        return store
+
+    def append(self, header: str, sequence: str):
+        """
+        Packs and appends one record.
+
+        @param header: The record header.
+        @param sequence: The record sequence.
+        """
+        self._frozen = None  # releases the views on the buffers so they can grow
+        raw = np.frombuffer(sequence.encode('ascii', 'replace'), dtype=np.uint8)
+        start = len(self._packed) * 4
+
+        codes = _TWO_BIT_CODES[raw]
+        padded = np.zeros((len(codes) + 3) // 4 * 4, dtype=np.uint8)
+        padded[:len(codes)] = codes
+        quads = padded.reshape(-1, 4)
+        self._packed += (quads[:, 0] << 6 | quads[:, 1] << 4 | quads[:, 2] << 2 | quads[:, 3]).tobytes()
+
+        exception_starts, exception_lengths = _runs(raw, ~_IS_BASE[raw])
+        if len(exception_starts):
+            self._exception_starts.frombytes((exception_starts + start).astype(np.int64).tobytes())
+            self._exception_lengths.frombytes(exception_lengths.astype(np.int64).tobytes())
+            self._exception_chars += raw[exception_starts].tobytes()
+        soft_starts, soft_lengths = _runs(np.zeros_like(raw), _IS_BASE[raw] & (raw >= ord('a')))
+        if len(soft_starts):
+            self._soft_starts.frombytes((soft_starts + start).astype(np.int64).tobytes())
+            self._soft_lengths.frombytes(soft_lengths.astype(np.int64).tobytes())
+
+        self.headers.append(header)
+        self._starts.append(start)
+        self._lengths.append(len(raw))
+
+    def _buffers(self) -> dict:
+        """Returns the growable buffers the store is made of, by name."""
+        return {"packed": self._packed, "starts": self._starts, "lengths": self._lengths,
+                "exception_starts": self._exception_starts, "exception_lengths": self._exception_lengths,
+                "exception_chars": self._exception_chars, "soft_starts": self._soft_starts,
+                "soft_lengths": self._soft_lengths}
+
+    def _arrays(self) -> dict:
+        """
+        Returns the record and mask tables as NumPy views of the buffers, plus the run ends,
+        rebuilding them after appends.
+        """
+        if self._frozen is None:
+            frozen = {name: np.frombuffer(buffer, dtype=np.uint8 if isinstance(buffer, bytearray) else np.int64)
+                      for name, buffer in self._buffers().items()}
+            frozen["exception_ends"] = frozen["exception_starts"] + frozen["exception_lengths"]
+            frozen["soft_ends"] = frozen["soft_starts"] + frozen["soft_lengths"]
+            self._frozen = frozen
+        return self._frozen
+
+    def __len__(self) -> int:
+        return len(self.headers)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """The length in bases of every record."""
+        return self._arrays()["lengths"].copy()  # a view would keep the buffer from growing
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the packed bases, record tables, masks and cached run ends, excluding headers."""
+        cached = 0
+        if self._frozen is not None:
+            cached = self._frozen["exception_ends"].nbytes + self._frozen["soft_ends"].nbytes
+        return sum(memoryview(buffer).nbytes for buffer in self._buffers().values()) + cached
+
+    def _bounds(self, record: int, start: int, end) -> Tuple[int, int]:
+        """Validates a record coordinate range and converts it to global base positions."""
+        length = self._lengths[record]
+        end = length if end is None else end
+        if not 0 <= start <= end <= length:
+            raise IndexError(f"Range {start}:{end} is outside record {record} of length {length}")
+        offset = self._starts[record]
+        return offset + start, offset + end
+
+    def codes(self, record: int, start: int = 0, end: int = None) -> np.ndarray:
+        """
+        Unpacks the 2-bit codes (A=0, C=1, G=2, T=3) of a record or part of it.
+        Positions holding an exception symbol such as N have code 0.
+
+        @param record: The record index.
+        @param start: Start coordinate within the record (0-based).
+        @param end: End coordinate within the record (exclusive), defaults to the record length.
+        @return: A uint8 array of codes.
+        """
+        begin, finish = self._bounds(record, start, end)
+        packed = self._arrays()["packed"][begin // 4:(finish + 3) // 4]
+        unpacked = (packed[:, None] >> np.array([6, 4, 2, 0], dtype=np.uint8)) & 3
+        return unpacked.ravel()[begin % 4:begin % 4 + finish - begin]
+
+    def exception_mask(self, record: int, start: int = 0, end: int = None) -> np.ndarray:
+        """
+        Marks the positions of a record range that hold a symbol other than A, C, G or T.
+
+        @param record: The record index.
+        @param start: Start coordinate within the record (0-based).
+        @param end: End coordinate within the record (exclusive), defaults to the record length.
+        @return: A boolean array, True at N and other ambiguity positions.
+        """
+        begin, finish = self._bounds(record, start, end)
+        arrays = self._arrays()
+        mask = np.zeros(finish - begin, dtype=bool)
+        mask[_run_positions(arrays["exception_starts"], arrays["exception_ends"], begin, finish)[0]] = True
+        return mask
+
+    def to_ascii(self, record: int, start: int = 0, end: int = None) -> np.ndarray:
+        """
+        Reproduces the original bytes of a record range, including case and ambiguity symbols.
+
+        @param record: The record index.
+        @param start: Start coordinate within the record (0-based).
+        @param end: End coordinate within the record (exclusive), defaults to the record length.
+        @return: A uint8 array of ASCII bytes.
+        """
+        begin, finish = self._bounds(record, start, end)
+        arrays = self._arrays()
+        sequence = _UPPER_BASES[self.codes(record, start, end)]
+        positions, _ = _run_positions(arrays["soft_starts"], arrays["soft_ends"], begin, finish)
+        sequence[positions] |= 0x20  # lower-case
+        positions, runs = _run_positions(arrays["exception_starts"], arrays["exception_ends"], begin, finish)
+        sequence[positions] = arrays["exception_chars"][runs]
+        return sequence
+
+    def sequence(self, record: int, start: int = 0, end: int = None) -> str:
+        """
+        Returns a record range as a string.
+
+        @param record: The record index.
+        @param start: Start coordinate within the record (0-based).
+        @param end: End coordinate within the record (exclusive), defaults to the record length.
+        @return: The sequence string.
+        """
+        return self.to_ascii(record, start, end).tobytes().decode('ascii')
+
+    def reverse_complement(self, record: int, start: int = 0, end: int = None) -> np.ndarray:
+        """
+        Returns the reverse complement of a record range, complementing ambiguity symbols
+        with their IUPAC partners and preserving case.
+
+        @param record: The record index.
+        @param start: Start coordinate within the record (0-based).
+        @param end: End coordinate within the record (exclusive), defaults to the record length.
+        @return: A uint8 array of ASCII bytes.
+        """
+        ascii_bytes = self.to_ascii(record, start, end)
+        return reverse_complement_packed(ascii_bytes, np.array([0, len(ascii_bytes)]))[0]
+
+    def kmer_codes(self, record: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Encodes every k-mer of a record as an integer of 2-bit codes (first base most significant).
+
+        @param record: The record index.
+        @param k: The k-mer length (at most 32).
+        @return: A tuple of (codes, valid). `codes` is a uint64 array with one entry per k-mer
+        start position, and `valid` is False for k-mers that overlap an ambiguity symbol.
+        """
+        if not 0 < k <= 32:
+            raise ValueError("k must be between 1 and 32 for 2-bit k-mer codes")
+        codes = self.codes(record).astype(np.uint64)
+        n_kmers = max(len(codes) - k + 1, 0)
+        kmers = np.zeros(n_kmers, dtype=np.uint64)
+        for j in range(k):
+            kmers = (kmers << np.uint64(2)) | codes[j:j + n_kmers]
+        exceptions = np.concatenate(([0], np.cumsum(self.exception_mask(record))))
+        valid = exceptions[k:k + n_kmers] - exceptions[:n_kmers] == 0
+        return kmers, valid
+
+    def batches(self, max_bases: int = 1 << 24) -> Iterator[Tuple[int, Tuple[np.ndarray, np.ndarray]]]:
+        """
+        Yields consecutive groups of records as packed (buffer, offsets) ASCII batches, ready for the
+        *_batch functions of seq_attribute_utils. Only one batch is expanded to bytes at a time.
+
+        @param max_bases: The approximate number of bases per batch.
+        @return: An iterator of (index of the first record in the batch, (buffer, offsets)).
+        """
+        record = 0
+        while record < len(self):
+            first = record
+            total = 0
+            while record < len(self) and (record == first or total + self._lengths[record] <= max_bases):
+                total += self._lengths[record]
+                record += 1
+            offsets = np.zeros(record - first + 1, dtype=np.int64)
+            np.cumsum(self._lengths[first:record], out=offsets[1:])
+            buffer = np.concatenate([self.to_ascii(i) for i in range(first, record)]) \
+                if total else np.zeros(0, dtype=np.uint8)
+            yield first, (buffer, offsets)
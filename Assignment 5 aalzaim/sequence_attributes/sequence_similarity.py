@@ -0,0 +1,71 @@
+"""sequence_similarity.py
+Finds near-duplicate and related sequences, within one FASTA file or across several (e.g. two
+CCDS releases): every record is reduced to a MinHash signature of its k-mers, LSH banding
+selects candidate pairs, and pairs whose estimated Jaccard similarity reaches the threshold
+are written as a tab-separated edge list (id_a, id_b, jaccard).
+Usage:
+python -m sequence_attributes.sequence_similarity --infile <FASTA file> [<FASTA file> ...]
+--outfile <edge list TSV> [--k 21] [--num_hashes 128] [--threshold 0.8] [--bands <bands>]
+[--canonical] [--workers 4] [--between_files] [--signatures_outfile <signatures.npz>]
+"""
+import argparse
+import os
+import sys
+import numpy as np
+from sequence_attributes.sequence_formats.fasta_format import iter_fasta_records
+from sequence_attributes.utils.io_utils import FileHandler
+from sequence_attributes.utils.minhash_utils import (SimilarityEdges, build_signatures, all_vs_all_similarity,
+                                                     write_similarity_edges, save_signatures)
+
+
+def get_cli_args():
+    """
+        Parses and returns command-line arguments for the similarity search.
+
+        @return: The parsed arguments from the command line.
+        """
+    parser = argparse.ArgumentParser(description="All-vs-all MinHash similarity of FASTA records.")
+    parser.add_argument("--infile", nargs="+", required=True, help="Paths to FASTA files.")
+    parser.add_argument("--outfile", required=True, help="Path for the similarity edge list (TSV).")
+    parser.add_argument("--k", type=int, default=21, help="K-mer length (1 to 32).")
+    parser.add_argument("--num_hashes", type=int, default=128, help="MinHash signature length.")
+    parser.add_argument("--threshold", type=float, default=0.8, help="Minimum estimated Jaccard similarity.")
+    parser.add_argument("--bands", type=int, default=None,
+                        help="LSH bands (must divide --num_hashes); chosen from the threshold by default.")
+    parser.add_argument("--canonical", action="store_true", help="Count k-mers with their reverse complements.")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (0 for none).")
+    parser.add_argument("--between_files", action="store_true",
+                        help="Only report pairs of records from different input files.")
+    parser.add_argument("--signatures_outfile", required=False, default=None,
+                        help="Optional path to save the record IDs and signatures (.npz).")
+    return parser.parse_args()
+
+
+def main():
+    """Builds the signatures of every file and writes the similar pairs."""
+    args = get_cli_args()
+    ids, signatures, sources = [], [], []
+    for source, infile in enumerate(args.infile):
+        file_ids, file_signatures = build_signatures(iter_fasta_records(infile), args.k, args.num_hashes,
+                                                     args.canonical, workers=args.workers)
+        if len(args.infile) > 1:  # record IDs can repeat across files, so label them with their file
+            label = os.path.splitext(os.path.basename(infile))[0]
+            file_ids = [f"{label}:{record_id}" for record_id in file_ids]
+        ids.extend(file_ids)
+        signatures.append(file_signatures)
+        sources.append(np.full(len(file_ids), source))
+    signatures, sources = np.concatenate(signatures), np.concatenate(sources)
+    if args.signatures_outfile:
+        save_signatures(args.signatures_outfile, ids, signatures, args.k, args.canonical, seed=0)
+
+    edges = all_vs_all_similarity(signatures, args.threshold, args.bands, workers=args.workers)
+    if args.between_files:
+        keep = sources[edges.first] != sources[edges.second]
+        edges = SimilarityEdges(*(values[keep] for values in edges))
+    with FileHandler(args.outfile, mode='w') as outfile:
+        write_similarity_edges(edges, ids, outfile)
+    print(f"{len(ids)} records, {len(edges.jaccard)} pairs with Jaccard >= {args.threshold}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
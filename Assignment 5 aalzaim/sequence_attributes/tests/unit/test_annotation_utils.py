@@ -0,0 +1,114 @@
+"""Test suite for annotation_utils.py"""
+import pandas as pd
+import pytest
+from sequence_attributes.utils.annotation_utils import (load_ccds_attributes, load_ensembl_genes,
+                                                        load_merged_annotation, build_annotation_snapshot,
+                                                        load_annotation_snapshot, snapshot_is_fresh)
+from sequence_attributes.utils.seq_attribute_utils import (assemble_sequence_attributes, compute_sequence_attributes,
+                                                           return_standard_genetic_code)
+
+CCDS_TABLE = (
+    "#chromosome\tnc_accession\tgene\tgene_id\tccds_id\tccds_status\tcds_strand\n"
+    "1\tNC_000001.11\tSAMD11\t148398\tCCDS2.2\tPublic\t+\n"
+    "1\tNC_000001.11\tNOC2L\t26155\tCCDS3.1\tPublic\t-\n"
+    "X\tNC_000023.11\tXG\t7499\tCCDS14.1\tPublic\t+\n"
+)
+ENSEMBL_TABLE = (
+    "ID\tCanonical Transcript\tGene\tDescription\tBiotype\tVersion\n"
+    "ENSG00000187634\tENST00000342066\tSAMD11\tsterile alpha motif domain\tprotein_coding\t13\n"
+    "ENSG00000188976\tENST00000327044\tNOC2L\tNOC2 like nucleolar\tprotein_coding\t11\n"
+    "ENSG00000124343\tENST00000381192\tXG\tXg glycoprotein\tprotein_coding\t7\n"
+)
+
+
+@pytest.fixture
+def tables(tmp_path):
+    ccds_file = tmp_path / "ccds.txt"
+    ensembl_file = tmp_path / "ensembl.tsv"
+    ccds_file.write_text(CCDS_TABLE)
+    ensembl_file.write_text(ENSEMBL_TABLE)
+    return str(ccds_file), str(ensembl_file)
+
+
+# testing that only the used columns are loaded, renamed and typed
+def test_load_ccds_attributes(tables):
+    ccds_df = load_ccds_attributes(tables[0])
+    assert list(ccds_df.columns) == ['chrom', 'gene', 'refseq_gene_id', 'ccds_id']
+    assert isinstance(ccds_df['chrom'].dtype, pd.CategoricalDtype)
+    assert ccds_df['refseq_gene_id'].tolist() == [148398, 26155, 7499]
+
+
+# testing that CCDS rows are filtered to the requested IDs
+def test_load_ccds_attributes_filtered(tables):
+    ccds_df = load_ccds_attributes(tables[0], ccds_ids={'CCDS14.1'})
+    assert ccds_df['ccds_id'].tolist() == ['CCDS14.1']
+    assert list(ccds_df['chrom'].cat.categories) == ['X']
+
+
+# testing the Ensembl column selection and gene filter
+def test_load_ensembl_genes(tables):
+    ensembl_df = load_ensembl_genes(tables[1], genes=['NOC2L'])
+    assert list(ensembl_df.columns) == ['ensembl_gene_id', 'ensembl_canonical_transcript_id',
+                                        'gene', 'description', 'biotype']
+    assert ensembl_df['ensembl_gene_id'].tolist() == ['ENSG00000188976']
+
+
+# testing that the filtered merge matches the full read_csv merge for the kept IDs
+def test_load_merged_annotation_matches_full_merge(tables):
+    ccds_df = pd.read_csv(tables[0], sep='\t').rename(columns={'gene_id': 'refseq_gene_id', '#chromosome': 'chrom'})
+    ensembl_df = pd.read_csv(tables[1], sep='\t').rename(columns={
+        'ID': 'ensembl_gene_id', 'Canonical Transcript': 'ensembl_canonical_transcript_id',
+        'Gene': 'gene', 'Description': 'description', 'Biotype': 'biotype'})
+    full_df = pd.merge(ccds_df, ensembl_df, on='gene', how='left')
+
+    merged_df = load_merged_annotation(tables[0], tables[1], ccds_ids={'CCDS2.2', 'CCDS14.1'})
+    expected = full_df[full_df['ccds_id'].isin({'CCDS2.2', 'CCDS14.1'})]
+    for column in merged_df.columns:
+        assert merged_df[column].astype(str).tolist() == expected[column].astype(str).tolist()
+
+
+# testing that a pickle snapshot round trips and is used while the sources are unchanged
+def test_annotation_snapshot_round_trip(tables, tmp_path):
+    snapshot = str(tmp_path / "annotation.pkl")
+    assert build_annotation_snapshot(tables[0], tables[1], snapshot) == 3
+    assert snapshot_is_fresh(snapshot, *tables)
+
+    from_snapshot = load_merged_annotation(tables[0], tables[1], ccds_ids={'CCDS3.1'}, snapshot_path=snapshot)
+    from_tables = load_merged_annotation(tables[0], tables[1], ccds_ids={'CCDS3.1'})
+    pd.testing.assert_frame_equal(from_snapshot.astype(str), from_tables.astype(str))
+
+
+# testing that editing a source table makes the snapshot stale
+def test_annotation_snapshot_stale(tables, tmp_path):
+    snapshot = str(tmp_path / "annotation.pkl")
+    build_annotation_snapshot(*tables, snapshot)
+    with open(tables[1], 'a') as file:
+        file.write("ENSG00000000001\tENST00000000001\tNEW\tnew gene\tlncRNA\t1\n")
+
+    assert not snapshot_is_fresh(snapshot, *tables)
+    assert not snapshot_is_fresh(str(tmp_path / "missing.pkl"), *tables)
+
+
+# testing the memory-mapped Feather snapshot when pyarrow is installed
+def test_annotation_snapshot_feather(tables, tmp_path):
+    pytest.importorskip("pyarrow")
+    snapshot = str(tmp_path / "annotation.feather")
+    build_annotation_snapshot(*tables, snapshot)
+    assert load_annotation_snapshot(snapshot)['ccds_id'].tolist() == ['CCDS2.2', 'CCDS3.1', 'CCDS14.1']
+
+
+# testing that an unknown snapshot extension is rejected
+def test_annotation_snapshot_unknown_extension(tables, tmp_path):
+    with pytest.raises(ValueError):
+        build_annotation_snapshot(*tables, str(tmp_path / "annotation.csv"))
+
+
+# testing that the indexed lookup gives the same gene information as the column scan
+def test_assemble_with_indexed_annotation(tables):
+    indexed_df = load_merged_annotation(*tables)
+    computed = compute_sequence_attributes("ATGCCCTAA", return_standard_genetic_code())
+    indexed = assemble_sequence_attributes("CCDS3.1|Hs109|chr1", "ATGCCCTAA", indexed_df, computed)
+    scanned = assemble_sequence_attributes("CCDS3.1|Hs109|chr1", "ATGCCCTAA", indexed_df.reset_index(drop=True),
+                                           computed)
+    assert indexed.additional_gene_info == scanned.additional_gene_info
+    assert indexed.additional_gene_info['gene'] == 'NOC2L'
@@ -0,0 +1,74 @@
+"""Test suite for cache_utils.py"""
+import pandas as pd
+from sequence_attributes.utils.cache_utils import AttributeCache, genetic_code_version, sequence_cache_key
+from sequence_attributes.utils.seq_attribute_utils import (return_standard_genetic_code,
+                                                           compute_sequence_attributes,
+                                                           get_additional_sequence_attributes)
+
+
+# testing that the cache key changes with the genetic code
+def test_sequence_cache_key_depends_on_genetic_code():
+    genetic_code = return_standard_genetic_code()
+    alternative_code = dict(genetic_code, UGA="W")
+    standard_version = genetic_code_version(genetic_code)
+    assert standard_version == genetic_code_version(return_standard_genetic_code())
+    assert standard_version != genetic_code_version(alternative_code)
+    alternative_version = genetic_code_version(alternative_code)
+    assert sequence_cache_key("ATG", standard_version) != sequence_cache_key("ATG", alternative_version)
+
+
+# testing that cached attributes survive reopening the cache and are counted as hits
+def test_attribute_cache_persists(tmp_path):
+    genetic_code = return_standard_genetic_code()
+    cache_path = str(tmp_path / "cache.sqlite")
+    computed = compute_sequence_attributes("ATGCCCCCATAA", genetic_code)
+    with AttributeCache(cache_path) as cache:
+        assert cache.get("ATGCCCCCATAA", genetic_code) is None
+        cache.put("ATGCCCCCATAA", genetic_code, computed)
+    with AttributeCache(cache_path) as cache:
+        assert cache.get("ATGCCCCCATAA", genetic_code) == computed
+        assert (cache.hits, cache.misses) == (1, 0)
+
+
+# testing least recently used eviction once the size cap is reached
+def test_attribute_cache_lru_eviction(tmp_path):
+    genetic_code = return_standard_genetic_code()
+    payload = {"value": "x" * 100}
+    with AttributeCache(str(tmp_path / "cache.sqlite"), max_bytes=300) as cache:
+        cache.put("AAA", genetic_code, payload)
+        cache.put("CCC", genetic_code, payload)
+        cache.get("AAA", genetic_code)  # AAA is now more recent than CCC
+        cache.put("GGG", genetic_code, payload)
+        assert cache.evictions == 1
+        assert cache.get("CCC", genetic_code) is None
+        assert cache.get("AAA", genetic_code) == payload
+        assert len(cache) == 2
+
+
+# testing that get_additional_sequence_attributes gives the same result with and without the cache
+def test_get_additional_sequence_attributes_with_cache(tmp_path):
+    genetic_code = return_standard_genetic_code()
+    attribute_df = pd.DataFrame({"ccds_id": ["ID1"], "gene": ["Gene1"]})
+    expected = get_additional_sequence_attributes("ID1|chr1", "ATGCCCTGA", attribute_df, genetic_code)
+    with AttributeCache(str(tmp_path / "cache.sqlite")) as cache:
+        first = get_additional_sequence_attributes("ID1|chr1", "ATGCCCTGA", attribute_df, genetic_code, cache)
+        second = get_additional_sequence_attributes("ID1|chr1", "ATGCCCTGA", attribute_df, genetic_code, cache)
+        assert (cache.hits, cache.misses) == (1, 1)
+    assert first == expected
+    assert second == expected
+
+
+
+# testing that attributes of the two strands are cached apart
+def test_get_additional_sequence_attributes_strand(tmp_path):
+    genetic_code = return_standard_genetic_code()
+    attribute_df = pd.DataFrame({"ccds_id": ["ID1"], "gene": ["Gene1"]})
+    assert sequence_cache_key("ATG", "v1") == sequence_cache_key("ATG", "v1", "+")
+    assert sequence_cache_key("ATG", "v1") != sequence_cache_key("ATG", "v1", "-")
+    with AttributeCache(str(tmp_path / "cache.sqlite")) as cache:
+        forward = get_additional_sequence_attributes("ID1|chr1", "TCAGGGCAT", attribute_df, genetic_code, cache)
+        reverse = get_additional_sequence_attributes("ID1|chr1", "TCAGGGCAT", attribute_df, genetic_code, cache,
+                                                     strand="-")
+        assert (cache.hits, cache.misses) == (0, 2)
+    assert forward.protein_sequence == "SGH"
+    assert reverse.protein_sequence == compute_sequence_attributes("ATGCCCTGA", genetic_code)["protein_sequence"]
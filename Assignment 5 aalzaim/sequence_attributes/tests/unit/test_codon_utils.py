@@ -0,0 +1,46 @@
+"""Test suite for codon_utils.py"""
+import math
+import numpy as np
+from sequence_attributes.utils.codon_utils import (CODONS, codon_histogram, codon_histogram_batch, codon_histograms,
+                                                   merge_codon_histograms, rscu, relative_adaptiveness,
+                                                   codon_adaptation_index, codon_usage_rows)
+from sequence_attributes.utils.seq_attribute_utils import return_standard_genetic_code
+
+SEQUENCES = ["ATGCTGCTGCTATGA", "ATGCTACTAtggNNNTAA", "ATGCT", ""]
+
+
+# testing the in-frame codon histograms and their merging
+def test_codon_histograms():
+    histograms = codon_histogram_batch(SEQUENCES)
+    assert histograms.shape == (4, 64)
+    assert histograms[0][CODONS.index("CUG")] == 2
+    assert histograms[1][CODONS.index("UGG")] == 1  # lower case is counted, the N codon is not
+    assert histograms.sum(axis=1).tolist() == [5, 5, 1, 0]
+    assert (codon_histogram("TCATAGCAT", strand="-") == codon_histogram("ATGCTATGA")).all()
+    assert (codon_histograms(SEQUENCES, chunk_size=3) == histograms).all()
+    assert (merge_codon_histograms([histograms[0], histograms[1]]) == histograms[:2].sum(axis=0)).all()
+
+
+# testing RSCU, relative adaptiveness and CAI against hand-computed values
+def test_rscu_and_cai():
+    genetic_code = return_standard_genetic_code()
+    histograms = codon_histogram_batch(SEQUENCES)
+    aggregate = merge_codon_histograms(histograms)
+    values = rscu(aggregate, genetic_code)
+    # Leu has 6 codons: CUG x2 and CUA x3 -> mean 5/6
+    assert np.isclose(values[CODONS.index("CUA")], 3.6)
+    assert values[CODONS.index("UUA")] == 0.0
+    assert values[CODONS.index("AUG")] == 1.0
+    assert math.isnan(values[CODONS.index("UGA")])
+
+    weights = relative_adaptiveness(aggregate, genetic_code)
+    assert weights[CODONS.index("CUA")] == 1.0
+    assert weights[CODONS.index("UUA")] == 0.5 / 3  # unobserved codons count as 0.5
+    cai = codon_adaptation_index(histograms, weights, genetic_code)
+    # only Leu codons are informative: CUG, CUG, CUA and CUA, CUA
+    assert np.allclose(cai[:2], [(2 / 3 * 2 / 3 * 1.0) ** (1 / 3), 1.0])
+    assert np.isnan(cai[3])
+
+    rows = codon_usage_rows(aggregate, genetic_code)
+    assert rows[CODONS.index("UAA")]["amino_acid"] == "*"
+    assert sum(row["count"] for row in rows) == 11
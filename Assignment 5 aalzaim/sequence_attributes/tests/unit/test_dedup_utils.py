@@ -0,0 +1,64 @@
+"""Test suite for dedup_utils.py"""
+import io
+import pandas as pd
+from sequence_attributes.utils.dedup_utils import SequenceDeduplicator, DedupStats, dedup_fasta
+from sequence_attributes.utils.cache_utils import AttributeCache
+from sequence_attributes.utils.pipeline_utils import compute_fasta_attributes_pipelined
+from sequence_attributes.utils.seq_attribute_utils import (get_additional_sequence_attributes,
+                                                           return_standard_genetic_code)
+
+RECORDS = [("ID1|chr1", "ATGCCCTGA"), ("ID2|chr2", "ATGGGGCCCAAATAG"), ("ID3|chr3", "ATGCCCTGA"),
+           ("ID4|chr4", "ATGCCCTGA")]
+
+
+# testing that duplicates are computed once and reuse the first result
+def test_sequence_deduplicator():
+    genetic_code = return_standard_genetic_code()
+    attribute_df = pd.DataFrame({"ccds_id": ["ID1", "ID2", "ID3", "ID4"], "gene": ["G1", "G2", "G3", "G4"]})
+    deduplicator = SequenceDeduplicator()
+    rows = [get_additional_sequence_attributes(header, sequence, attribute_df, genetic_code, cache=deduplicator)
+            for header, sequence in RECORDS]
+
+    assert rows == [get_additional_sequence_attributes(header, sequence, attribute_df, genetic_code)
+                    for header, sequence in RECORDS]
+    assert rows[0].protein_sequence is rows[3].protein_sequence  # shared, not recomputed
+    assert deduplicator.stats() == DedupStats(records=4, unique=2, duplicates=2)
+    assert "50.0% duplicate ratio" in deduplicator.report()
+
+
+# testing that the backing cache only sees each unique sequence once
+def test_sequence_deduplicator_backing(tmp_path):
+    genetic_code = return_standard_genetic_code()
+    with AttributeCache(str(tmp_path / "cache.sqlite")) as cache:
+        deduplicator = SequenceDeduplicator(backing=cache)
+        for _, sequence in RECORDS:
+            if deduplicator.get(sequence, genetic_code) is None:
+                deduplicator.put(sequence, genetic_code, {"dna_sequence_length": len(sequence)})
+        assert (cache.hits, cache.misses, len(cache)) == (0, 2, 2)
+
+
+# testing that the pipeline computes duplicates within a chunk once and keeps the output identical
+def test_pipelined_deduplication(tmp_path):
+    fasta = tmp_path / "test.fasta"
+    fasta.write_text("".join(f">{header}\n{sequence}\n" for header, sequence in RECORDS))
+    attribute_df = pd.DataFrame({"ccds_id": ["ID1", "ID2", "ID3", "ID4"], "gene": ["G1", "G2", "G3", "G4"]})
+    genetic_code = return_standard_genetic_code()
+    deduplicator = SequenceDeduplicator()
+
+    rows, _ = compute_fasta_attributes_pipelined(str(fasta), attribute_df, genetic_code, cache=deduplicator,
+                                                 workers=0, chunk_size=4)
+    assert rows == [get_additional_sequence_attributes(header, sequence, attribute_df, genetic_code)._asdict()
+                    for header, sequence in RECORDS]
+    assert deduplicator.stats() == DedupStats(records=4, unique=2, duplicates=2)
+
+
+# testing the collapsed FASTA and the ID mapping
+def test_dedup_fasta():
+    fasta_outfile, mapping_outfile = io.StringIO(), io.StringIO()
+    stats = dedup_fasta(RECORDS, fasta_outfile, mapping_outfile, line_width=6)
+
+    assert stats == DedupStats(records=4, unique=2, duplicates=2)
+    assert fasta_outfile.getvalue() == ">ID1|chr1\nATGCCC\nTGA\n>ID2|chr2\nATGGGG\nCCCAAA\nTAG\n"
+    assert mapping_outfile.getvalue().splitlines() == [
+        "header\trepresentative_header", "ID1|chr1\tID1|chr1", "ID2|chr2\tID2|chr2",
+        "ID3|chr3\tID1|chr1", "ID4|chr4\tID1|chr1"]
@@ -0,0 +1,73 @@
+"""Test suite for excel_utils.py"""
+import numpy as np
+import pandas as pd
+import pytest
+from sequence_attributes.utils.excel_utils import (TRUNCATION_MARK, plan_excel_parts, limit_cell_lengths,
+                                                   write_excel, write_tsv_shards, excel_side_path)
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def _table():
+    return pd.DataFrame({
+        'ccds_id': [f"CCDS{i}.1" for i in range(7)],
+        'dna_sequence': ["ATG" * 20 if i % 3 == 0 else "ATGTAA" for i in range(7)],
+        'kmers_list': [["ATG"] * (20 if i == 1 else 1) for i in range(7)],
+        'proline_comp': [1.5, np.nan, 2.0, 3.0, 4.0, 5.0, 6.0],
+    })
+
+
+# testing that rows are split into sheets and files without gaps or oversized parts
+def test_plan_excel_parts():
+    # six rows per file: the second sheet continues in the next file
+    assert plan_excel_parts(10, 2, max_rows_per_sheet=4, max_cells_per_file=12) == [[(0, 4), (4, 6)],
+                                                                                    [(6, 8), (8, 10)]]
+    assert plan_excel_parts(0, 3) == [[(0, 0)]]
+    with pytest.raises(ValueError):
+        plan_excel_parts(10, 2, max_rows_per_sheet=2 ** 20)
+
+
+# testing that long sequences are offloaded to a FASTA file and other long cells are truncated
+def test_limit_cell_lengths(tmp_path):
+    fasta = tmp_path / "out.sequences.fna"
+    df, offloaded, truncated = limit_cell_lengths(_table(), _table()['ccds_id'], str(fasta), max_chars=40)
+    assert (offloaded, truncated) == (3, 1)
+    assert df['dna_sequence'][3] == "out.sequences.fna:CCDS3.1|dna_sequence"
+    assert fasta.read_text().splitlines()[:2] == [">CCDS0.1|dna_sequence", "ATG" * 20]
+    assert len(df['kmers_list'][1]) == 40 and df['kmers_list'][1].endswith(TRUNCATION_MARK)
+    assert df['kmers_list'][0] == "['ATG']"
+
+
+# testing that split workbooks and TSV shards together hold every row once
+def test_write_excel_and_tsv_shards(tmp_path):
+    excel_outfile = str(tmp_path / "out.xlsx")
+    parts = write_excel(_table(), excel_outfile, ids=_table()['ccds_id'], max_rows_per_sheet=2,
+                        max_cells_per_file=12, max_cell_chars=40)
+    assert parts.files == [excel_outfile, str(tmp_path / "out.part2.xlsx"), str(tmp_path / "out.part3.xlsx")]
+    assert (parts.sheets, parts.rows, parts.offloaded) == (5, 7, 3)
+    rows = []
+    for path in parts.files:
+        for sheet in openpyxl.load_workbook(path):
+            values = list(sheet.iter_rows(values_only=True))
+            assert values[0] == ('ccds_id', 'dna_sequence', 'kmers_list', 'proline_comp')
+            rows += values[1:]
+    assert [row[0] for row in rows] == list(_table()['ccds_id'])
+    assert rows[1][3] is None and rows[2] == ("CCDS2.1", "ATGTAA", "['ATG']", 2)
+
+    shards = write_tsv_shards(_table(), str(tmp_path / "out.detail.tsv"), rows_per_shard=3)
+    assert [path.rsplit("/", 1)[-1] for path in shards] == [f"out.detail.part000{i}.tsv" for i in (1, 2, 3)]
+    assert pd.concat([pd.read_csv(path, sep='\t') for path in shards])['ccds_id'].tolist() == \
+        list(_table()['ccds_id'])
+
+
+# testing that an output name without the .xlsx extension still gets a separate file per part
+def test_write_excel_without_extension(tmp_path):
+    excel_outfile = str(tmp_path / "out")
+    parts = write_excel(_table(), excel_outfile, max_rows_per_sheet=2, max_cells_per_file=12, max_cell_chars=40)
+    assert parts.files == [excel_outfile, str(tmp_path / "out.part2.xlsx"), str(tmp_path / "out.part3.xlsx")]
+    assert excel_side_path(excel_outfile, '.sequences.fna') == str(tmp_path / "out.sequences.fna")
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["out", "out.part2.xlsx", "out.part3.xlsx",
+                                                                "out.sequences.fna"]
+    assert sum(sheet.max_row - 1 for path in parts.files[1:] for sheet in openpyxl.load_workbook(path)) == 4
+    shards = write_tsv_shards(_table(), str(tmp_path / "detail"), rows_per_shard=4)
+    assert [path.rsplit("/", 1)[-1] for path in shards] == ["detail.part0001.tsv", "detail.part0002.tsv"]
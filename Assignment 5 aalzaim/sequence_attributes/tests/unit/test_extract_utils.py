@@ -0,0 +1,92 @@
+"""Test suite for extract_utils.py and interval_format.py"""
+import io
+import pytest
+from sequence_attributes.utils.extract_utils import extract_features, index_fasta
+from sequence_attributes.sequence_formats.interval_format import (Interval, parse_ccds_locations,
+                                                                  read_ccds_intervals, read_bed_intervals,
+                                                                  read_gtf_intervals)
+from sequence_attributes.sequence_formats.header_format import parse_ccds_header
+from sequence_attributes.utils.seq_attribute_utils import compute_sequence_attributes, return_standard_genetic_code
+
+CHR1 = "AAAATGCCCGGGTTTAAATAGCCCC"  # 25 bases
+CHR2 = "GGGCTATTTACCCGGGCATGG"  # 21 bases
+
+
+@pytest.fixture
+def genome(tmp_path):
+    path = tmp_path / "genome.fa"
+    path.write_text(">chr1 test\n" + "\n".join(CHR1[i:i + 10] for i in range(0, 25, 10)) +
+                    "\n>2\n" + "\n".join(CHR2[i:i + 10] for i in range(0, 21, 10)) + "\n")
+    return str(path)
+
+
+def _records(text):
+    lines = text.splitlines()
+    return dict(zip(lines[0::2], lines[1::2]))
+
+
+# testing the faidx-style index of a FASTA file
+def test_index_fasta(genome):
+    index = index_fasta(genome)
+    assert list(index) == ["chr1", "2"]
+    assert (index["chr1"].length, index["chr1"].offset, index["chr1"].line_bases) == (25, 11, 10)
+
+
+# testing spliced CCDS extraction on both strands (CCDS locations are 0-based, end-inclusive)
+def test_extract_ccds(genome, tmp_path):
+    ccds = tmp_path / "ccds.txt"
+    ccds.write_text("#chromosome\tccds_id\tcds_strand\tcds_locations\n"
+                    "1\tCCDS1.1\t+\t[3-8, 12-20]\n"
+                    "2\tCCDS2.1\t-\t[0-11, 17-19]\n"
+                    "3\tCCDS3.1\t+\t[0-2]\n"
+                    "1\tCCDS4.1\t+\t-\n")
+    assert parse_ccds_locations("[3-8, 12-20]") == [(3, 9), (12, 21)]
+    features = read_ccds_intervals(str(ccds))
+    assert sorted(features) == ["CCDS1.1", "CCDS2.1", "CCDS3.1"]
+
+    outfile = io.StringIO()
+    stats = extract_features(genome, features, outfile, line_width=0)
+    records = _records(outfile.getvalue())
+    assert records == {">CCDS1.1|chr1": "ATGCCCTTTAAATAG", ">CCDS2.1|chr2": "CATGGTAAATAGCCC"}
+    assert parse_ccds_header("CCDS2.1|chr2").chromosome == "2"
+    assert (stats.features, stats.skipped) == (2, 1)
+
+
+# testing BED12 blocks and GTF CDS lines as spliced features
+def test_extract_bed_gtf(genome, tmp_path):
+    bed = tmp_path / "features.bed"
+    bed.write_text("chr1\t3\t21\ttx1\t0\t+\t3\t21\t0\t2\t6,9,\t0,9,\nchr1\t0\t4\n")
+    gtf = tmp_path / "features.gtf"
+    gtf.write_text('chr1\ttest\tCDS\t13\t21\t.\t+\t0\tgene_id "g1"; transcript_id "tx1";\n'
+                   'chr1\ttest\texon\t1\t25\t.\t+\t.\tgene_id "g1"; transcript_id "tx1";\n'
+                   'chr1\ttest\tCDS\t4\t9\t.\t+\t0\tgene_id "g1"; transcript_id "tx1";\n')
+    bed_features = read_bed_intervals(str(bed))
+    assert bed_features["chr1:0-4"] == [Interval("chr1", 0, 4, "chr1:0-4", "+")]
+    assert read_gtf_intervals(str(gtf))["tx1"] == [Interval("chr1", 12, 21, "tx1", "+"),
+                                                   Interval("chr1", 3, 9, "tx1", "+")]
+    for features in (bed_features, read_gtf_intervals(str(gtf))):
+        outfile = io.StringIO()
+        extract_features(genome, features, outfile)
+        assert _records(outfile.getvalue())[">tx1|chr1"] == "ATGCCCTTTAAATAG"
+
+    with pytest.raises(ValueError):
+        extract_features(genome, {"long": [Interval("chr1", 20, 30, "long", "+")]}, io.StringIO())
+
+
+
+# testing that soft-masked bases are upper-cased, so that the output can go into main.py
+def test_extract_soft_masked(tmp_path):
+    path = tmp_path / "masked.fa"
+    path.write_text(">chr1\n" + CHR1[:5] + CHR1[5:15].lower() + CHR1[15:] + "\n")
+    features = {"CCDS1.1": [Interval("chr1", 3, 9, "CCDS1.1", "+"), Interval("chr1", 12, 21, "CCDS1.1", "+")],
+                "CCDS2.1": [Interval("chr1", 3, 21, "CCDS2.1", "-")]}
+    outfile = io.StringIO()
+    extract_features(str(path), features, outfile, line_width=0)
+    records = _records(outfile.getvalue())
+    assert records[">CCDS1.1|chr1"] == "ATGCCCTTTAAATAG"
+    for sequence in records.values():
+        attributes = compute_sequence_attributes(sequence, return_standard_genetic_code())
+        assert attributes["tm_value"] > 0
+    kept = io.StringIO()
+    extract_features(str(path), features, kept, line_width=0, keep_case=True)
+    assert _records(kept.getvalue())[">CCDS1.1|chr1"] == "ATgccctttAAATAG"
@@ -1,7 +1,9 @@
 """Test suite for fasta_format.py"""
 import pytest
 import os
-from sequence_attributes.sequence_formats.fasta_format import get_fasta_lists, _verify_lists
+from sequence_attributes.sequence_formats.fasta_format import (get_fasta_lists, iter_fasta_records,
+                                                             get_fasta_headers, get_record_boundaries,
+                                                             iter_fasta_records_in_range, _verify_lists)
 
 
 # testing the _verify_lists function
@@ -94,3 +96,43 @@ def test_get_fasta_lists_unexpected_header_format(tmp_path):
     headers, sequences = get_fasta_lists(str(unexpected_format_fasta_path))
     assert headers == ["UnexpectedHeader"]
     assert sequences == ["ATGC"]
+
+
+# tests that iter_fasta_records streams the same records as get_fasta_lists
+def test_iter_fasta_records(tmp_path):
+    fasta_path = tmp_path / "stream.fasta"
+    fasta_path.write_text(">CCDS1.1|chr1\nATG\nC\n>CCDS2.1|chr2\n\n>CCDS3.1|chr3\nGG\n")
+
+    records = list(iter_fasta_records(str(fasta_path)))
+    assert records == [("CCDS1.1|chr1", "ATGC"), ("CCDS2.1|chr2", ""), ("CCDS3.1|chr3", "GG")]
+    assert get_fasta_lists(str(fasta_path)) == (["CCDS1.1|chr1", "CCDS2.1|chr2", "CCDS3.1|chr3"], ["ATGC", "", "GG"])
+
+
+# tests that a sequence before the first header is rejected
+def test_iter_fasta_records_sequence_before_header(tmp_path):
+    fasta_path = tmp_path / "orphan.fasta"
+    fasta_path.write_text("ATGC\n>CCDS1.1|chr1\nGG\n")
+
+    with pytest.raises(ValueError):
+        list(iter_fasta_records(str(fasta_path)))
+
+
+# tests that reading only the headers matches the headers of get_fasta_lists
+def test_get_fasta_headers(tmp_path):
+    fasta_path = tmp_path / "headers.fasta"
+    fasta_path.write_text(">CCDS1.1|chr1\nATG\nC\n>CCDS2.1|chr2\nGG\n")
+
+    assert get_fasta_headers(str(fasta_path)) == get_fasta_lists(str(fasta_path))[0]
+
+
+# tests that the records of all byte ranges together are the records of the file
+@pytest.mark.parametrize("n_parts", [1, 2, 3, 7])
+def test_iter_fasta_records_in_range(tmp_path, n_parts):
+    fasta_path = tmp_path / "ranges.fasta"
+    fasta_path.write_bytes(b">CCDS1.1|chr1\r\nATG\r\nC\r\n>CCDS2.1|chr2\r\n>CCDS3.1|chr3\r\nGGGGGGGGGG\r\n")
+
+    boundaries = get_record_boundaries(str(fasta_path), n_parts)
+    assert len(boundaries) == n_parts
+    records = [record for start, end in boundaries
+               for record in iter_fasta_records_in_range(str(fasta_path), start, end)]
+    assert records == list(iter_fasta_records(str(fasta_path)))
@@ -0,0 +1,52 @@
+"""Test suite for fasta_lint.py"""
+import io
+import pytest
+from sequence_attributes.sequence_formats.fasta_lint import lint_fasta, check_fasta, has_errors
+
+
+def _write(tmp_path, content):
+    path = tmp_path / "input.fa"
+    path.write_bytes(content)
+    return str(path)
+
+
+# testing that every issue type is found with its line number
+def test_lint_fasta(tmp_path):
+    infile = _write(tmp_path, b"ACGT\n>a desc\r\nACGTAC\r\nAC\r\n>b\n>a\nACGX\nACGTT\nAC\n>c\nAC\n\nGTACGT\n")
+    report = lint_fasta(infile)
+    found = {(issue.line, issue.code) for issue in report.issues}
+    assert found == {(1, "sequence_before_header"), (2, "windows_line_ending"), (5, "empty_record"),
+                     (6, "duplicate_id"), (7, "illegal_character"), (8, "mixed_line_width"),
+                     (12, "blank_line"), (13, "mixed_line_width")}
+    assert report.counts["windows_line_ending"] == 3
+    assert (report.records, has_errors(report)) == (4, True)
+    assert not lint_fasta(infile, alphabet=None).counts.get("illegal_character")
+
+
+# testing the normalized copy: LF endings, rewrapped, duplicates and empty records dropped, repairs
+def test_lint_fasta_normalize(tmp_path):
+    infile = _write(tmp_path, b">a desc\r\nACGTAC\r\nAC\r\n>b\n>a\nACGT\n>c\nAC\n\nGXACG T\n")
+    outfile = io.StringIO()
+    lint_fasta(infile, fasta_outfile=outfile, line_width=5)
+    assert outfile.getvalue() == ">a desc\nACGTA\nCAC\n>c\nACGNA\nCGT\n"
+
+
+# testing the pre-flight check: warnings pass, errors raise
+def test_check_fasta(tmp_path, capsys):
+    report = check_fasta(_write(tmp_path, b">a\r\nACGT\r\n>b\r\nacgn\r\n"))
+    assert report.records == 2
+    assert "windows_line_ending" in capsys.readouterr().err
+    with pytest.raises(ValueError, match="duplicate_id"):
+        check_fasta(_write(tmp_path, b">a\nACGT\n>a\nACGT\n"))
+
+
+
+# testing the upper-case ACGT alphabet of main.py's pre-flight check
+def test_lint_fasta_acgt(tmp_path):
+    infile = _write(tmp_path, b">a\nACGTN\n>b\nacgt\n")
+    report = lint_fasta(infile, alphabet="acgt")
+    assert [(issue.line, issue.code) for issue in report.issues] == [(2, "illegal_character"), (4, "illegal_character")]
+    assert not lint_fasta(infile, alphabet="dna").counts.get("illegal_character")
+    outfile = io.StringIO()
+    lint_fasta(infile, alphabet="acgt", fasta_outfile=outfile)
+    assert outfile.getvalue() == ">a\nACGTN\n>b\nACGT\n"
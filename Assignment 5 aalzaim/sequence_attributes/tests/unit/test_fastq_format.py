@@ -0,0 +1,58 @@
+"""Test suite for fastq_format.py"""
+import gzip
+import io
+import pytest
+from sequence_attributes.sequence_formats.fastq_format import (iter_fastq_batches, iter_fastq_records,
+                                                               read_statistics, FastqProfile, fastq_statistics)
+
+RECORDS = [("read1 lane=1", "ACGTN", "IIII#"), ("read2", "GGCC", "5555"), ("read3", "", "")]
+FASTQ = "".join(f"@{header}\n{sequence}\n+\n{quality}\n" for header, sequence, quality in RECORDS)
+
+
+# testing that plain and gzip-compressed (CRLF) files stream the same records across batches
+def test_iter_fastq_records(tmp_path):
+    plain, compressed = tmp_path / "reads.fq", tmp_path / "reads.fq.gz"
+    plain.write_text(FASTQ)
+    with gzip.open(compressed, "wt", newline="") as file:
+        file.write(FASTQ.replace("\n", "\r\n"))
+    assert list(iter_fastq_records(str(plain))) == RECORDS
+    assert list(iter_fastq_records(str(compressed), batch_size=2)) == RECORDS
+    assert [len(batch.headers) for batch in iter_fastq_batches(str(plain), batch_size=2)] == [2, 1]
+
+
+# testing that malformed records raise a ValueError naming the line
+@pytest.mark.parametrize("text, message", [("@r1\nACGT\n+\nIII\n", "lengths differ at line 1"),
+                                           ("@r1\nACGT\n+\nIIII\nr2\nAC\n+\nII\n", "line 5"),
+                                           ("@r1\nACGT\n+\n", "truncated record at line 1")])
+def test_malformed_fastq(tmp_path, text, message):
+    infile = tmp_path / "bad.fq"
+    infile.write_text(text)
+    with pytest.raises(ValueError, match=message):
+        list(iter_fastq_records(str(infile)))
+
+
+# testing per-read statistics, the per-position profile and the FASTA output
+def test_fastq_statistics(tmp_path):
+    infile = tmp_path / "reads.fq"
+    infile.write_text(FASTQ)
+    stats = read_statistics(next(iter_fastq_batches(str(infile))))
+    assert stats.ids == ["read1", "read2", "read3"]
+    assert stats.gc.tolist() == [40.0, 100.0, 0.0]
+    assert stats.mean_quality.tolist() == [(4 * 40 + 2) / 5, 20.0, 0.0]
+    assert stats.composition.tolist()[0] == [1, 1, 1, 1]
+
+    read_outfile, fasta_outfile = io.StringIO(), io.StringIO()
+    profile = fastq_statistics(str(infile), max_positions=4, read_outfile=read_outfile, fasta_outfile=fasta_outfile)
+    summary = profile.summary()
+    assert (summary.reads, summary.bases, summary.min_length, summary.max_length) == (3, 9, 0, 5)
+    assert summary.gc == round(100 * 6 / 9, 2) and summary.q30_fraction == round(4 / 9, 4)
+    rows = profile.position_rows()
+    assert [row["position"] for row in rows] == [1, 2, 3, "4+"]
+    assert rows[0]["reads"] == 2 and rows[0]["median"] == 20 and rows[0]["q3"] == 40
+    assert rows[3]["reads"] == 2 and rows[3]["N"] == round(100 / 3, 2)  # 2 reads, 3 bases from position 4 on
+    assert read_outfile.getvalue().splitlines()[1] == "read1\t5\t40.00\t32.40\t1\t1\t1\t1"
+    assert fasta_outfile.getvalue() == ">read1 lane=1\nACGTN\n>read2\nGGCC\n"
+
+    with pytest.raises(ValueError):
+        fastq_statistics(str(infile), phred_offset=64)
+    assert FastqProfile(4).merge(profile).merge(profile).summary().reads == 6
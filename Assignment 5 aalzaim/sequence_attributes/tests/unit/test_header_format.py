@@ -0,0 +1,55 @@
+"""Test suite for header_format.py"""
+import pytest
+from sequence_attributes.sequence_formats.header_format import (FastaHeader, parse_header, parse_ccds_header,
+                                                                build_header_index, read_indexed_records)
+from sequence_attributes.sequence_formats.fasta_format import iter_fasta_records
+
+
+# testing the CCDS header convention
+def test_parse_ccds_header():
+    assert parse_header("CCDS10.1|Hs110|chr1") == FastaHeader(
+        convention="ccds", id="CCDS10.1", chromosome="1", accession=None, chain=None, record_type=None,
+        description=None)
+    assert parse_ccds_header("ID1|chr1").id == "ID1"
+
+
+# testing the NCBI gi and accession header conventions
+@pytest.mark.parametrize("header, record_id, accession, chromosome", [
+    ("gi|568815597|ref|NC_000001.11| Homo sapiens chromosome 1, GRCh38.p2 Primary Assembly",
+     "568815597", "NC_000001.11", "1"),
+    ("NM_000546.6 Homo sapiens tumor protein p53 (TP53), transcript variant 1, mRNA",
+     "NM_000546.6", "NM_000546.6", None),
+    ("CM000686.2 Homo sapiens chromosome Y, GRCh38 reference primary assembly", "CM000686.2", "CM000686.2", "Y"),
+])
+def test_parse_ncbi_header(header, record_id, accession, chromosome):
+    parsed = parse_header(header)
+    assert (parsed.convention, parsed.id, parsed.accession, parsed.chromosome) == (
+        "ncbi", record_id, accession, chromosome)
+
+
+# testing the PDB secondary structure and seqres header conventions
+def test_parse_pdb_header():
+    assert parse_header("101M:A:sequence")[:6] == ("pdb", "101M", None, None, "A", "sequence")
+    assert parse_header("101M:A:secstr").record_type == "secstr"
+    seqres = parse_header("101m_A mol:protein length:154  MYOGLOBIN")
+    assert (seqres.id, seqres.chain, seqres.record_type, seqres.description) == ("101M", "A", "protein", "MYOGLOBIN")
+
+
+# testing the generic fallback and an unknown convention
+def test_parse_generic_header():
+    assert parse_header("seq1 some description")[:2] == ("generic", "seq1")
+    with pytest.raises(ValueError):
+        parse_header("seq1", convention="genbank")
+
+
+# testing that filtering the index by field and reading by offset returns the matching records
+def test_build_header_index(tmp_path):
+    fasta_path = tmp_path / "mixed.fasta"
+    fasta_path.write_text(">101M:A:sequence\nMVLSEG\n>101M:A:secstr\n  HHHH\n>102L:A:sequence\nMNIFE\nMLRID\n")
+
+    index_df = build_header_index(str(fasta_path))
+    assert index_df['sequence_length'].tolist() == [6, 4, 10]  # stripped, as by iter_fasta_records
+    proteins = index_df[index_df['record_type'] == 'sequence']
+    records = list(read_indexed_records(str(fasta_path), zip(proteins['offset'], proteins['end'])))
+    assert records == [record for record in iter_fasta_records(str(fasta_path)) if record[0].endswith('sequence')]
+    assert index_df.loc['102L', 'chain'] == 'A'
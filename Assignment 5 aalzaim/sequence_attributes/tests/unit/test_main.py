@@ -0,0 +1,32 @@
+"""Test suite for main.py"""
+import pandas as pd
+from sequence_attributes.main import SUMMARY_COLUMNS, select_proline_summary, write_proline_summary
+
+
+def _rows(n=30):
+    return [{"proline_comp": float(i % 7), "protein_sequence_length": i,
+             "additional_gene_info": {"ccds_id": f"CCDS{i}.1", "refseq_gene_id": 1000 + i, "biotype": "protein_coding",
+                                      "ensembl_gene_id": f"ENSG{i:05d}", "description": f"desc {i}"}}
+            for i in range(n)]
+
+
+def _sorted_summary(rows):
+    """The summary as main.py wrote it before selecting rows: the whole table sorted."""
+    df = pd.DataFrame(rows)
+    df = pd.concat([df.drop('additional_gene_info', axis=1), df['additional_gene_info'].apply(pd.Series)], axis=1)
+    df = df.sort_values(by=['proline_comp', 'protein_sequence_length'], ascending=[False, False])[SUMMARY_COLUMNS]
+    return pd.concat([df.head(10), df.tail(10)])
+
+
+# testing that a missing gene ID in a row outside the top and bottom 10 still makes the IDs floats, as before
+def test_proline_summary_keeps_whole_table_types(tmp_path):
+    rows = _rows()
+    rows[10]["additional_gene_info"]["refseq_gene_id"] = float("nan")  # proline 3, length 10: not selected
+    selector, float_columns = select_proline_summary([rows[:15], rows[15:]])
+    assert rows[10] not in selector.head(10) + selector.tail(10)
+    assert float_columns == ["refseq_gene_id", "proline_comp"]
+    write_proline_summary(selector, float_columns, str(tmp_path / "out.xlsx"))
+    expected = tmp_path / "expected.tsv"
+    _sorted_summary(rows).to_csv(expected, sep='\t', index=False)
+    assert (tmp_path / "out.tsv").read_text() == expected.read_text()
+    assert "\t1029.0\t" in expected.read_text()
@@ -0,0 +1,43 @@
+"""Test suite for minhash_utils.py"""
+import io
+import random
+import numpy as np
+from sequence_attributes.utils.minhash_utils import (EMPTY_HASH, minhash_signature, build_signatures, choose_bands,
+                                                     lsh_candidate_pairs, all_vs_all_similarity,
+                                                     write_similarity_edges, save_signatures, load_signatures)
+
+
+def _records():
+    rng = random.Random(7)
+    base = [''.join(rng.choices("ACGT", k=600)) for _ in range(20)]
+    variant = base[0][:550] + ''.join(rng.choices("ACGT", k=50))  # shares most k-mers with base[0]
+    return [(f"CCDS{i}.1|Hs|chr1", sequence) for i, sequence in enumerate(base)] + \
+        [("CCDS0.2|Hs|chr1", variant), ("CCDS99.1|Hs|chr1", "NNNN")]
+
+
+# testing that signatures estimate Jaccard similarity and are identical with worker processes
+def test_signatures():
+    ids, signatures = build_signatures(_records(), k=15, num_hashes=64)
+    assert ids[0] == "CCDS0.1" and signatures.shape == (22, 64)
+    assert (signatures[21] == EMPTY_HASH).all()
+    assert (minhash_signature(_records()[3][1], k=15, num_hashes=64) == signatures[3]).all()
+    _, parallel = build_signatures(_records(), k=15, num_hashes=64, workers=2, chunk_size=5)
+    assert (parallel == signatures).all()
+
+
+# testing LSH candidates and the similarity edge list against the expected near-duplicate pair
+def test_all_vs_all_similarity(tmp_path):
+    ids, signatures = build_signatures(_records(), k=15, num_hashes=64)
+    assert choose_bands(64, 0.5) == 16
+    assert lsh_candidate_pairs(signatures, 16).tolist() == [[0, 20]]
+    edges = all_vs_all_similarity(signatures, threshold=0.5)
+    assert (edges.first.tolist(), edges.second.tolist()) == ([0], [20])
+    assert abs(edges.jaccard[0] - 536 / 636) < 0.15  # 536 shared of 636 distinct 15-mers
+
+    outfile = io.StringIO()
+    write_similarity_edges(edges, ids, outfile)
+    assert outfile.getvalue().splitlines()[1].startswith("CCDS0.1\tCCDS0.2\t")
+
+    save_signatures(str(tmp_path / "signatures.npz"), ids, signatures, 15, False, 0)
+    loaded_ids, loaded, params = load_signatures(str(tmp_path / "signatures.npz"))
+    assert loaded_ids == ids and np.array_equal(loaded, signatures) and params == (15, False, 0)
@@ -0,0 +1,62 @@
+"""Test suite for motif_utils.py"""
+import io
+import pytest
+from sequence_attributes.utils.motif_utils import (MotifHit, AhoCorasick, expand_iupac, resolve_patterns,
+                                                   search_records, write_motif_hits, SuffixArrayIndex)
+
+RECORDS = [("CCDS1.1|Hs|chr1", "ttGAATTCaaGCCACCATGGcAATAAA"),
+           ("CCDS2.1|Hs|chr1", "TTTATTNAATAAATTTATT")]
+
+
+# testing IUPAC expansion and pattern arguments
+def test_expand_iupac():
+    assert expand_iupac("ARN") == [a + b + c for a in "A" for b in "AG" for c in "ACGT"]
+    assert expand_iupac("acu") == ["ACT"]
+    with pytest.raises(ValueError):
+        expand_iupac("ACX")
+    with pytest.raises(ValueError):
+        expand_iupac("N" * 7, max_expansions=4096)
+    assert resolve_patterns(["EcoRI", "site=ggn", "tata"]) == {"EcoRI": "GAATTC", "site": "GGN", "tata": "TATA"}
+
+
+# testing overlapping hits on both strands; palindromes are reported once, on '+'
+def test_search_records():
+    hits = list(search_records(RECORDS, resolve_patterns(["EcoRI", "kozak", "polya_signal"])))
+    assert MotifHit("CCDS1.1", "EcoRI", 2, "+", "GAATTC") in hits
+    assert MotifHit("CCDS1.1", "kozak", 10, "+", "GCCACCATGG") in hits
+    assert MotifHit("CCDS1.1", "polya_signal", 21, "+", "AATAAA") in hits
+    assert len([hit for hit in hits if hit.pattern == "EcoRI"]) == 1
+    # TTTATT is the reverse complement of AATAAA; N breaks the match at position 6
+    assert [hit.position for hit in hits if hit.record == "CCDS2.1" and hit.strand == "-"] == [0, 13]
+    assert [hit.position for hit in hits if hit.record == "CCDS2.1" and hit.strand == "+"] == [7]
+    assert list(AhoCorasick({"aa": "AA"}, strands="+").search("AAAA")) == [("aa", 0, "+", 2), ("aa", 1, "+", 2),
+                                                                          ("aa", 2, "+", 2)]
+
+    outfile = io.StringIO()
+    assert write_motif_hits(hits, outfile) == len(hits)
+    assert outfile.getvalue().splitlines()[0] == "record\tpattern\tposition\tstrand\tmatch"
+
+
+# testing that a saved and memory-mapped suffix array finds the same hits
+def test_suffix_array_index(tmp_path):
+    patterns = resolve_patterns(["EcoRI", "kozak", "polya_signal", "ttn"])
+    expected = sorted((hit.record, hit.position, hit.pattern, hit.strand)
+                      for hit in search_records(RECORDS, patterns))
+    SuffixArrayIndex.build(RECORDS).save(str(tmp_path))
+    hits = SuffixArrayIndex.load(str(tmp_path)).search(patterns)
+    assert sorted((hit.record, hit.position, hit.pattern, hit.strand) for hit in hits) == expected
+    assert [(hit.record, hit.position) for hit in hits] == sorted((hit.record, hit.position) for hit in hits)
+
+
+# testing that an index is stale once its FASTA file changes
+def test_suffix_array_index_is_fresh(tmp_path):
+    fasta = tmp_path / "records.fna"
+    fasta.write_text(">a\nGAATTC\n")
+    index_dir = str(tmp_path / "index")
+    assert not SuffixArrayIndex.is_fresh(index_dir, str(fasta)), "A missing index is not fresh"
+    SuffixArrayIndex.build([("a", "GAATTC")]).save(index_dir, source=str(fasta))
+    assert SuffixArrayIndex.is_fresh(index_dir, str(fasta))
+    fasta.write_text(">a\nGAATTCGAATTC\n")
+    assert not SuffixArrayIndex.is_fresh(index_dir, str(fasta)), "A changed FASTA file should make the index stale"
+    SuffixArrayIndex.build([("a", "GAATTC")]).save(index_dir)
+    assert not SuffixArrayIndex.is_fresh(index_dir, str(fasta)), "An index saved without a source is never fresh"
@@ -0,0 +1,50 @@
+"""Test suite for orf_utils.py"""
+import pytest
+from sequence_attributes.utils.orf_utils import find_orfs, find_orfs_batch, return_genetic_code
+from sequence_attributes.utils.seq_attribute_utils import return_standard_genetic_code, pack_sequences
+
+
+# testing the return_genetic_code function
+def test_return_genetic_code():
+    assert return_genetic_code(1) == return_standard_genetic_code()
+    mitochondrial = return_genetic_code(2)
+    assert mitochondrial["UGA"] == "W"
+    assert mitochondrial["AGA"] is None
+    with pytest.raises(ValueError):
+        return_genetic_code(99)
+
+
+# testing ORFs on both strands
+def test_find_orfs_six_frames():
+    orfs = find_orfs("ATGAAATTTTAGCCCATGGGGTAA", min_protein_length=1)
+    assert [(orf.strand, orf.frame, orf.start, orf.end, orf.protein) for orf in orfs] == [
+        ("+", 1, 0, 12, "MKF"), ("-", -2, 8, 17, "MG"), ("+", 1, 15, 24, "MG")]
+    assert all(orf.complete for orf in orfs)
+
+
+# testing that nested starts report only the longest ORF and short ORFs are filtered out
+def test_find_orfs_longest_and_min_length():
+    orfs = find_orfs("CATGATGCCCTGA", min_protein_length=1)
+    assert [(orf.start, orf.protein) for orf in orfs] == [(1, "MMP")]
+    assert find_orfs("CATGATGCCCTGA", min_protein_length=4) == []
+
+
+# testing partial ORFs that run off the end of the sequence
+def test_find_orfs_partial():
+    assert find_orfs("ATGCCCGGGA", min_protein_length=1) == []
+    orfs = find_orfs("ATGCCCGGGA", min_protein_length=1, include_partial=True)
+    assert [(orf.start, orf.end, orf.protein, orf.complete) for orf in orfs] == [(0, 9, "MPG", False)]
+
+
+# testing an alternative genetic code, where TGA is read as tryptophan
+def test_find_orfs_alternative_code():
+    sequence = "ATGTGAAAATAA"
+    assert find_orfs(sequence, min_protein_length=1)[0].protein == "M"
+    assert find_orfs(sequence, return_genetic_code(4), min_protein_length=1)[0].protein == "MWK"
+
+
+# testing that ORFs never cross record boundaries in a packed batch
+def test_find_orfs_batch_records():
+    sequences = ["ATGCCC", "TAAATGTAG"]
+    orfs = find_orfs_batch(pack_sequences(sequences), min_protein_length=1)
+    assert [(orf.record, orf.start, orf.protein) for orf in orfs] == [(1, 3, "M")]
@@ -0,0 +1,42 @@
+"""Test suite for the lazy imports of the sequence_attributes package"""
+import os
+import subprocess
+import sys
+import pytest
+import sequence_attributes
+
+IMPORT_BUDGET_SECONDS = 0.5  # numpy dominates; pandas alone would take most of this
+PACKAGE_PARENT = os.path.dirname(os.path.dirname(os.path.abspath(sequence_attributes.__file__)))
+
+
+# runs a snippet in a fresh interpreter, where nothing has been imported yet
+def run_fresh(code):
+    result = subprocess.run([sys.executable, "-c", code], cwd=PACKAGE_PARENT, capture_output=True,
+                            text=True, check=True, env=dict(os.environ, PYTHONPATH=PACKAGE_PARENT))
+    return result.stdout.split()
+
+
+# testing that the pure-sequence functions do not pull in pandas
+def test_sequence_functions_do_not_import_pandas():
+    output = run_fresh("import sys\n"
+                       "from sequence_attributes import gc_content, protein_translation, find_orfs\n"
+                       "print('pandas' in sys.modules, gc_content('GGCA'))")
+    assert output == ["False", "75.0"]
+
+
+# testing that importing the package and a sequence function stays within the time budget
+def test_import_time_budget():
+    output = run_fresh("import time\n"
+                       "started = time.perf_counter()\n"
+                       "from sequence_attributes import gc_content\n"
+                       "print(time.perf_counter() - started)")
+    assert float(output[0]) < IMPORT_BUDGET_SECONDS
+
+
+# testing that every exported name resolves, including star imports
+def test_exports_resolve():
+    namespace = {}
+    exec("from sequence_attributes import *", namespace)
+    assert set(sequence_attributes.__all__) <= set(namespace)
+    with pytest.raises(AttributeError):
+        sequence_attributes.not_a_function
@@ -0,0 +1,79 @@
+"""Test suite for packed_format.py"""
+import pytest
+from sequence_attributes.sequence_formats.packed_format import PackedSequenceStore
+from sequence_attributes.utils.seq_attribute_utils import (gc_content, gc_content_batch, extract_kmers,
+                                                           protein_translation, protein_translation_batch,
+                                                           return_standard_genetic_code)
+
+HEADERS = ["CCDS1.1|chr1", "CCDS2.1|chr2", "CCDS3.1|chr3"]
+SEQUENCES = ["ATGGCCNNNNacgtTAA", "", "GGGRYCCA"]
+
+
+# testing that packed records and slices round trip exactly, including case and ambiguity codes
+def test_packed_store_round_trip():
+    store = PackedSequenceStore.from_sequences(HEADERS, SEQUENCES)
+    assert len(store) == 3
+    assert [store.sequence(i) for i in range(3)] == SEQUENCES
+    assert store.sequence(0, 5, 13) == "CNNNNacg"
+    assert list(store.lengths) == [17, 0, 8]
+
+
+# testing that records can still be appended after the store has been read
+def test_packed_store_append_after_read():
+    store = PackedSequenceStore.from_sequences(HEADERS[:1], SEQUENCES[:1])
+    assert store.sequence(0) == SEQUENCES[0]
+    store.append(HEADERS[2], SEQUENCES[2])
+    assert store.sequence(1) == SEQUENCES[2]
+
+
+# testing slicing outside a record
+def test_packed_store_out_of_range():
+    store = PackedSequenceStore.from_sequences(HEADERS, SEQUENCES)
+    with pytest.raises(IndexError):
+        store.codes(2, 0, 9)
+
+
+# testing IUPAC-aware reverse complement
+def test_packed_store_reverse_complement():
+    store = PackedSequenceStore.from_sequences(HEADERS, SEQUENCES)
+    assert store.reverse_complement(2).tobytes() == b"TGGRYCCC"
+    assert store.reverse_complement(0, 8, 14).tobytes() == b"acgtNN"
+
+
+# testing 2-bit k-mer codes and the ambiguity mask
+def test_packed_store_kmer_codes():
+    store = PackedSequenceStore.from_sequences(HEADERS, SEQUENCES)
+    kmers, valid = store.kmer_codes(2, 3)
+    assert len(kmers) == len(extract_kmers(SEQUENCES[2], 3))
+    assert list(valid) == [True, False, False, False, False, True]
+    assert int(kmers[0]) == 0b101010  # GGG
+
+
+# testing that packed batches feed the batch attribute functions directly
+def test_packed_store_batches():
+    store = PackedSequenceStore.from_sequences(HEADERS, SEQUENCES)
+    genetic_code = return_standard_genetic_code()
+    gc_values, proteins = [], []
+    for _, batch in store.batches(max_bases=10):
+        gc_values.extend(gc_content_batch(batch, round_to=2))
+        proteins.extend(protein_translation_batch(batch, genetic_code))
+    assert gc_values == [gc_content(seq) for seq in SEQUENCES]
+    assert proteins == [protein_translation(seq, genetic_code) for seq in SEQUENCES]
+
+
+# testing loading a store from a FASTA file
+def test_packed_store_from_fasta(tmp_path):
+    fasta = tmp_path / "test.fasta"
+    fasta.write_text(">CCDS1.1|chr1\nATGGCC\nNNNNacgt\n>CCDS2.1|chr2\nGGG\n", encoding="utf-8")
+    store = PackedSequenceStore.from_fasta(str(fasta))
+    assert store.headers == ["CCDS1.1|chr1", "CCDS2.1|chr2"]
+    assert store.sequence(0) == "ATGGCCNNNNacgt"
+
+
+# testing that records without ambiguity symbols or soft-masking add no mask runs, so nbytes stays near 2 bits per base
+def test_packed_store_nbytes_clean_records():
+    store = PackedSequenceStore.from_sequences([str(i) for i in range(100)], ["ACGT" * 25] * 100)
+    assert store.nbytes == 100 * (25 + 2 * 8)  # packed bases plus the start and length of each record
+    store.append("masked", "ACNNgt")
+    assert store.sequence(100) == "ACNNgt"
+    assert store.nbytes > 100 * (25 + 2 * 8) + 2 + 2 * 8
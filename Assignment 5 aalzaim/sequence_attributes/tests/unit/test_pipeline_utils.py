@@ -0,0 +1,75 @@
+"""Test suite for pipeline_utils.py"""
+import time
+import pandas as pd
+import pytest
+from sequence_attributes.sequence_formats.header_format import parse_ccds_header
+from sequence_attributes.utils import seq_attribute_utils
+from sequence_attributes.utils.pipeline_utils import run_pipeline, compute_fasta_attributes_pipelined
+from sequence_attributes.utils.seq_attribute_utils import (get_additional_sequence_attributes,
+                                                           return_standard_genetic_code)
+
+
+# testing that chunks reach the writer stage in input order
+def test_run_pipeline_order():
+    consumed = []
+    queues = run_pipeline(range(10), lambda chunk: [value * 2 for value in chunk], consumed.extend,
+                          chunk_size=3, queue_size=1)
+    assert consumed == [value * 2 for value in range(10)]
+    assert [pipeline_queue.items for pipeline_queue in queues] == [4, 4]  # the end marker is not counted
+    assert queues[0].report().startswith("read queue: 4 chunks")
+
+
+# testing that a slow writer shows up as backpressure on the write queue
+def test_run_pipeline_backpressure():
+    queues = run_pipeline(range(20), lambda chunk: chunk, lambda handle: time.sleep(0.01),
+                          chunk_size=1, queue_size=1)
+    assert queues[1].put_stalls > 0
+    assert queues[1].max_depth == 1
+
+
+# testing that an exception in a stage is re-raised
+def test_run_pipeline_error():
+    def consume(handle):
+        raise RuntimeError("writer failed")
+
+    with pytest.raises(RuntimeError):
+        run_pipeline(range(100), lambda chunk: chunk, consume, chunk_size=1, queue_size=1)
+
+
+# testing that the pipelined attribute calculation matches the sequential one
+@pytest.mark.parametrize("workers", [0, 2])
+def test_compute_fasta_attributes_pipelined(tmp_path, workers):
+    fasta = tmp_path / "test.fasta"
+    records = [("ID1|chr1", "ATGCCCTGA"), ("ID2|chr2", "ATGGGGCCCAAATAG"), ("ID1|chr1", "ATGTAA")]
+    fasta.write_text("".join(f">{header}\n{sequence}\n" for header, sequence in records))
+    attribute_df = pd.DataFrame({"ccds_id": ["ID1", "ID2"], "gene": ["Gene1", "Gene2"]})
+    genetic_code = return_standard_genetic_code()
+
+    rows, queues = compute_fasta_attributes_pipelined(str(fasta), attribute_df, genetic_code,
+                                                      workers=workers, chunk_size=2, queue_size=1)
+    expected = [get_additional_sequence_attributes(header, sequence, attribute_df, genetic_code)._asdict()
+                for header, sequence in records]
+    assert rows == expected
+    assert len(queues) == 2
+
+
+
+# testing that headers parsed by the caller are not parsed again
+def test_compute_fasta_attributes_pipelined_parsed_headers(tmp_path, monkeypatch):
+    fasta = tmp_path / "test.fasta"
+    fasta.write_text(">ID1|chr1\nATGCCCTGA\n>ID2|chr2\nATGTAA\n")
+    attribute_df = pd.DataFrame({"ccds_id": ["ID1", "ID2"], "gene": ["Gene1", "Gene2"]})
+    genetic_code = return_standard_genetic_code()
+    parsed_headers = {header: parse_ccds_header(header) for header in ("ID1|chr1", "ID2|chr2")}
+    expected = [get_additional_sequence_attributes(header, sequence, attribute_df, genetic_code)._asdict()
+                for header, sequence in (("ID1|chr1", "ATGCCCTGA"), ("ID2|chr2", "ATGTAA"))]
+
+    def fail(header):
+        raise AssertionError(f"{header} was parsed again")
+
+    monkeypatch.setattr(seq_attribute_utils, "parse_ccds_header", fail)
+    rows, _ = compute_fasta_attributes_pipelined(str(fasta), attribute_df, genetic_code, parsed_headers=parsed_headers)
+    assert rows == expected
+    row = get_additional_sequence_attributes("ID2|chr2", "ATGTAA", attribute_df, genetic_code,
+                                             parsed_header=parsed_headers["ID2|chr2"])
+    assert row._asdict() == expected[1]
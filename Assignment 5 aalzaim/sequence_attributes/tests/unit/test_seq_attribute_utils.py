@@ -1,5 +1,6 @@
 """Test Suite for seq_attribute_utils.py"""
 import pytest
+import numpy as np
 import pandas as pd
 from sequence_attributes import *
 
@@ -16,6 +17,13 @@ def test_calculate_amino_acid_content_empty_sequence():
     assert calculate_amino_acid_content("", "P") == 0.0
 
 
+# testing that only single-letter amino acid codes are accepted
+def test_calculate_amino_acid_content_code_length():
+    for amino_acid in ("PA", ""):
+        with pytest.raises(ValueError):
+            calculate_amino_acid_content("PPAP", amino_acid)
+
+
 # testing the return_standard_genetic_code function
 def test_return_standard_genetic_code():
     genetic_code = return_standard_genetic_code()
@@ -155,3 +163,62 @@ def test_protein_translation_incomplete_codon():
     result = protein_translation(dna_sequence, genetic_code)
     assert result == "MA", "Incomplete codon at the end should be ignored"
 
+
+# testing the get_amino_acid_profile function against the single residue calculation
+def test_get_amino_acid_profile():
+    protein_sequence = "MAPPPKWa"
+    profile = get_amino_acid_profile(protein_sequence)
+    assert len(profile) == 20
+    for amino_acid, value in profile.items():
+        assert value == calculate_amino_acid_content(protein_sequence, amino_acid)
+
+
+def test_get_amino_acid_profile_empty_sequence():
+    assert set(get_amino_acid_profile("").values()) == {0.0}
+
+
+# testing the calculate_molecular_weight function
+def test_calculate_molecular_weight():
+    # glycylglycine: two glycine residues plus one water
+    assert calculate_molecular_weight("GG") == pytest.approx(132.12, 0.01)
+    assert calculate_molecular_weight("") == 0.0
+
+
+# testing the get_amino_acid_profile_matrix function against the single protein functions
+def test_get_amino_acid_profile_matrix():
+    proteins = ["MAPPPKW", "", "GG", "MXYZ"]
+    profiles, weights = get_amino_acid_profile_matrix(proteins)
+    assert profiles.shape == (4, 20)
+    for row, protein in enumerate(proteins):
+        expected = list(get_amino_acid_profile(protein).values())
+        assert [round(value, 2) for value in profiles[row]] == expected
+        assert round(weights[row], 2) == calculate_molecular_weight(protein)
+
+
+# testing the pack_sequences function
+def test_pack_sequences():
+    buffer, offsets = pack_sequences(["ATG", "", "GC"])
+    assert buffer.tobytes() == b"ATGGC"
+    assert list(offsets) == [0, 3, 3, 5]
+
+
+# testing that the batch functions agree with the single sequence functions, for lists and packed input
+def test_batch_functions_match_single_sequence_functions():
+    sequences = ["ATGGCC", "", "A", "ATGTAAGGG", "GCGCATATCG", "ATGNCCA"]
+    genetic_code = return_standard_genetic_code()
+    for batch in (sequences, pack_sequences(sequences)):
+        assert list(gc_content_batch(batch, round_to=2)) == [gc_content(seq) for seq in sequences]
+        assert [dict(zip("ATCG", row)) for row in get_sequence_composition_batch(batch)] == \
+            [get_sequence_composition(seq) for seq in sequences]
+        assert list(protein_translation_batch(batch, genetic_code)) == \
+            [protein_translation(seq, genetic_code) for seq in sequences]
+        tm_values = get_tm_from_dna_sequence_batch(batch, round_to=2)
+        assert list(tm_values[:5]) == [get_tm_from_dna_sequence(seq) for seq in sequences[:5]]
+        assert np.isnan(tm_values[5]), "N has no nearest-neighbor parameters"
+
+
+# testing calculate_amino_acid_content_batch
+def test_calculate_amino_acid_content_batch():
+    proteins = ["APPP", "", "pA", "MK"]
+    result = calculate_amino_acid_content_batch(proteins, "P", round_to=2)
+    assert list(result) == [75.0, 0.0, 50.0, 0.0]
@@ -0,0 +1,62 @@
+"""Test suite for shard_utils.py"""
+import pytest
+from sequence_attributes.utils.shard_utils import (prepare_shards, run_shard, incomplete_shards, load_shard_rows,
+                                                   iter_shard_rows)
+
+RECORDS = [(f"CCDS{i}.1|chr{i}", "ATG" + "GC" * i + "TAA") for i in range(10)]
+
+
+@pytest.fixture
+def fasta(tmp_path):
+    fasta_path = tmp_path / "test.fasta"
+    fasta_path.write_text("".join(f">{header}\n{sequence}\n" for header, sequence in RECORDS))
+    return str(fasta_path)
+
+
+def compute_rows(chunk):
+    return [{"header": header, "length": len(sequence)} for header, sequence in chunk]
+
+
+# testing that merged shards give the rows of a single run, in input order
+def test_shards_merge_in_order(fasta, tmp_path):
+    shard_root = str(tmp_path / "shards")
+    ranges = prepare_shards(shard_root, fasta, 3)
+    assert len(ranges) == 3
+    for shard_index in (2, 0, 1):
+        run_shard(shard_root, shard_index, compute_rows, checkpoint_every=2)
+    assert incomplete_shards(shard_root) == []
+    assert load_shard_rows(shard_root) == compute_rows(RECORDS)
+    shard_rows = [list(rows) for rows in iter_shard_rows(shard_root)]
+    assert len(shard_rows) == 3 and sum(shard_rows, []) == compute_rows(RECORDS)
+
+
+# testing that an interrupted shard resumes after its last checkpoint
+def test_shard_resume(fasta, tmp_path):
+    shard_root = str(tmp_path / "shards")
+    prepare_shards(shard_root, fasta, 1)
+    computed = []
+
+    def failing_compute_rows(chunk):
+        if len(computed) == 4:
+            raise RuntimeError("job killed")
+        computed.extend(chunk)
+        return compute_rows(chunk)
+
+    with pytest.raises(RuntimeError):
+        run_shard(shard_root, 0, failing_compute_rows, checkpoint_every=2)
+    assert incomplete_shards(shard_root) == [0]
+    with pytest.raises(ValueError):
+        load_shard_rows(shard_root)
+
+    assert run_shard(shard_root, 0, compute_rows, checkpoint_every=2) == 6  # only the unfinished records
+    assert run_shard(shard_root, 0, compute_rows, checkpoint_every=2) == 0  # finished shards are skipped
+    assert load_shard_rows(shard_root) == compute_rows(RECORDS)
+
+
+# testing that a shard directory cannot be reused with a different shard count
+def test_prepare_shards_mismatch(fasta, tmp_path):
+    shard_root = str(tmp_path / "shards")
+    prepare_shards(shard_root, fasta, 2)
+    assert prepare_shards(shard_root, fasta, 2)
+    with pytest.raises(ValueError):
+        prepare_shards(shard_root, fasta, 4)
@@ -0,0 +1,60 @@
+"""Test suite for sketch_utils.py"""
+from collections import Counter
+import numpy as np
+import pytest
+from sequence_attributes.utils.sketch_utils import KmerSketch, HyperLogLog, kmer_codes, encode_kmer, _splitmix64
+
+SEQUENCES = ["ACGTACGTTTGACCANNACGTACGGGA", "acgtacgtttgacca", "TTTTTTTTTTTTT", "ACG", ""]
+
+
+def _exact_counts(k):
+    counts = Counter()
+    for sequence in SEQUENCES:
+        sequence = sequence.upper()
+        counts.update(sequence[i:i + k] for i in range(len(sequence) - k + 1) if "N" not in sequence[i:i + k])
+    return counts
+
+
+# testing the rolling 2-bit encoding, across windows and for canonical k-mers
+def test_kmer_codes():
+    codes = np.concatenate(list(kmer_codes(SEQUENCES[0], 5, window=4)))
+    assert codes.tolist() == [encode_kmer(SEQUENCES[0][i:i + 5]) for i in range(len(SEQUENCES[0]) - 4)
+                              if "N" not in SEQUENCES[0][i:i + 5]]
+    assert encode_kmer("ACGT") == 0b00011011
+    assert next(kmer_codes("AAAC", 4, canonical=True))[0] == encode_kmer("AAAC")  # AAAC < GTTT
+    assert next(kmer_codes("GTTT", 4, canonical=True))[0] == encode_kmer("AAAC")
+    with pytest.raises(ValueError):
+        encode_kmer("ACNT")
+
+
+# testing that counts are never underestimated and that merged sketches equal a single one
+def test_kmer_sketch(tmp_path):
+    exact = _exact_counts(4)
+    sketch = KmerSketch(4, width=64)
+    first, second = KmerSketch(4, width=64), KmerSketch(4, width=64)
+    for i, sequence in enumerate(SEQUENCES):
+        sketch.add_sequence(sequence)
+        (first if i % 2 else second).add_sequence(sequence)
+    first.merge(second)
+    assert (first.counts.counters == sketch.counts.counters).all()
+
+    kmers = sorted(exact)
+    estimates = sketch.estimate(kmers)
+    assert all(estimate >= exact[kmer] for kmer, estimate in zip(kmers, estimates))
+    assert sketch.counts.total == sum(exact.values())
+    assert abs(sketch.distinct_count() - len(exact)) <= 1
+
+    sketch.save(str(tmp_path / "sketch.npz"))
+    loaded = KmerSketch.load(str(tmp_path / "sketch.npz"))
+    assert (loaded.estimate(kmers) == estimates).all()
+    with pytest.raises(ValueError):
+        sketch.merge(KmerSketch(5, width=64))
+    with pytest.raises(ValueError):
+        sketch.estimate(["ACGT", "ACG", "ACGTA"])
+
+
+# testing the HyperLogLog estimate against its error bound
+def test_hyperloglog():
+    hyperloglog = HyperLogLog(12)
+    hyperloglog.add(_splitmix64(np.arange(200000, dtype=np.uint64)))
+    assert abs(hyperloglog.estimate() / 200000 - 1) < 4 * hyperloglog.relative_error()
@@ -0,0 +1,48 @@
+"""Test suite for strand_utils.py"""
+import pytest
+from sequence_attributes.utils.strand_utils import (check_strand, complement, reverse_complement,
+                                                    reverse_complement_packed, normalize_case, hard_mask,
+                                                    mask_intervals)
+from sequence_attributes.utils.seq_attribute_utils import (pack_sequences, protein_translation,
+                                                           get_sequence_composition, extract_kmers, gc_content,
+                                                           get_tm_from_dna_sequence, compute_sequence_attributes,
+                                                           return_standard_genetic_code)
+
+MINUS_STRAND = "TTACAGGGCAT"  # reverse complement of ATGCCCTGTAA
+
+
+# testing the IUPAC-aware complement and reverse complement
+def test_reverse_complement():
+    assert complement("ACGTRYKMBDHVN") == "TGCAYRMKVHDBN"
+    assert reverse_complement("ATGcrN") == "NygCAT"
+    assert reverse_complement("ACGU") == "ACGT"
+
+
+# testing that packed records are reverse complemented in place and keep their order
+def test_reverse_complement_packed():
+    buffer, offsets = reverse_complement_packed(*pack_sequences(["ATG", "", "GGCA"]))
+    assert buffer.tobytes() == b"CATTGCC"
+    assert offsets.tolist() == [0, 3, 3, 7]
+
+
+# testing case normalization and masking
+def test_case_and_masking():
+    assert normalize_case("acgTN") == "ACGTN"
+    assert normalize_case("ACGt", upper=False) == "acgt"
+    assert hard_mask("ACgtaA") == "ACNNNA"
+    assert mask_intervals("AAAAAAAA", [(1, 3), (6, 20)]) == "ANNAAANN"
+    assert mask_intervals("AAAAAAAA", [(2, 4)], soft=True) == "AAaaAAAA"
+
+
+# testing that the strand flag processes the reverse complement
+def test_strand_flag():
+    genetic_code = return_standard_genetic_code()
+    assert protein_translation(MINUS_STRAND, genetic_code, strand="-") == "MPC"
+    assert get_sequence_composition(MINUS_STRAND, strand="-") == get_sequence_composition("ATGCCCTGTAA")
+    assert extract_kmers(MINUS_STRAND, 3, strand="-")[0] == "ATG"
+    assert gc_content(MINUS_STRAND, strand="-") == gc_content(MINUS_STRAND)
+    assert get_tm_from_dna_sequence(MINUS_STRAND, strand="-") == get_tm_from_dna_sequence("ATGCCCTGTAA")
+    assert (compute_sequence_attributes(MINUS_STRAND, genetic_code, strand="-")
+            == compute_sequence_attributes("ATGCCCTGTAA", genetic_code))
+    with pytest.raises(ValueError):
+        check_strand("minus")
@@ -0,0 +1,45 @@
+"""Test suite for topk_utils.py"""
+import random
+import pandas as pd
+import pytest
+from sequence_attributes.utils.topk_utils import TopKSelector
+
+
+def _rows(n=60, seed=3):
+    rng = random.Random(seed)
+    return [{"id": i, "proline_comp": rng.choice([0.0, 12.5, 33.33, float("nan")]),
+             "protein_sequence_length": rng.choice([1, 6, 10]), "gene": rng.choice("abc")} for i in range(n)]
+
+
+# testing that head and tail match sort_values, including ties, missing values and mixed directions
+@pytest.mark.parametrize("columns, ascending", [(["proline_comp", "protein_sequence_length"], [False, False]),
+                                                (["gene", "proline_comp"], [False, True]),
+                                                (["protein_sequence_length", "gene"], [True, False])])
+def test_matches_sort_values(columns, ascending):
+    expected = pd.DataFrame(_rows()).sort_values(by=columns, ascending=ascending)
+    selector = TopKSelector(10, columns, ascending)
+    selector.add_rows(_rows())
+    assert [row["id"] for row in selector.head()] == expected.head(10)["id"].tolist()
+    assert [row["id"] for row in selector.tail()] == expected.tail(10)["id"].tolist()
+    assert selector.rows_seen == 60
+
+
+# testing that merged shard selectors equal the selector of the whole input, also with fewer rows than k
+def test_merge_shards():
+    columns, ascending = ["proline_comp", "protein_sequence_length"], [False, False]
+    whole = TopKSelector(10, columns, ascending)
+    whole.add_rows(_rows())
+    merged = TopKSelector(10, columns, ascending)
+    for shard, (start, end) in enumerate([(0, 25), (25, 26), (26, 60)]):
+        shard_selector = TopKSelector(10, columns, ascending)
+        for index in range(start, end):
+            shard_selector.add(_rows()[index], (shard, index))
+        merged.merge(shard_selector)
+    assert [row["id"] for row in merged.head()] == [row["id"] for row in whole.head()]
+    assert [row["id"] for row in merged.tail()] == [row["id"] for row in whole.tail()]
+
+    small = TopKSelector(10, ["protein_sequence_length"], False)
+    small.add_rows(_rows(n=3))
+    assert len(small.head()) == len(small.tail()) == 3 and small.tail(2) == small.head()[1:]
+    with pytest.raises(ValueError):
+        merged.merge(TopKSelector(5, columns, ascending))
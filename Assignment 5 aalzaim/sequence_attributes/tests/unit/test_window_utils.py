@@ -0,0 +1,53 @@
+"""Test suite for window_utils.py"""
+import io
+import numpy as np
+import pytest
+from sequence_attributes.utils.window_utils import (gc_content_windows, tm_windows, profile_windows,
+                                                    write_window_profiles)
+from sequence_attributes.utils.seq_attribute_utils import gc_content, get_tm_from_dna_sequence
+
+SEQUENCE = "ATGGCCGCGTATTAGCGCGATCGATGGCCA"
+
+
+# testing that windowed GC content matches gc_content of every window
+def test_gc_content_windows():
+    starts, values = gc_content_windows(SEQUENCE, 7, 2)
+    assert list(starts) == list(range(0, len(SEQUENCE) - 6, 2))
+    assert [round(value, 2) for value in values] == [gc_content(SEQUENCE[s:s + 7]) for s in starts]
+
+
+# testing that windowed Tm matches get_tm_from_dna_sequence of every window
+def test_tm_windows():
+    starts, values = tm_windows(SEQUENCE, 10)
+    assert [round(value, 2) for value in values] == [get_tm_from_dna_sequence(SEQUENCE[s:s + 10]) for s in starts]
+
+
+# testing windows that contain an N, and windows longer than the sequence
+def test_tm_windows_edge_cases():
+    _, values = tm_windows("ACGTNACGT", 4)
+    assert [np.isnan(value) for value in values] == [False, True, True, True, True, False]
+    starts, values = tm_windows("ACG", 10)
+    assert len(starts) == 0 and len(values) == 0
+    with pytest.raises(ValueError):
+        gc_content_windows("ACG", 0)
+
+
+# testing the combined profile
+def test_profile_windows():
+    profile = profile_windows(SEQUENCE, 5, 5)
+    assert list(profile.ends - profile.starts) == [5] * len(profile.starts)
+    assert len(profile.gc_content) == len(profile.tm) == 6
+
+
+# testing bedGraph and TSV output
+def test_write_window_profiles():
+    records = [("chr1 description", "GGCCAT"), ("chr2", "AT")]
+    outfile = io.StringIO()
+    assert write_window_profiles(records, outfile, 4, 2, output_format="bedgraph", metric="gc") == 2
+    assert outfile.getvalue() == "chr1\t0\t4\t100.0\nchr1\t2\t6\t50.0\n"
+
+    outfile = io.StringIO()
+    write_window_profiles(records, outfile, 4, 2, output_format="tsv")
+    lines = outfile.getvalue().splitlines()
+    assert lines[0] == "chrom\tstart\tend\tgc_content\ttm"
+    assert len(lines) == 3
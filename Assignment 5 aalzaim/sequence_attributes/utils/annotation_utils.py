@@ -0,0 +1,228 @@
+"""annotation_utils.py
+Loads the CCDS attributes and Ensembl gene tables used by main.py. Only the columns the
+outputs need are read, with explicit dtypes and categorical encoding for repeated strings,
+and CCDS rows can be restricted to the IDs present in the FASTA file before the merge.
+The merged table can also be saved as a binary snapshot (Feather, Parquet or pickle) that
+later runs load directly, as long as the hashes of the source tables still match.
+"""
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+from functools import lru_cache
+from typing import Iterable, Optional
+import pandas as pd
+
+# source column -> (output column, dtype)
+CCDS_COLUMNS = {
+    '#chromosome': ('chrom', 'category'),
+    'gene': ('gene', str),
+    'gene_id': ('refseq_gene_id', 'Int64'),
+    'ccds_id': ('ccds_id', str),
+}
+ENSEMBL_COLUMNS = {
+    'ID': ('ensembl_gene_id', str),
+    'Canonical Transcript': ('ensembl_canonical_transcript_id', str),
+    'Gene': ('gene', str),
+    'Description': ('description', str),
+    'Biotype': ('biotype', 'category'),
+}
+SNAPSHOT_SCHEMA_VERSION = 1
+
+
+@lru_cache(maxsize=None)
+def _resolve_engine(engine: Optional[str]) -> str:
+    """
+    Picks the pandas CSV engine, falling back to the C engine (with one warning) if pyarrow
+    is not installed.
+
+    @param engine: 'c', 'pyarrow' or None for the default.
+    @return: The engine name to pass to `pd.read_csv`.
+    """
+    if engine == 'pyarrow' and importlib.util.find_spec('pyarrow') is None:
+        print("pyarrow is not installed, falling back to the C engine for CSV parsing", file=sys.stderr)
+        return 'c'
+    return engine or 'c'
+
+
+def _read_table(infile: str, columns: dict, engine: Optional[str]) -> pd.DataFrame:
+    """
+    Reads the selected columns of a TSV file with their dtypes and renames them.
+
+    @param infile: Path to the TSV file.
+    @param columns: Mapping of source column to (output column, dtype).
+    @param engine: 'c', 'pyarrow' or None for the default.
+    @return: A DataFrame with only the selected, renamed columns.
+    """
+    plain_dtypes = {column: dtype for column, (_, dtype) in columns.items() if dtype != 'category'}
+    df = pd.read_csv(infile, sep='\t', usecols=list(columns), dtype=plain_dtypes, engine=_resolve_engine(engine))
+    # categories are applied after parsing, which every engine supports
+    for column, (_, dtype) in columns.items():
+        if dtype == 'category':
+            df[column] = df[column].astype(str).astype('category')
+    return df.rename(columns={column: name for column, (name, _) in columns.items()})[
+        [name for name, _ in columns.values()]]
+
+
+def load_ccds_attributes(infile: str, ccds_ids: Optional[Iterable[str]] = None,
+                         engine: Optional[str] = None) -> pd.DataFrame:
+    """
+    Loads the columns of the CCDS attributes table that main.py uses.
+
+    @param infile: Path to the CCDS attributes file.
+    @param ccds_ids: Optional CCDS IDs to keep, e.g. those present in the FASTA file.
+    @param engine: 'c', 'pyarrow' or None for the default CSV engine.
+    @return: A DataFrame with the columns chrom, gene, refseq_gene_id and ccds_id.
+    """
+    ccds_df = _read_table(infile, CCDS_COLUMNS, engine)
+    if ccds_ids is not None:
+        ccds_df = ccds_df[ccds_df['ccds_id'].isin(set(ccds_ids))].reset_index(drop=True)
+        ccds_df['chrom'] = ccds_df['chrom'].cat.remove_unused_categories()
+    return ccds_df
+
+
+def load_ensembl_genes(infile: str, genes: Optional[Iterable[str]] = None,
+                       engine: Optional[str] = None) -> pd.DataFrame:
+    """
+    Loads the columns of the Ensembl gene table that main.py uses.
+
+    @param infile: Path to the Ensembl gene data file.
+    @param genes: Optional gene symbols to keep.
+    @param engine: 'c', 'pyarrow' or None for the default CSV engine.
+    @return: A DataFrame with the columns ensembl_gene_id, ensembl_canonical_transcript_id,
+    gene, description and biotype.
+    """
+    ensembl_df = _read_table(infile, ENSEMBL_COLUMNS, engine)
+    if genes is not None:
+        ensembl_df = ensembl_df[ensembl_df['gene'].isin(set(genes))].reset_index(drop=True)
+        ensembl_df['biotype'] = ensembl_df['biotype'].cat.remove_unused_categories()
+    return ensembl_df
+
+
+def _merge_tables(ccds_infile: str, ensembl_infile: str, ccds_ids: Optional[Iterable[str]],
+                  engine: Optional[str]) -> pd.DataFrame:
+    """Loads both tables and left-merges them on gene symbol, in CCDS table order."""
+    ccds_df = load_ccds_attributes(ccds_infile, ccds_ids, engine)
+    ensembl_df = load_ensembl_genes(ensembl_infile, ccds_df['gene'] if ccds_ids is not None else None, engine)
+    return pd.merge(ccds_df, ensembl_df, on='gene', how='left')
+
+
+def file_sha256(infile: str) -> str:
+    """
+    Hashes a file in 1 MB blocks.
+
+    @param infile: Path to the file.
+    @return: The hex SHA-256 digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(infile, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _snapshot_format(snapshot_path: str) -> str:
+    """Returns 'feather', 'parquet' or 'pickle' from the snapshot file extension."""
+    extension = os.path.splitext(snapshot_path)[1].lower()
+    snapshot_format = {'.feather': 'feather', '.parquet': 'parquet', '.pkl': 'pickle'}.get(extension)
+    if snapshot_format is None:
+        raise ValueError(f"Unknown snapshot extension '{extension}', use .feather, .parquet or .pkl")
+    if snapshot_format != 'pickle' and importlib.util.find_spec('pyarrow') is None:
+        raise ImportError(f"{snapshot_format} snapshots need pyarrow; install it or use a .pkl snapshot")
+    return snapshot_format
+
+
+def _snapshot_metadata(ccds_infile: str, ensembl_infile: str) -> dict:
+    """Describes the snapshot schema and the source tables it was built from."""
+    return {
+        'schema_version': SNAPSHOT_SCHEMA_VERSION,
+        'ccds_sha256': file_sha256(ccds_infile),
+        'ensembl_sha256': file_sha256(ensembl_infile),
+    }
+
+
+def build_annotation_snapshot(ccds_infile: str, ensembl_infile: str, snapshot_path: str,
+                              engine: Optional[str] = None) -> int:
+    """
+    Merges the full CCDS and Ensembl tables and saves them as a binary snapshot, with the
+    source file hashes in a `<snapshot>.json` file next to it.
+
+    @param ccds_infile: Path to the CCDS attributes file.
+    @param ensembl_infile: Path to the Ensembl gene data file.
+    @param snapshot_path: Output path ending in .feather, .parquet (both need pyarrow) or .pkl.
+    @param engine: 'c', 'pyarrow' or None for the default CSV engine.
+    @return: The number of rows in the snapshot.
+    """
+    snapshot_format = _snapshot_format(snapshot_path)
+    merged_df = _merge_tables(ccds_infile, ensembl_infile, None, engine)
+    if snapshot_format == 'feather':
+        merged_df.to_feather(snapshot_path)
+    elif snapshot_format == 'parquet':
+        merged_df.to_parquet(snapshot_path, index=False)
+    else:
+        merged_df.to_pickle(snapshot_path)
+    with open(snapshot_path + '.json', 'w', encoding='utf-8') as file:
+        json.dump(dict(_snapshot_metadata(ccds_infile, ensembl_infile), rows=len(merged_df)), file, indent=2)
+    return len(merged_df)
+
+
+def snapshot_is_fresh(snapshot_path: str, ccds_infile: str, ensembl_infile: str) -> bool:
+    """
+    Checks that a snapshot exists and was built from the current source tables.
+
+    @param snapshot_path: Path to the snapshot.
+    @param ccds_infile: Path to the CCDS attributes file.
+    @param ensembl_infile: Path to the Ensembl gene data file.
+    @return: True if the schema version and both source hashes match.
+    """
+    try:
+        with open(snapshot_path + '.json', encoding='utf-8') as file:
+            metadata = json.load(file)
+    except (OSError, ValueError):
+        return False
+    expected = _snapshot_metadata(ccds_infile, ensembl_infile)
+    return os.path.exists(snapshot_path) and all(metadata.get(key) == value for key, value in expected.items())
+
+
+def load_annotation_snapshot(snapshot_path: str) -> pd.DataFrame:
+    """
+    Loads a snapshot written by `build_annotation_snapshot`. Feather and Parquet
+    snapshots are memory-mapped rather than read into a buffer first.
+
+    @param snapshot_path: Path to the snapshot.
+    @return: The merged DataFrame, without any freshness check.
+    """
+    snapshot_format = _snapshot_format(snapshot_path)
+    if snapshot_format == 'feather':
+        from pyarrow import feather
+        return feather.read_table(snapshot_path, memory_map=True).to_pandas()
+    if snapshot_format == 'parquet':
+        return pd.read_parquet(snapshot_path, memory_map=True)
+    return pd.read_pickle(snapshot_path)
+
+
+def load_merged_annotation(ccds_infile: str, ensembl_infile: str, ccds_ids: Optional[Iterable[str]] = None,
+                           engine: Optional[str] = None, snapshot_path: Optional[str] = None) -> pd.DataFrame:
+    """
+    Loads both tables and merges them on gene symbol, as main.py does. If a snapshot is
+    given and still matches the source tables it is loaded instead of the TSV files.
+
+    @param ccds_infile: Path to the CCDS attributes file.
+    @param ensembl_infile: Path to the Ensembl gene data file.
+    @param ccds_ids: Optional CCDS IDs to keep; Ensembl rows are then limited to their genes.
+    @param engine: 'c', 'pyarrow' or None for the default CSV engine.
+    @param snapshot_path: Optional snapshot from `build_annotation_snapshot`.
+    @return: The left-merged DataFrame of CCDS and Ensembl columns, indexed by CCDS ID
+    (the ccds_id column is kept).
+    """
+    if snapshot_path is not None and snapshot_is_fresh(snapshot_path, ccds_infile, ensembl_infile):
+        merged_df = load_annotation_snapshot(snapshot_path)
+        if ccds_ids is not None:
+            merged_df = merged_df[merged_df['ccds_id'].isin(set(ccds_ids))]
+    else:
+        if snapshot_path is not None:
+            print(f"Annotation snapshot {snapshot_path} is missing or out of date, reading the source tables",
+                  file=sys.stderr)
+        merged_df = _merge_tables(ccds_infile, ensembl_infile, ccds_ids, engine)
+    return merged_df.set_index('ccds_id', drop=False)
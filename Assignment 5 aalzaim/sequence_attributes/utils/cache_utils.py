@@ -0,0 +1,173 @@
+"""cache_utils.py
+Defines AttributeCache, a persistent on-disk cache of computed sequence attributes.
+Entries are keyed by a hash of the DNA sequence, the genetic code and the strand, so re-running
+main.py on a new release only recomputes records whose sequence actually changed.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+from typing import Dict, Optional, Union
+
+# bump when the attribute calculations change so stale entries are never reused
+CACHE_SCHEMA_VERSION = 1
+
+
+def genetic_code_version(genetic_code: Dict[str, Union[str, None]]) -> str:
+    """
+    Computes a short, stable fingerprint of a genetic code table.
+
+    @param genetic_code: A dictionary mapping codons to amino acids.
+    @return: A hex digest that changes whenever any codon assignment changes.
+    """
+    canonical = json.dumps(sorted(genetic_code.items()), separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def sequence_cache_key(dna_sequence: str, code_version: str, strand: str = "+") -> str:
+    """
+    Computes the content-addressed cache key for a sequence.
+
+    @param dna_sequence: The DNA sequence.
+    @param code_version: The fingerprint returned by `genetic_code_version`.
+    @param strand: The strand the attributes were computed on ('+' or '-').
+    @return: A hex digest identifying the sequence under this genetic code, strand and schema version.
+    """
+    # '+' keys are unchanged from before the strand flag, so existing caches stay valid
+    strand_tag = "" if strand == "+" else f"{strand}:"
+    digest = hashlib.sha256(f"{CACHE_SCHEMA_VERSION}:{code_version}:{strand_tag}".encode('utf-8'))
+    digest.update(dna_sequence.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class AttributeCache:
+    """
+    A size-capped SQLite cache of computed attributes with least-recently-used eviction.
+    It follows the same context manager protocol as FileHandler, so the database is always
+    committed and closed when the with block is exited. Lookups and stores are serialized with
+    a lock, so one cache can be shared by the stages of a threaded pipeline.
+    """
+    def __init__(self, path: str, max_bytes: int = 1024 ** 3, commit_every: int = 1000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.commit_every = commit_every
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._conn = None
+        self._clock = 0
+        self._total_bytes = 0
+        self._pending = 0
+        self._code_versions = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        """Opens (creating if needed) the cache database."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        except sqlite3.Error as err:
+            print(f"{err}\nsqlite3.Error: Could not open the cache: {self.path}", file=sys.stderr)
+            raise err
+        self._conn.execute("CREATE TABLE IF NOT EXISTS attributes ("
+                           "key TEXT PRIMARY KEY, payload TEXT NOT NULL, "
+                           "size INTEGER NOT NULL, last_used INTEGER NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS attributes_last_used ON attributes (last_used)")
+        self._clock, self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(MAX(last_used), 0), COALESCE(SUM(size), 0) FROM attributes").fetchone()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Commits outstanding writes and closes the database."""
+        self._conn.commit()
+        self._conn.close()
+
+    def _key(self, dna_sequence: str, genetic_code: dict, strand: str) -> str:
+        """Returns the cache key, fingerprinting each genetic code table only once."""
+        code_id = id(genetic_code)
+        if code_id not in self._code_versions:
+            self._code_versions[code_id] = (genetic_code, genetic_code_version(genetic_code))
+        return sequence_cache_key(dna_sequence, self._code_versions[code_id][1], strand)
+
+    def _tick(self):
+        """Advances the LRU clock and commits periodically."""
+        self._clock += 1
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self._conn.commit()
+            self._pending = 0
+
+    def get(self, dna_sequence: str, genetic_code: dict, strand: str = "+") -> Optional[dict]:
+        """
+        Looks up the computed attributes of a sequence.
+
+        @param dna_sequence: The DNA sequence.
+        @param genetic_code: The genetic code the attributes were computed with.
+        @param strand: The strand the attributes were computed on ('+' or '-').
+        @return: The cached attribute dictionary, or None on a miss.
+        """
+        key = self._key(dna_sequence, genetic_code, strand)
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM attributes WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._tick()
+            self._conn.execute("UPDATE attributes SET last_used = ? WHERE key = ?", (self._clock, key))
+        return json.loads(row[0])
+
+    def put(self, dna_sequence: str, genetic_code: dict, attributes: dict, strand: str = "+"):
+        """
+        Stores the computed attributes of a sequence, evicting the least recently used
+        entries if the cache grows past `max_bytes`.
+
+        @param dna_sequence: The DNA sequence.
+        @param genetic_code: The genetic code the attributes were computed with.
+        @param attributes: The computed attribute dictionary (must be JSON serializable).
+        @param strand: The strand the attributes were computed on ('+' or '-').
+        """
+        key = self._key(dna_sequence, genetic_code, strand)
+        payload = json.dumps(attributes, separators=(',', ':'))
+        size = len(payload)
+        if size > self.max_bytes:  # would evict everything else and still not fit
+            return
+        with self._lock:
+            self._tick()
+            old = self._conn.execute("SELECT size FROM attributes WHERE key = ?", (key,)).fetchone()
+            self._conn.execute("INSERT OR REPLACE INTO attributes (key, payload, size, last_used) "
+                               "VALUES (?, ?, ?, ?)", (key, payload, size, self._clock))
+            self._total_bytes += size - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Deletes least recently used entries until the cache is back under its size cap."""
+        rows = self._conn.execute("SELECT key, size FROM attributes ORDER BY last_used")
+        to_delete = []
+        for key, size in rows:
+            if self._total_bytes <= self.max_bytes:
+                break
+            to_delete.append((key,))
+            self._total_bytes -= size
+        self._conn.executemany("DELETE FROM attributes WHERE key = ?", to_delete)
+        self.evictions += len(to_delete)
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM attributes").fetchone()[0]
+
+    def report(self) -> str:
+        """
+        Summarizes cache effectiveness for the end-of-run report.
+
+        @return: A one-line description of hits, misses, hit rate and evictions.
+        """
+        lookups = self.hits + self.misses
+        hit_rate = (self.hits / lookups) * 100 if lookups else 0.0
+        return (f"Attribute cache: {self.hits} hits, {self.misses} misses "
+                f"({hit_rate:.1f}% hit rate), {self.evictions} evictions, "
+                f"{self._total_bytes} bytes in {self.path}")
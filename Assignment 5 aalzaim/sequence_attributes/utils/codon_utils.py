@@ -0,0 +1,156 @@
+"""codon_utils.py
+Codon usage statistics for sets of coding sequences. Every record is reduced to a 64-bin
+histogram of its in-frame codons, computed for a whole batch with one `np.bincount`;
+histograms are plain integer arrays, so per-record histograms merge by addition into the
+aggregate of a set (or of several shards). Relative synonymous codon usage (RSCU) and the
+codon adaptation index (CAI, Sharp & Li 1987) are derived from the histograms and the
+synonymous codon groups of a genetic code such as `return_standard_genetic_code`.
+"""
+from typing import Dict, Iterable, List, Optional, Union
+import numpy as np
+from sequence_attributes.utils.pipeline_utils import _chunked
+from sequence_attributes.utils.seq_attribute_utils import SequenceBatch, _codon_table, _in_frame_codons
+
+# codon i has bases (i // 16, i // 4 % 4, i % 4), coded A=0, C=1, G=2, U=3 as in the translation tables
+CODONS = [first + second + third for first in "ACGU" for second in "ACGU" for third in "ACGU"]
+# Sharp & Li's pseudocount for reference codons that were never observed
+MISSING_CODON_COUNT = 0.5
+
+
+def codon_histogram_batch(dna_sequences: SequenceBatch, strand: str = "+") -> np.ndarray:
+    """
+    Counts the in-frame codons (from position 0) of every record of a batch.
+
+    @param dna_sequences: A list of DNA sequences or a packed (buffer, offsets) pair.
+    @param strand: '+' for the sequences as given, '-' for their reverse complements.
+    @return: An int64 array of shape (records, 64), indexed like CODONS; codons containing a
+    base other than A, C, G, T or U are not counted.
+    """
+    codon_index, codon_record, _, codon_offsets = _in_frame_codons(dna_sequences, strand)
+    n_records = len(codon_offsets) - 1
+    counts = np.bincount(codon_record * 65 + codon_index, minlength=n_records * 65)
+    return counts.reshape(n_records, 65)[:, :64].astype(np.int64)
+
+
+def codon_histogram(dna_sequence: str, strand: str = "+") -> np.ndarray:
+    """
+    Counts the in-frame codons of one DNA sequence (see `codon_histogram_batch`).
+
+    @param dna_sequence: The DNA sequence.
+    @param strand: '+' for the sequence as given, '-' for its reverse complement.
+    @return: An int64 array of 64 codon counts, indexed like CODONS.
+    """
+    return codon_histogram_batch([dna_sequence], strand)[0]
+
+
+def codon_histograms(dna_sequences: Iterable[str], strand: str = "+", chunk_size: int = 4096) -> np.ndarray:
+    """
+    Counts the in-frame codons of any number of DNA sequences, packing them in chunks so the
+    intermediate arrays stay small.
+
+    @param dna_sequences: An iterable of DNA sequences.
+    @param strand: '+' for the sequences as given, '-' for their reverse complements.
+    @param chunk_size: The number of sequences counted per batch.
+    @return: An int64 array of shape (records, 64), indexed like CODONS.
+    """
+    chunks = [codon_histogram_batch(chunk, strand) for chunk in _chunked(dna_sequences, chunk_size)]
+    return np.concatenate(chunks) if chunks else np.zeros((0, 64), dtype=np.int64)
+
+
+def merge_codon_histograms(histograms: Union[np.ndarray, List[np.ndarray]]) -> np.ndarray:
+    """
+    Merges codon histograms, e.g. the records of a set or the aggregates of several shards.
+
+    @param histograms: An array of shape (n, 64) or a list of 64-bin histograms.
+    @return: The summed 64-bin histogram.
+    """
+    return np.asarray(histograms, dtype=np.int64).reshape(-1, 64).sum(axis=0)
+
+
+def _synonymous_groups(genetic_code: Dict[str, Union[str, None]]) -> np.ndarray:
+    """
+    Returns a (64, 64) 0/1 matrix whose entry (i, j) is 1 if codons i and j encode the same
+    amino acid; stop codons and codons missing from the genetic code belong to no group.
+    """
+    amino_acids = _codon_table(genetic_code)[:64]
+    return ((amino_acids[:, None] == amino_acids[None, :]) & (amino_acids[:, None] != 0)).astype(np.float64)
+
+
+def rscu(histograms: np.ndarray, genetic_code: Dict[str, Union[str, None]]) -> np.ndarray:
+    """
+    Calculates the relative synonymous codon usage: each codon's count divided by the mean count
+    of the codons encoding the same amino acid.
+
+    @param histograms: A 64-bin histogram or an array of shape (records, 64).
+    @param genetic_code: A dictionary mapping codons to amino acids.
+    @return: A float array of the same shape; NaN for stop codons and for amino acids that do
+    not occur in a record.
+    """
+    groups = _synonymous_groups(genetic_code)
+    counts = np.asarray(histograms, dtype=np.float64)
+    expected = (counts @ groups) / groups.sum(axis=0).clip(min=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = counts / expected
+    return np.where(groups.sum(axis=0) > 0, values, np.nan)
+
+
+def relative_adaptiveness(reference_histogram: np.ndarray, genetic_code: Dict[str, Union[str, None]]) -> np.ndarray:
+    """
+    Calculates each codon's relative adaptiveness w: its count in a reference set divided by the
+    count of the most used synonymous codon. Unobserved codons count as MISSING_CODON_COUNT.
+
+    @param reference_histogram: The 64-bin histogram of the reference set (e.g. highly expressed
+    genes, or the aggregate of all records).
+    @param genetic_code: A dictionary mapping codons to amino acids.
+    @return: A float array of 64 weights; NaN for stop codons.
+    """
+    groups = _synonymous_groups(genetic_code)
+    counts = np.maximum(np.asarray(reference_histogram, dtype=np.float64), MISSING_CODON_COUNT)
+    group_max = (groups * counts[None, :]).max(axis=1)
+    return np.where(groups.sum(axis=0) > 0, counts / np.where(group_max > 0, group_max, 1), np.nan)
+
+
+def codon_adaptation_index(histograms: np.ndarray, weights: np.ndarray,
+                           genetic_code: Dict[str, Union[str, None]]) -> np.ndarray:
+    """
+    Calculates the codon adaptation index, the geometric mean of the relative adaptiveness of a
+    record's codons. Stop codons and amino acids with a single codon (e.g. Met, Trp) are excluded.
+
+    @param histograms: A 64-bin histogram or an array of shape (records, 64).
+    @param weights: The relative adaptiveness of each codon, from `relative_adaptiveness`.
+    @param genetic_code: A dictionary mapping codons to amino acids.
+    @return: The CAI of each record (a float for a single histogram); NaN for records without
+    informative codons.
+    """
+    groups = _synonymous_groups(genetic_code)
+    informative = groups.sum(axis=0) > 1
+    log_weights = np.where(informative, np.log(np.where(informative, weights, 1.0)), 0.0)
+    counts = np.asarray(histograms, dtype=np.float64) * informative
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.exp((counts @ log_weights) / counts.sum(axis=-1))
+
+
+def codon_usage_rows(histogram: np.ndarray, genetic_code: Dict[str, Union[str, None]],
+                     weights: Optional[np.ndarray] = None) -> List[Dict[str, object]]:
+    """
+    Builds a codon usage table from a (usually aggregate) histogram.
+
+    @param histogram: A 64-bin codon histogram.
+    @param genetic_code: A dictionary mapping codons to amino acids.
+    @param weights: Optional relative adaptiveness per codon; derived from the histogram if None.
+    @return: One dictionary per codon with the codon, amino_acid ('*' for stops), count,
+    per_thousand, rscu and relative_adaptiveness.
+    """
+    histogram = np.asarray(histogram, dtype=np.int64)
+    weights = relative_adaptiveness(histogram, genetic_code) if weights is None else weights
+    values = rscu(histogram, genetic_code)
+    total = histogram.sum()
+    amino_acids = _codon_table(genetic_code)[:64]
+    return [{
+        "codon": codon,
+        "amino_acid": chr(amino_acids[i]) if amino_acids[i] else "*",
+        "count": int(histogram[i]),
+        "per_thousand": round(float(1000 * histogram[i] / total), 2) if total else 0.0,
+        "rscu": round(float(values[i]), 3),
+        "relative_adaptiveness": round(float(weights[i]), 3),
+    } for i, codon in enumerate(CODONS)]
@@ -0,0 +1,143 @@
+"""dedup_utils.py
+Collapses byte-identical sequences. SequenceDeduplicator has the same get/put interface as
+AttributeCache, so main.py computes attributes once per unique sequence and hands the same
+result to every header that shares it; dedup_fasta writes a collapsed FASTA file and an ID
+mapping while streaming the input.
+"""
+import hashlib
+import threading
+from collections import namedtuple
+from typing import Iterable, Optional, Tuple
+from sequence_attributes.sequence_formats.fasta_format import write_fasta_record
+from sequence_attributes.utils.cache_utils import genetic_code_version
+
+DedupStats = namedtuple("DedupStats", ["records", "unique", "duplicates"])
+
+
+def sequence_digest(sequence: str) -> bytes:
+    """
+    Hashes a sequence for duplicate detection.
+
+    @param sequence: The sequence.
+    @return: A 16-byte BLAKE2b digest of the sequence.
+    """
+    return hashlib.blake2b(sequence.encode('utf-8'), digest_size=16).digest()
+
+
+def format_dedup_stats(stats: DedupStats) -> str:
+    """
+    Describes duplicate counts for the end-of-run report.
+
+    @param stats: A DedupStats namedtuple.
+    @return: A one-line description of records, unique sequences and the duplicate ratio.
+    """
+    ratio = (stats.duplicates / stats.records) * 100 if stats.records else 0.0
+    return (f"Deduplication: {stats.records} records, {stats.unique} unique sequences, "
+            f"{stats.duplicates} duplicates ({ratio:.1f}% duplicate ratio)")
+
+
+class SequenceDeduplicator:
+    """
+    An in-memory store of computed attributes keyed by a hash of the sequence, the genetic code
+    and the strand. It can sit in front of an AttributeCache (`backing`), which then only sees the first
+    lookup and store of each unique sequence. Lookups and stores are serialized with a lock, so
+    it can be shared by the stages of a threaded pipeline.
+    """
+    def __init__(self, backing=None):
+        self.backing = backing
+        self.records = 0
+        self._attributes = {}
+        self._code_versions = {}
+        self._lock = threading.Lock()
+
+    def _key(self, dna_sequence: str, genetic_code: dict, strand: str) -> Tuple[str, str, bytes]:
+        """Returns the store key, fingerprinting each genetic code table only once."""
+        code_id = id(genetic_code)
+        if code_id not in self._code_versions:
+            self._code_versions[code_id] = (genetic_code, genetic_code_version(genetic_code))
+        return self._code_versions[code_id][1], strand, sequence_digest(dna_sequence)
+
+    def get(self, dna_sequence: str, genetic_code: dict, strand: str = "+") -> Optional[dict]:
+        """
+        Looks up the attributes of a sequence seen earlier in this run, then in the backing cache.
+
+        @param dna_sequence: The DNA sequence.
+        @param genetic_code: The genetic code the attributes were computed with.
+        @param strand: The strand the attributes were computed on ('+' or '-').
+        @return: The attribute dictionary, or None if the sequence has not been computed yet.
+        """
+        key = self._key(dna_sequence, genetic_code, strand)
+        with self._lock:
+            self.records += 1
+            attributes = self._attributes.get(key)
+            if attributes is not None:
+                return attributes
+        if self.backing is None:
+            return None
+        attributes = self.backing.get(dna_sequence, genetic_code, strand)
+        if attributes is not None:
+            with self._lock:
+                self._attributes[key] = attributes
+        return attributes
+
+    def put(self, dna_sequence: str, genetic_code: dict, attributes: dict, strand: str = "+"):
+        """
+        Stores the computed attributes of a sequence, and passes them on to the backing cache.
+
+        @param dna_sequence: The DNA sequence.
+        @param genetic_code: The genetic code the attributes were computed with.
+        @param attributes: The computed attribute dictionary.
+        @param strand: The strand the attributes were computed on ('+' or '-').
+        """
+        key = self._key(dna_sequence, genetic_code, strand)
+        with self._lock:
+            self._attributes[key] = attributes
+        if self.backing is not None:
+            self.backing.put(dna_sequence, genetic_code, attributes, strand)
+
+    def __len__(self) -> int:
+        return len(self._attributes)
+
+    def stats(self) -> DedupStats:
+        """Returns the record, unique sequence and duplicate counts of the sequences stored so far."""
+        unique = len(self._attributes)
+        return DedupStats(records=self.records, unique=unique, duplicates=self.records - unique)
+
+    def report(self) -> str:
+        """
+        Summarizes deduplication (and the backing cache, if any) for the end-of-run report.
+
+        @return: One line per stage.
+        """
+        lines = [format_dedup_stats(self.stats())]
+        if self.backing is not None:
+            lines.append(self.backing.report())
+        return "\n".join(lines)
+
+
+def dedup_fasta(records: Iterable[Tuple[str, str]], fasta_outfile, mapping_outfile,
+                line_width: int = 70) -> DedupStats:
+    """
+    Streams FASTA records, writing the first record of each unique sequence to a collapsed
+    FASTA file and the representative of every record to a mapping file. Only sequence hashes
+    are kept in memory.
+
+    @param records: An iterable of (header, sequence) tuples, e.g. from `iter_fasta_records`.
+    @param fasta_outfile: An open, writable text file for the collapsed FASTA records.
+    @param mapping_outfile: An open, writable text file for the tab-separated
+    (header, representative_header) mapping, one line per input record.
+    @param line_width: Sequence line width of the collapsed FASTA file (0 for one line per record).
+    @return: A DedupStats namedtuple.
+    """
+    representatives = {}
+    n_records = 0
+    mapping_outfile.write("header\trepresentative_header\n")
+    for header, sequence in records:
+        n_records += 1
+        digest = sequence_digest(sequence)
+        representative = representatives.get(digest)
+        if representative is None:  # first copy of this sequence
+            representative = representatives[digest] = header
+            write_fasta_record(fasta_outfile, header, sequence, line_width)
+        mapping_outfile.write(f"{header}\t{representative}\n")
+    return DedupStats(records=n_records, unique=len(representatives), duplicates=n_records - len(representatives))
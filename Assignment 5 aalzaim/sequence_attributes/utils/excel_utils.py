@@ -0,0 +1,208 @@
+"""excel_utils.py
+Writes large detail tables to Excel and TSV within the format's limits. Tables with more rows
+than an Excel sheet holds are split across sheets, and across workbook files once a file
+reaches a cell budget, so no single workbook has to be built in memory at once; workbooks are
+written with openpyxl's write-only mode, in worker processes if requested. Sequence cells
+longer than Excel's cell limit are offloaded to a side FASTA file and replaced by a reference,
+other long cells are truncated. TSV shards of the same table can be written in parallel.
+"""
+import importlib.util
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from sequence_attributes.sequence_formats.fasta_format import write_fasta_record
+
+ExcelParts = namedtuple("ExcelParts", ["files", "sheets", "rows", "offloaded", "truncated"])
+
+EXCEL_MAX_ROWS = 1048576  # per sheet, including the header row
+EXCEL_MAX_COLUMNS = 16384
+EXCEL_MAX_CELL_CHARS = 32767
+# cells per workbook file; openpyxl holds a file's shared strings in memory until it is saved
+DEFAULT_MAX_CELLS_PER_FILE = 20000000
+SEQUENCE_COLUMNS = ('dna_sequence', 'protein_sequence')
+TRUNCATION_MARK = "...[truncated]"
+
+
+def plan_excel_parts(n_rows: int, n_columns: int, max_rows_per_sheet: int = EXCEL_MAX_ROWS - 1,
+                     max_cells_per_file: int = DEFAULT_MAX_CELLS_PER_FILE) -> List[List[Tuple[int, int]]]:
+    """
+    Splits the rows of a table into sheets and workbook files.
+
+    @param n_rows: The number of data rows.
+    @param n_columns: The number of columns.
+    @param max_rows_per_sheet: The most data rows per sheet (Excel allows 1048575 below the header).
+    @param max_cells_per_file: The most cells per workbook file.
+    @return: One list per file of (first row, end row) ranges, one range per sheet; a table
+    without rows gets one empty sheet.
+    """
+    if not 0 < max_rows_per_sheet < EXCEL_MAX_ROWS:
+        raise ValueError(f"Rows per sheet must be between 1 and {EXCEL_MAX_ROWS - 1}")
+    if n_columns > EXCEL_MAX_COLUMNS:
+        raise ValueError(f"{n_columns} columns exceed Excel's limit of {EXCEL_MAX_COLUMNS}")
+    rows_per_file = max(max_cells_per_file // max(n_columns, 1), 1)
+    sheets = [(start, min(start + max_rows_per_sheet, n_rows)) for start in range(0, n_rows, max_rows_per_sheet)]
+    files, file_rows = [], rows_per_file
+    for start, end in sheets or [(0, 0)]:
+        while start < end or not files:  # a sheet may also be split at a file boundary
+            if file_rows >= rows_per_file:
+                files.append([])
+                file_rows = 0
+            sheet_end = min(end, start + rows_per_file - file_rows)
+            files[-1].append((start, sheet_end))
+            file_rows += sheet_end - start
+            start = sheet_end
+    return files
+
+
+def _cell_text(value):
+    """Formats list and dictionary cells as text, as `DataFrame.to_excel` does."""
+    return str(value) if isinstance(value, (list, tuple, dict, set, np.ndarray)) else value
+
+
+def limit_cell_lengths(df: pd.DataFrame, ids: Sequence[str], fasta_outfile: str,
+                       max_chars: int = EXCEL_MAX_CELL_CHARS,
+                       sequence_columns: Sequence[str] = SEQUENCE_COLUMNS) -> Tuple[pd.DataFrame, int, int]:
+    """
+    Keeps every cell of a table within a character limit. Longer cells of the sequence columns
+    are written to a FASTA file (headers 'ID|column') and replaced by '<FASTA file name>:ID|column';
+    other long cells are truncated and end with TRUNCATION_MARK.
+
+    @param df: The table; list and dictionary cells are formatted as text.
+    @param ids: The record ID of every row, used in the FASTA headers.
+    @param fasta_outfile: Path for the side FASTA file; only created if a sequence is offloaded.
+    @param max_chars: The most characters per cell.
+    @param sequence_columns: The columns whose long cells are offloaded instead of truncated.
+    @return: A tuple of (the limited table, offloaded cells, truncated cells).
+    """
+    df = df.copy()
+    offloaded = truncated = 0
+    fasta_file = None
+    try:
+        for column in [column for column, dtype in df.dtypes.items()
+                       if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype)]:
+            df[column] = df[column].map(_cell_text)
+            lengths = df[column].map(lambda value: len(value) if isinstance(value, str) else 0)
+            long_rows = np.flatnonzero(lengths.to_numpy() > max_chars)
+            if not len(long_rows):
+                continue
+            values = df[column].to_numpy(copy=True)
+            for row in long_rows.tolist():
+                if column in sequence_columns:
+                    if fasta_file is None:
+                        fasta_file = open(fasta_outfile, 'w', encoding='utf-8')
+                    reference = f"{ids[row]}|{column}"
+                    write_fasta_record(fasta_file, reference, values[row])
+                    values[row] = f"{os.path.basename(fasta_outfile)}:{reference}"
+                    offloaded += 1
+                else:
+                    values[row] = values[row][:max_chars - len(TRUNCATION_MARK)] + TRUNCATION_MARK
+                    truncated += 1
+            df[column] = values
+    finally:
+        if fasta_file is not None:
+            fasta_file.close()
+    return df, offloaded, truncated
+
+
+def _excel_value(value):
+    """Converts a table value to a value openpyxl can write; missing values become empty cells."""
+    if value is None or value is pd.NA or (isinstance(value, float) and value != value):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _write_workbook(path: str, columns: List[str], sheets: List[pd.DataFrame]):
+    """Writes the sheets of one workbook file in openpyxl's streaming write-only mode."""
+    import openpyxl
+    workbook = openpyxl.Workbook(write_only=True)
+    for sheet_number, frame in enumerate(sheets, 1):
+        sheet = workbook.create_sheet(f"Sheet{sheet_number}")
+        sheet.append(columns)
+        for row in frame.itertuples(index=False, name=None):
+            sheet.append([_excel_value(value) for value in row])
+    workbook.save(path)
+
+
+def _with_suffix(path: str, extension: str, suffix: str) -> str:
+    """Replaces the extension of a path by a suffix, or appends the suffix if the path has another extension."""
+    root, path_extension = os.path.splitext(path)
+    return (root if path_extension.lower() == extension else path) + suffix
+
+
+def excel_side_path(excel_outfile: str, suffix: str) -> str:
+    """Returns the path of a file written next to a workbook, e.g. <name>.sequences.fna for '.sequences.fna'."""
+    return _with_suffix(excel_outfile, '.xlsx', suffix)
+
+
+def excel_part_path(excel_outfile: str, part: int) -> str:
+    """Returns the path of a workbook part: the output file itself, then <name>.part2.xlsx and so on."""
+    return excel_outfile if part == 1 else excel_side_path(excel_outfile, f'.part{part}.xlsx')
+
+
+def write_excel(df: pd.DataFrame, excel_outfile: str, ids: Optional[Sequence[str]] = None,
+                max_rows_per_sheet: int = EXCEL_MAX_ROWS - 1, max_cells_per_file: int = DEFAULT_MAX_CELLS_PER_FILE,
+                max_cell_chars: int = EXCEL_MAX_CELL_CHARS, workers: int = 0) -> ExcelParts:
+    """
+    Writes a table to one or more workbooks within Excel's limits (see `plan_excel_parts` and
+    `limit_cell_lengths`). Long sequences go to <name>.sequences.fna next to the workbook; a name
+    without the .xlsx extension is kept whole, e.g. 'out' gets out.part2.xlsx and out.sequences.fna.
+
+    @param df: The table.
+    @param excel_outfile: Path of the first workbook; further files are <name>.part2.xlsx and so on.
+    @param ids: The record ID of every row for the side FASTA headers (the row numbers if None).
+    @param max_rows_per_sheet: The most data rows per sheet.
+    @param max_cells_per_file: The most cells per workbook file.
+    @param max_cell_chars: The most characters per cell.
+    @param workers: The number of worker processes writing workbook files (0 for this process).
+    @return: An ExcelParts namedtuple (files, sheets, rows, offloaded cells, truncated cells).
+    """
+    if importlib.util.find_spec('openpyxl') is None:
+        raise ImportError("Writing Excel files needs openpyxl; install it or write TSV shards instead")
+    ids = [str(row) for row in range(len(df))] if ids is None else list(ids)
+    df, offloaded, truncated = limit_cell_lengths(df, ids, excel_side_path(excel_outfile, '.sequences.fna'),
+                                                  max_cell_chars)
+    plan = plan_excel_parts(len(df), len(df.columns), max_rows_per_sheet, max_cells_per_file)
+    paths = [excel_part_path(excel_outfile, part) for part in range(1, len(plan) + 1)]
+    columns = [str(column) for column in df.columns]
+    file_sheets = [[df.iloc[start:end] for start, end in sheets] for sheets in plan]
+    if workers > 0 and len(plan) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_write_workbook, paths, [columns] * len(plan), file_sheets))
+    else:
+        for path, sheets in zip(paths, file_sheets):
+            _write_workbook(path, columns, sheets)
+    return ExcelParts(files=paths, sheets=sum(len(sheets) for sheets in plan), rows=len(df),
+                      offloaded=offloaded, truncated=truncated)
+
+
+def _write_tsv(path: str, frame: pd.DataFrame):
+    """Writes one TSV shard with a header row."""
+    frame.to_csv(path, sep='\t', index=False)
+
+
+def write_tsv_shards(df: pd.DataFrame, tsv_outfile: str, rows_per_shard: int = EXCEL_MAX_ROWS - 1,
+                     workers: int = 0) -> List[str]:
+    """
+    Writes a table as TSV shards of at most rows_per_shard rows each, every shard with a header.
+
+    @param df: The table.
+    @param tsv_outfile: Path pattern; shard i is written to <name>.part<i>.tsv (from 0001).
+    @param rows_per_shard: The most data rows per shard.
+    @param workers: The number of worker processes writing shards (0 for this process).
+    @return: The shard paths.
+    """
+    if rows_per_shard < 1:
+        raise ValueError("Rows per shard must be positive")
+    starts = range(0, max(len(df), 1), rows_per_shard)
+    paths = [_with_suffix(tsv_outfile, '.tsv', f'.part{shard:04d}.tsv') for shard in range(1, len(starts) + 1)]
+    frames = [df.iloc[start:start + rows_per_shard] for start in starts]
+    if workers > 0 and len(frames) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_write_tsv, paths, frames))
+    else:
+        for path, frame in zip(paths, frames):
+            _write_tsv(path, frame)
+    return paths
@@ -0,0 +1,134 @@
+"""extract_utils.py
+Cuts interval sequences (CDS, exons, BED/GTF features) out of a chromosome FASTA file.
+The chromosome file is indexed once like `samtools faidx` and memory-mapped, features are
+sorted by chromosome (in file order) and start, so the file is read in a single sequential
+pass, and exons of a spliced feature are concatenated (and reverse complemented on the
+minus strand) before the feature is written. Soft-masked bases are upper-cased unless asked
+to keep them.
+"""
+import mmap
+import sys
+from collections import namedtuple
+from typing import Dict, List
+from sequence_attributes.sequence_formats.fasta_format import write_fasta_record
+from sequence_attributes.sequence_formats.interval_format import Interval
+from sequence_attributes.utils.strand_utils import normalize_case, reverse_complement
+
+# line_bases and line_bytes are 0 when the record's lines are not of uniform width
+FastaIndexEntry = namedtuple("FastaIndexEntry", ["name", "length", "offset", "end", "line_bases", "line_bytes"])
+ExtractStats = namedtuple("ExtractStats", ["features", "bases", "skipped"])
+
+
+def index_fasta(infile: str) -> Dict[str, FastaIndexEntry]:
+    """
+    Indexes the records of a FASTA file by name (the first word of the header), recording
+    where each sequence starts and its line layout, as `samtools faidx` does.
+
+    @param infile: Path to the (uncompressed) FASTA file.
+    @return: A dictionary of record name to FastaIndexEntry, in file order.
+    """
+    index = {}
+
+    def close_record():
+        while line_layouts and line_layouts[-1][0] == 0:  # trailing blank lines do not move any base
+            line_layouts.pop()
+        uniform = (len(set(line_layouts[:-1])) <= 1 and
+                   (len(line_layouts) < 2 or line_layouts[-1][0] <= line_layouts[0][0]))
+        line_bases, line_bytes = line_layouts[0] if uniform and line_layouts else (0, 0)
+        index[name] = FastaIndexEntry(name, length, offset, position, line_bases, line_bytes)
+
+    name = None
+    position = offset = length = 0
+    line_layouts = []
+    with open(infile, 'rb') as file:
+        for raw_line in file:
+            if raw_line.startswith(b'>'):
+                if name is not None:
+                    close_record()
+                name = raw_line[1:].decode('utf-8').split(maxsplit=1)[0] if raw_line[1:].strip() else ""
+                if name in index:
+                    raise ValueError(f"Duplicate record name in {infile}: {name}")
+                offset, length, line_layouts = position + len(raw_line), 0, []
+            elif name is not None:
+                bases = len(raw_line.rstrip(b'\r\n'))
+                line_layouts.append((bases, len(raw_line)))
+                length += bases
+            position += len(raw_line)
+    if name is not None:
+        close_record()
+    return index
+
+
+def _resolve_chromosome(chromosome: str, index: Dict[str, FastaIndexEntry]) -> str:
+    """Finds the record of a chromosome, accepting names with and without the 'chr' prefix."""
+    for candidate in (chromosome, f"chr{chromosome}", chromosome[3:] if chromosome.startswith('chr') else None):
+        if candidate in index:
+            return candidate
+    return None
+
+
+def _fetch(data, entry: FastaIndexEntry, start: int, end: int) -> bytes:
+    """Reads bases [start, end) of an indexed record, computing byte offsets from its line layout."""
+    if not 0 <= start <= end <= entry.length:
+        raise ValueError(f"Interval {start}-{end} is outside {entry.name} (length {entry.length})")
+    first = entry.offset + (start // entry.line_bases) * entry.line_bytes + start % entry.line_bases
+    last = entry.offset + (end // entry.line_bases) * entry.line_bytes + end % entry.line_bases
+    return data[first:last].translate(None, b'\r\n')
+
+
+def extract_features(fasta_infile: str, features: Dict[str, List[Interval]], outfile,
+                     line_width: int = 70, keep_case: bool = False) -> ExtractStats:
+    """
+    Extracts the sequence of every feature from a chromosome FASTA file. Exons are joined in
+    genomic order and minus-strand features are reverse complemented. Each output header is
+    'name|chrN', which main.py parses like a CCDS nucleotide header, and the sequence is upper
+    case, because main.py's melting temperature does not accept soft-masked bases.
+
+    @param fasta_infile: Path to the (uncompressed) chromosome FASTA file.
+    @param features: A dictionary of feature name to intervals, e.g. from `read_ccds_intervals`.
+    @param outfile: An open, writable text file for the extracted FASTA records.
+    @param line_width: Sequence line width of the output (0 for one line per record).
+    @param keep_case: True to keep the soft-masked (lower-case) bases of the FASTA file.
+    @return: An ExtractStats namedtuple; features on chromosomes missing from the FASTA file are
+    skipped and counted.
+    """
+    index = index_fasta(fasta_infile)
+    order = {name: rank for rank, name in enumerate(index)}
+    by_chromosome = {}
+    skipped = 0
+    for name, intervals in features.items():
+        if len({(interval.chromosome, interval.strand) for interval in intervals}) != 1:
+            raise ValueError(f"Feature {name} spans several chromosomes or strands")
+        record = _resolve_chromosome(intervals[0].chromosome, index)
+        if record is None:
+            skipped += 1
+            continue
+        by_chromosome.setdefault(record, []).append((min(i.start for i in intervals), name, intervals))
+    if skipped:
+        print(f"Skipped {skipped} features on chromosomes missing from {fasta_infile}", file=sys.stderr)
+    if not by_chromosome:
+        return ExtractStats(features=0, bases=0, skipped=skipped)
+
+    n_features = n_bases = 0
+    with open(fasta_infile, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for record in sorted(by_chromosome, key=order.get):
+            entry = index[record]
+            if not entry.line_bases:  # irregular line widths: read the whole record once
+                sequence = data[entry.offset:entry.end].translate(None, b'\r\n')
+                entry = FastaIndexEntry(record, len(sequence), 0, len(sequence), max(len(sequence), 1),
+                                        max(len(sequence), 1))
+            else:
+                sequence = data
+            label = record if record.startswith('chr') else f"chr{record}"
+            for _, name, intervals in sorted(by_chromosome[record]):
+                spliced = b"".join(_fetch(sequence, entry, interval.start, interval.end)
+                                   for interval in sorted(intervals, key=lambda interval: interval.start))
+                dna_sequence = spliced.decode('ascii')
+                if not keep_case:
+                    dna_sequence = normalize_case(dna_sequence)
+                if intervals[0].strand == '-':
+                    dna_sequence = reverse_complement(dna_sequence)
+                write_fasta_record(outfile, f"{name}|{label}", dna_sequence, line_width)
+                n_features += 1
+                n_bases += len(dna_sequence)
+    return ExtractStats(features=n_features, bases=n_bases, skipped=skipped)
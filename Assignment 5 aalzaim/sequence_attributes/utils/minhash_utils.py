@@ -0,0 +1,231 @@
+"""minhash_utils.py
+MinHash sketches for fast all-vs-all sequence similarity. Each record is reduced to a
+fixed-length signature of minimum k-mer hashes (one per hash function), whose agreement
+estimates the Jaccard similarity of two records' k-mer sets. Locality-sensitive hashing splits
+the signatures into bands, so only records sharing a band become candidate pairs and the
+comparison is not quadratic in the number of records. Signatures and candidate pairs are
+computed in chunks that can run in a process pool.
+"""
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+from sequence_attributes.sequence_formats.header_format import parse_header
+from sequence_attributes.utils.pipeline_utils import _chunked
+from sequence_attributes.utils.sketch_utils import _splitmix64, kmer_codes
+
+SimilarityEdges = namedtuple("SimilarityEdges", ["first", "second", "jaccard"])
+
+# signature value of a record without any valid k-mer
+EMPTY_HASH = np.iinfo(np.uint64).max
+
+
+def _permutation_seeds(num_hashes: int, seed: int) -> np.ndarray:
+    """Returns the seed of each hash function of a signature."""
+    return _splitmix64(np.arange(num_hashes, dtype=np.uint64) + np.uint64(seed * num_hashes))
+
+
+def minhash_signature(dna_sequence: str, k: int = 21, num_hashes: int = 128, canonical: bool = False,
+                      seed: int = 0) -> np.ndarray:
+    """
+    Computes the MinHash signature of the k-mer set of a DNA sequence.
+
+    @param dna_sequence: The DNA sequence.
+    @param k: The k-mer length, 1 to 32.
+    @param num_hashes: The signature length; the Jaccard estimate has a standard error of
+    sqrt(J * (1 - J) / num_hashes).
+    @param canonical: True to treat each k-mer and its reverse complement as the same k-mer.
+    @param seed: The hash seed; only signatures with equal seeds are comparable.
+    @return: A uint64 array of num_hashes minimum hashes; all EMPTY_HASH if the sequence has no
+    valid k-mer.
+    """
+    return minhash_signatures([dna_sequence], k, num_hashes, canonical, seed)[0]
+
+
+def minhash_signatures(dna_sequences: List[str], k: int = 21, num_hashes: int = 128, canonical: bool = False,
+                       seed: int = 0, chunk: int = 1 << 15) -> np.ndarray:
+    """
+    Computes the MinHash signatures of a chunk of DNA sequences, e.g. in a worker process. The
+    distinct k-mers of all sequences are hashed together, `chunk` k-mers at a time, and reduced
+    to per-record minimums with `np.minimum.reduceat`.
+
+    @param dna_sequences: A list of DNA sequences.
+    @param chunk: The number of k-mers hashed at once (bounds memory to chunk * num_hashes hashes).
+    @return: A uint64 array of shape (sequences, num_hashes); see `minhash_signature` for the
+    other parameters.
+    """
+    seeds = _permutation_seeds(num_hashes, seed)
+    signatures = np.full((len(dna_sequences), num_hashes), EMPTY_HASH, dtype=np.uint64)
+    record_codes = [np.unique(np.concatenate(list(kmer_codes(dna_sequence, k, canonical)) or
+                                             [np.zeros(0, dtype=np.uint64)]))
+                    for dna_sequence in dna_sequences]
+    lengths = np.array([len(codes) for codes in record_codes], dtype=np.int64)
+    if not lengths.sum():
+        return signatures
+    codes = np.concatenate(record_codes)
+    record_of = np.repeat(np.arange(len(dna_sequences)), lengths)
+    record_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))[lengths > 0]
+    for start in range(0, len(codes), chunk):
+        end = min(start + chunk, len(codes))
+        # segments of the slice that belong to one record each
+        segment_starts = np.union1d(record_starts[(record_starts > start) & (record_starts < end)], [start]) - start
+        hashes = _splitmix64(codes[None, start:end] ^ seeds[:, None])
+        minimums = np.minimum.reduceat(hashes, segment_starts, axis=1).T
+        records = record_of[start + segment_starts]
+        signatures[records] = np.minimum(signatures[records], minimums)
+    return signatures
+
+
+def build_signatures(records: Iterable[Tuple[str, str]], k: int = 21, num_hashes: int = 128,
+                     canonical: bool = False, seed: int = 0, workers: int = 0,
+                     chunk_size: int = 256) -> Tuple[List[str], np.ndarray]:
+    """
+    Computes the signature of every record, in worker processes if `workers` is 1 or more.
+
+    @param records: An iterable of (header, sequence) tuples, e.g. from `iter_fasta_records`.
+    @param workers: The number of worker processes (0 to compute in this process).
+    @param chunk_size: The number of records per worker task.
+    @return: A tuple of (record IDs parsed from the headers, signatures of shape (records, num_hashes));
+    see `minhash_signature` for the other parameters.
+    """
+    ids, chunks = [], []
+
+    def sequence_chunks():
+        for chunk in _chunked(records, chunk_size):
+            ids.extend(parse_header(header).id for header, _ in chunk)
+            yield [dna_sequence for _, dna_sequence in chunk]
+
+    if workers > 0:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = list(executor.map(minhash_signatures, sequence_chunks(), repeat(k), repeat(num_hashes),
+                                       repeat(canonical), repeat(seed)))
+    else:
+        chunks = [minhash_signatures(chunk, k, num_hashes, canonical, seed) for chunk in sequence_chunks()]
+    signatures = np.concatenate(chunks) if chunks else np.zeros((0, num_hashes), dtype=np.uint64)
+    return ids, signatures
+
+
+def choose_bands(num_hashes: int, threshold: float) -> int:
+    """
+    Picks the number of LSH bands whose detection threshold (1 / bands) ** (1 / rows) is closest
+    to, without exceeding, the Jaccard threshold, so pairs above the threshold are rarely missed.
+
+    @param num_hashes: The signature length.
+    @param threshold: The Jaccard similarity of interest.
+    @return: The number of bands; it divides num_hashes.
+    """
+    options = {bands: (1 / bands) ** (bands / num_hashes) for bands in range(1, num_hashes + 1)
+               if num_hashes % bands == 0}
+    below = [bands for bands, detection in options.items() if detection <= threshold]
+    if below:
+        return max(below, key=options.get)
+    return min(options, key=lambda bands: abs(options[bands] - threshold))
+
+
+def lsh_candidate_pairs(signatures: np.ndarray, bands: int) -> np.ndarray:
+    """
+    Finds the pairs of records whose signatures agree on every row of at least one band.
+
+    @param signatures: A uint64 array of shape (records, num_hashes).
+    @param bands: The number of bands; it must divide num_hashes.
+    @return: An int64 array of shape (pairs, 2) of record indices, first < second, without duplicates.
+    """
+    n_records, num_hashes = signatures.shape
+    if num_hashes % bands:
+        raise ValueError(f"{bands} bands do not divide a signature of {num_hashes} hashes")
+    rows = num_hashes // bands
+    candidates = np.flatnonzero(signatures[:, 0] != EMPTY_HASH)
+    pair_keys = []
+    for band in range(bands):
+        band_key = np.zeros(len(candidates), dtype=np.uint64)
+        for column in range(band * rows, (band + 1) * rows):  # combine the band's rows into one key
+            band_key = _splitmix64(band_key ^ signatures[candidates, column])
+        order = np.argsort(band_key, kind="stable")
+        sorted_keys = band_key[order]
+        bucket_starts = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1], [True])))
+        for bucket in np.flatnonzero(np.diff(bucket_starts) > 1):  # buckets shared by two or more records
+            members = np.sort(candidates[order[bucket_starts[bucket]:bucket_starts[bucket + 1]]])
+            first, second = np.triu_indices(len(members), 1)
+            pair_keys.append(members[first] * n_records + members[second])
+    if not pair_keys:
+        return np.zeros((0, 2), dtype=np.int64)
+    keys = np.unique(np.concatenate(pair_keys).astype(np.int64))
+    return np.stack([keys // n_records, keys % n_records], axis=1)
+
+
+def estimate_jaccard(first_signatures: np.ndarray, second_signatures: np.ndarray) -> np.ndarray:
+    """
+    Estimates the Jaccard similarity of signature pairs as the fraction of agreeing hashes.
+
+    @param first_signatures: A uint64 array of shape (pairs, num_hashes).
+    @param second_signatures: A uint64 array of the same shape.
+    @return: A float array of estimated Jaccard similarities.
+    """
+    return (first_signatures == second_signatures).mean(axis=1)
+
+
+def all_vs_all_similarity(signatures: np.ndarray, threshold: float = 0.8, bands: Optional[int] = None,
+                          workers: int = 0, chunk_size: int = 100000) -> SimilarityEdges:
+    """
+    Finds the record pairs whose estimated Jaccard similarity reaches a threshold, comparing only
+    LSH candidate pairs.
+
+    @param signatures: A uint64 array of shape (records, num_hashes).
+    @param threshold: The minimum estimated Jaccard similarity of a reported pair.
+    @param bands: The number of LSH bands; chosen from the threshold if None.
+    @param workers: The number of worker processes estimating candidate pairs (0 for this process).
+    @param chunk_size: The number of candidate pairs per estimation task.
+    @return: A SimilarityEdges namedtuple of arrays (first index, second index, jaccard), sorted by
+    decreasing similarity.
+    """
+    pairs = lsh_candidate_pairs(signatures, bands or choose_bands(signatures.shape[1], threshold))
+    chunks = [(signatures[chunk[:, 0]], signatures[chunk[:, 1]])
+              for chunk in np.array_split(pairs, max(-(-len(pairs) // chunk_size), 1))]
+    if workers > 0 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            jaccard = list(executor.map(estimate_jaccard, *zip(*chunks)))
+    else:
+        jaccard = [estimate_jaccard(first, second) for first, second in chunks]
+    jaccard = np.concatenate(jaccard) if jaccard else np.zeros(0)
+    keep = np.flatnonzero(jaccard >= threshold)
+    keep = keep[np.argsort(-jaccard[keep], kind="stable")]
+    return SimilarityEdges(first=pairs[keep, 0], second=pairs[keep, 1], jaccard=jaccard[keep])
+
+
+def write_similarity_edges(edges: SimilarityEdges, ids: List[str], outfile):
+    """
+    Writes a similarity edge list as a tab-separated file.
+
+    @param edges: A SimilarityEdges namedtuple from `all_vs_all_similarity`.
+    @param ids: The record ID of every signature row.
+    @param outfile: An open, writable text file.
+    """
+    outfile.write("id_a\tid_b\tjaccard\n")
+    outfile.writelines(f"{ids[first]}\t{ids[second]}\t{jaccard:.4f}\n"
+                       for first, second, jaccard in zip(edges.first.tolist(), edges.second.tolist(),
+                                                         edges.jaccard.tolist()))
+
+
+def save_signatures(path: str, ids: List[str], signatures: np.ndarray, k: int, canonical: bool, seed: int):
+    """
+    Saves record IDs and signatures to a .npz file, with the parameters needed to compare them.
+
+    @param path: The output path.
+    @param ids: The record ID of every signature row.
+    @param signatures: A uint64 array of shape (records, num_hashes).
+    """
+    np.savez_compressed(path, ids=np.array(ids, dtype=str), signatures=signatures,
+                        params=np.array([k, int(canonical), seed], dtype=np.int64))
+
+
+def load_signatures(path: str) -> Tuple[List[str], np.ndarray, Tuple[int, bool, int]]:
+    """
+    Loads signatures saved with `save_signatures`.
+
+    @param path: The .npz file.
+    @return: A tuple of (ids, signatures, (k, canonical, seed)).
+    """
+    with np.load(path) as data:
+        k, canonical, seed = data['params'].tolist()
+        return data['ids'].tolist(), data['signatures'], (k, bool(canonical), seed)
@@ -0,0 +1,347 @@
+"""motif_utils.py
+Exact and IUPAC-degenerate motif search over FASTA collections. Many patterns are matched in
+one pass per record with an Aho-Corasick automaton compiled into a dense transition table;
+degenerate patterns are expanded into their concrete sequences, and the reverse strand is
+searched with reverse-complemented patterns, so each record is scanned once. For repeated
+queries over the same collection, a suffix array over the concatenated records can be built
+once, saved and memory-mapped. Hits are (record, pattern, position, strand) rows.
+"""
+import itertools
+import json
+import os
+from collections import deque, namedtuple
+from typing import Dict, Iterable, Iterator, List, Tuple
+import numpy as np
+from sequence_attributes.sequence_formats.header_format import parse_header
+from sequence_attributes.utils.strand_utils import reverse_complement
+
+MotifHit = namedtuple("MotifHit", ["record", "pattern", "position", "strand", "match"])
+
+IUPAC_CODES = {
+    "A": "A", "C": "C", "G": "G", "T": "T", "U": "T",
+    "R": "AG", "Y": "CT", "S": "CG", "W": "AT", "K": "GT", "M": "AC",
+    "B": "CGT", "D": "AGT", "H": "ACT", "V": "ACG", "N": "ACGT",
+}
+# motifs that can be searched by name
+COMMON_MOTIFS = {
+    "kozak": "GCCRCCATGG",
+    "polya_signal": "AATAAA",
+    "polya_signal_variant": "ATTAAA",
+    "tata_box": "TATAWAWR",
+    "EcoRI": "GAATTC",
+    "BamHI": "GGATCC",
+    "HindIII": "AAGCTT",
+    "NotI": "GCGGCCGC",
+    "XhoI": "CTCGAG",
+}
+# A, C, G, T (or U) in either case -> 0..3, anything else -> 4 (resets the automaton)
+_SEARCH_TABLE = bytes(min("ACGTU".index(chr(byte).upper()), 3) if chr(byte) in "ACGTUacgtu" else 4
+                      for byte in range(256))
+_ALPHABET_SIZE = 5
+
+
+def expand_iupac(pattern: str, max_expansions: int = 4096) -> List[str]:
+    """
+    Expands an IUPAC-degenerate DNA pattern into the concrete sequences it matches.
+
+    @param pattern: The pattern, e.g. 'GCCRCCATGG'.
+    @param max_expansions: The largest number of concrete sequences allowed.
+    @return: The concrete sequences, in upper case.
+    """
+    try:
+        choices = [IUPAC_CODES[base] for base in pattern.upper()]
+    except KeyError as error:
+        raise ValueError(f"Pattern {pattern} contains a non-IUPAC character: {error.args[0]}") from None
+    if not choices:
+        raise ValueError("Empty pattern")
+    if np.prod([len(choice) for choice in choices], dtype=float) > max_expansions:
+        raise ValueError(f"Pattern {pattern} expands to more than {max_expansions} sequences")
+    return ["".join(bases) for bases in itertools.product(*choices)]
+
+
+def resolve_patterns(patterns: Iterable[str]) -> Dict[str, str]:
+    """
+    Turns pattern arguments into named patterns: a COMMON_MOTIFS name, 'NAME=PATTERN' or a
+    bare pattern (named after itself).
+
+    @param patterns: The pattern arguments.
+    @return: A dictionary of pattern name to IUPAC pattern.
+    """
+    named = {}
+    for pattern in patterns:
+        if pattern in COMMON_MOTIFS:
+            named[pattern] = COMMON_MOTIFS[pattern]
+        elif "=" in pattern:
+            name, _, sequence = pattern.partition("=")
+            named[name] = sequence.upper()
+        else:
+            named[pattern] = pattern.upper()
+    return named
+
+
+def _pattern_keywords(patterns: Dict[str, str], strands: str) -> List[Tuple[str, str, str]]:
+    """
+    Expands named IUPAC patterns into the concrete sequences to find on the forward strand:
+    each expansion for '+' hits and its reverse complement for '-' hits. Palindromic
+    sequences are only kept for '+' when both strands are searched, so they are reported once.
+
+    @return: A list of (name, sequence, strand) tuples.
+    """
+    if strands not in ("both", "+", "-"):
+        raise ValueError("Strands must be 'both', '+' or '-'")
+    keywords = []
+    for name, pattern in patterns.items():
+        forward = expand_iupac(pattern)
+        if strands != "-":
+            keywords += [(name, sequence, "+") for sequence in forward]
+        if strands != "+":
+            keywords += [(name, reverse_complement(sequence), "-") for sequence in forward
+                         if strands == "-" or reverse_complement(sequence) not in forward]
+    return keywords
+
+
+class AhoCorasick:
+    """
+    An Aho-Corasick automaton over A, C, G and T for a set of IUPAC patterns on one or both
+    strands. The goto and failure links are compiled into a dense transition table, so scanning
+    a record is one table lookup per base; any other character returns to the root.
+    """
+    def __init__(self, patterns: Dict[str, str], strands: str = "both"):
+        children = [{}]
+        outputs = [[]]
+        for name, sequence, strand in _pattern_keywords(patterns, strands):
+            state = 0
+            for code in sequence.encode("ascii").translate(_SEARCH_TABLE):
+                if code not in children[state]:
+                    children[state][code] = len(children)
+                    children.append({})
+                    outputs.append([])
+                state = children[state][code]
+            outputs[state].append((name, strand, len(sequence)))
+
+        # breadth-first: fill missing transitions from the failure state, merge outputs
+        n_states = len(children)
+        transitions = [0] * (n_states * _ALPHABET_SIZE)
+        failure = [0] * n_states
+        queue = deque()
+        for code in range(4):
+            child = children[0].get(code)
+            if child is not None:
+                transitions[code] = child
+                queue.append(child)
+        while queue:
+            state = queue.popleft()
+            outputs[state] = outputs[state] + outputs[failure[state]]
+            for code in range(4):
+                child = children[state].get(code)
+                fallback = transitions[failure[state] * _ALPHABET_SIZE + code]
+                if child is None:
+                    transitions[state * _ALPHABET_SIZE + code] = fallback
+                else:
+                    failure[child] = fallback
+                    transitions[state * _ALPHABET_SIZE + code] = child
+                    queue.append(child)
+        self.patterns = dict(patterns)
+        self.transitions = transitions
+        self.outputs = [tuple(output) for output in outputs]
+
+    def search(self, sequence: str) -> Iterator[Tuple[str, int, str, int]]:
+        """
+        Finds every (overlapping) occurrence of the patterns in a sequence.
+
+        @param sequence: The sequence to search.
+        @return: An iterator of (pattern name, 0-based start position, strand, length) tuples, in
+        order of their end positions; minus-strand hits are reported at the forward-strand start.
+        """
+        transitions, outputs = self.transitions, self.outputs
+        state = 0
+        for end, code in enumerate(sequence.encode("ascii", "replace").translate(_SEARCH_TABLE), 1):
+            state = transitions[state * _ALPHABET_SIZE + code]
+            if outputs[state]:
+                for name, strand, length in outputs[state]:
+                    yield name, end - length, strand, length
+
+
+def search_records(records: Iterable[Tuple[str, str]], patterns: Dict[str, str],
+                   strands: str = "both") -> Iterator[MotifHit]:
+    """
+    Searches streamed FASTA records for many patterns at once.
+
+    @param records: An iterable of (header, sequence) tuples, e.g. from `iter_fasta_records`.
+    @param patterns: A dictionary of pattern name to IUPAC pattern.
+    @param strands: 'both', '+' or '-'.
+    @return: An iterator of MotifHit namedtuples; match is the matched sequence as it appears
+    on the forward strand.
+    """
+    automaton = AhoCorasick(patterns, strands)
+    for header, sequence in records:
+        record_id = parse_header(header).id
+        for name, position, strand, length in automaton.search(sequence):
+            yield MotifHit(record_id, name, position, strand, sequence[position:position + length])
+
+
+def write_motif_hits(hits: Iterable[MotifHit], outfile) -> int:
+    """
+    Writes motif hits as a tab-separated table.
+
+    @param hits: An iterable of MotifHit namedtuples.
+    @param outfile: An open, writable text file.
+    @return: The number of hits written.
+    """
+    outfile.write("\t".join(MotifHit._fields) + "\n")
+    n_hits = 0
+    for hit in hits:
+        outfile.write("\t".join(str(value) for value in hit) + "\n")
+        n_hits += 1
+    return n_hits
+
+
+def _suffix_array(text: np.ndarray) -> np.ndarray:
+    """Sorts the suffixes of a byte array by prefix doubling, one vectorized sort per round."""
+    n = len(text)
+    rank = text.astype(np.int64)
+    suffixes = np.argsort(rank, kind="stable")
+    step = 1
+    while step < n:
+        second = np.full(n, -1, dtype=np.int64)
+        second[:n - step] = rank[step:]
+        suffixes = np.lexsort((second, rank))
+        first_sorted, second_sorted = rank[suffixes], second[suffixes]
+        changed = np.concatenate(([True], (first_sorted[1:] != first_sorted[:-1]) |
+                                  (second_sorted[1:] != second_sorted[:-1])))
+        new_rank = np.empty(n, dtype=np.int64)
+        new_rank[suffixes] = np.cumsum(changed) - 1
+        rank = new_rank
+        if changed.all():
+            break
+        step *= 2
+    return suffixes
+
+
+def _source_stamp(path: str) -> Dict[str, object]:
+    """Identifies a version of a file by its absolute path, size and modification time."""
+    stat = os.stat(path)
+    return {"infile": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class SuffixArrayIndex:
+    """
+    A suffix array over the concatenated, upper-cased records of a FASTA collection (separated by
+    '$'), saved as .npy files that later runs memory-map, for repeated motif queries without
+    rescanning the sequences.
+    """
+    def __init__(self, text: np.ndarray, suffixes: np.ndarray, offsets: np.ndarray, ids: List[str]):
+        self.text = text
+        self.suffixes = suffixes
+        self.offsets = offsets
+        self.ids = ids
+
+    @classmethod
+    def build(cls, records: Iterable[Tuple[str, str]]) -> 'SuffixArrayIndex':
+        """
+        Builds the index of a FASTA collection.
+
+        @param records: An iterable of (header, sequence) tuples, e.g. from `iter_fasta_records`.
+        @return: The SuffixArrayIndex.
+        """
+        ids, sequences = [], []
+        for header, sequence in records:
+            ids.append(parse_header(header).id)
+            sequences.append(sequence.upper().replace("U", "T") + "$")
+        offsets = np.zeros(len(sequences) + 1, dtype=np.int64)
+        np.cumsum([len(sequence) for sequence in sequences], out=offsets[1:])
+        text = np.frombuffer("".join(sequences).encode("ascii", "replace"), dtype=np.uint8)
+        return cls(text, _suffix_array(text), offsets, ids)
+
+    def save(self, index_dir: str, source: str = None):
+        """
+        Saves the index to a directory.
+
+        @param index_dir: The directory (created if needed).
+        @param source: The FASTA file the index was built from; its size and modification time are
+                       recorded so that `is_fresh` can tell when the file has changed.
+        """
+        os.makedirs(index_dir, exist_ok=True)
+        np.save(os.path.join(index_dir, "text.npy"), self.text)
+        np.save(os.path.join(index_dir, "suffixes.npy"), self.suffixes)
+        np.save(os.path.join(index_dir, "offsets.npy"), self.offsets)
+        with open(os.path.join(index_dir, "ids.json"), "w", encoding="utf-8") as file:
+            json.dump(self.ids, file)
+        source_path = os.path.join(index_dir, "source.json")
+        if source is not None:
+            with open(source_path, "w", encoding="utf-8") as file:
+                json.dump(_source_stamp(source), file)
+        elif os.path.exists(source_path):
+            os.remove(source_path)
+
+    @staticmethod
+    def is_fresh(index_dir: str, source: str) -> bool:
+        """
+        Checks that a saved index exists and was built from the current version of a FASTA file.
+
+        @param index_dir: The index directory.
+        @param source: The FASTA file.
+        @return: True if the recorded size and modification time of the file match, else False.
+        """
+        try:
+            with open(os.path.join(index_dir, "source.json"), encoding="utf-8") as file:
+                stamp = json.load(file)
+        except (OSError, ValueError):
+            return False
+        return os.path.exists(os.path.join(index_dir, "ids.json")) and stamp == _source_stamp(source)
+
+    @classmethod
+    def load(cls, index_dir: str) -> 'SuffixArrayIndex':
+        """
+        Memory-maps an index saved with `save`.
+
+        @param index_dir: The index directory.
+        @return: The SuffixArrayIndex.
+        """
+        arrays = [np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r")
+                  for name in ("text", "suffixes", "offsets")]
+        with open(os.path.join(index_dir, "ids.json"), encoding="utf-8") as file:
+            return cls(*arrays, json.load(file))
+
+    def _range(self, sequence: bytes) -> Tuple[int, int]:
+        """Binary-searches the suffixes starting with a concrete sequence."""
+        text, suffixes, length = self.text, self.suffixes, len(sequence)
+
+        def prefix(rank):
+            start = suffixes[rank]
+            return text[start:start + length].tobytes()
+
+        low, high = 0, len(suffixes)
+        while low < high:  # first suffix >= sequence
+            middle = (low + high) // 2
+            if prefix(middle) < sequence:
+                low = middle + 1
+            else:
+                high = middle
+        first, high = low, len(suffixes)
+        while low < high:  # first suffix that does not start with sequence
+            middle = (low + high) // 2
+            if prefix(middle) == sequence:
+                low = middle + 1
+            else:
+                high = middle
+        return first, low
+
+    def search(self, patterns: Dict[str, str], strands: str = "both") -> List[MotifHit]:
+        """
+        Finds every occurrence of the patterns, like `search_records` (case-insensitive).
+
+        @param patterns: A dictionary of pattern name to IUPAC pattern.
+        @param strands: 'both', '+' or '-'.
+        @return: A list of MotifHit namedtuples, ordered by record and position; match is the
+        upper-case matched sequence.
+        """
+        found = []
+        for name, sequence, strand in _pattern_keywords(patterns, strands):
+            first, last = self._range(sequence.encode("ascii"))
+            for start in np.asarray(self.suffixes[first:last]).tolist():
+                found.append((start, name, strand, sequence))
+        found.sort(key=lambda hit: hit[0])
+        records = (np.searchsorted(self.offsets, [hit[0] for hit in found], side="right") - 1).tolist()
+        return [MotifHit(self.ids[record], name, start - int(self.offsets[record]), strand, sequence)
+                for record, (start, name, strand, sequence) in zip(records, found)]
@@ -0,0 +1,170 @@
+"""orf_utils.py
+Finds open reading frames (ORFs) in all six frames of DNA sequences. Each strand of a batch is
+encoded once, every codon is looked up in a single vectorized pass, and ORFs are assembled from
+the positions of start and stop codons. Alternative NCBI genetic code tables are supported.
+"""
+from collections import namedtuple
+from typing import Dict, List, Sequence, Tuple, Union
+import numpy as np
+from sequence_attributes.utils.seq_attribute_utils import (return_standard_genetic_code, SequenceBatch,
+                                                           _as_packed, _record_index, _codon_table,
+                                                           _CODON_BASE_CODES)
+
+ORF = namedtuple("ORF", ["record", "strand", "frame", "start", "end", "protein", "complete"])
+
+
+def return_genetic_code(table_id: int = 1) -> Dict[str, Union[str, None]]:
+    """
+    Returns an NCBI genetic code table as a codon to amino acid mapping.
+
+    @param table_id: The NCBI translation table number (1, 2, 3, 4, 5, 6 or 11).
+    @return: A dictionary in the same format as `return_standard_genetic_code`,
+    with None for stop codons.
+    """
+    # codon reassignments relative to the standard code (table 1)
+    differences = {
+        1: {},
+        2: {"AGA": None, "AGG": None, "AUA": "M", "UGA": "W"},  # vertebrate mitochondrial
+        3: {"AUA": "M", "CUU": "T", "CUC": "T", "CUA": "T", "CUG": "T", "UGA": "W"},  # yeast mitochondrial
+        4: {"UGA": "W"},  # mold, protozoan and coelenterate mitochondrial; mycoplasma
+        5: {"AGA": "S", "AGG": "S", "AUA": "M", "UGA": "W"},  # invertebrate mitochondrial
+        6: {"UAA": "Q", "UAG": "Q"},  # ciliate, dasycladacean and hexamita nuclear
+        11: {},  # bacterial, archaeal and plant plastid
+    }
+    if table_id not in differences:
+        raise ValueError(f"Unsupported genetic code table: {table_id}")
+    genetic_code = return_standard_genetic_code()
+    genetic_code.update(differences[table_id])
+    return genetic_code
+
+
+def _codon_mask(codons: Sequence[str]) -> np.ndarray:
+    """
+    Builds a boolean lookup array over codon codes (see `_codon_table`) marking the given codons.
+
+    @param codons: Codons as DNA or RNA strings.
+    @return: A boolean array of 65 entries.
+    """
+    mask = np.zeros(65, dtype=bool)
+    for codon in codons:
+        codes = _CODON_BASE_CODES[np.frombuffer(codon.encode("ascii", "replace"), dtype=np.uint8)]
+        if len(codes) == 3 and codes.max() < 4:
+            mask[codes[0] * 16 + codes[1] * 4 + codes[2]] = True
+    return mask
+
+
+def _scan_strand(codes: np.ndarray, offsets: np.ndarray, amino_acids: np.ndarray, stops: np.ndarray,
+                 starts: np.ndarray, min_protein_length: int, include_partial: bool) -> Tuple[np.ndarray, ...]:
+    """
+    Finds ORFs on one strand of a packed batch, in the coordinates of that strand.
+
+    @param codes: Base codes of the packed batch (A=0, C=1, G=2, T=3, other=4).
+    @param offsets: Record offsets of the packed batch.
+    @param amino_acids: Amino acid byte per codon code, 'X' for unrecognised codons.
+    @param stops: Boolean stop codon mask per codon code.
+    @param starts: Boolean start codon mask per codon code.
+    @param min_protein_length: Minimum ORF length in amino acids, not counting the stop codon.
+    @param include_partial: Whether to report ORFs that run off the end of the record without a stop.
+    @return: A tuple of arrays (record, start, end, complete) plus the list of proteins.
+    """
+    empty = np.zeros(0, dtype=np.int64)
+    if len(codes) < 3:
+        return empty, empty, empty, empty.astype(bool), []
+
+    # every codon of every frame of every record, looked up once
+    record = _record_index(offsets)
+    positions = np.arange(len(codes) - 2)
+    in_record = record[positions] == record[positions + 2]
+    first, second, third = codes[:-2], codes[1:-1], codes[2:]
+    codon_index = np.where((first | second | third) > 3, 64, first * 16 + second * 4 + third)
+    codon_record = record[:-2]
+    codon_position = positions - offsets[codon_record]
+
+    # a start pairs with the first stop after it in the same record and frame
+    frame_key = codon_record * 3 + codon_position % 3
+    scale = int(np.diff(offsets).max()) + 1
+    sort_key = frame_key * scale + codon_position
+    stop_keys = np.sort(sort_key[in_record & stops[codon_index]])
+    start_keys = np.sort(sort_key[in_record & starts[codon_index]])
+    next_stop = np.searchsorted(stop_keys, start_keys)
+    stop_key = stop_keys[np.minimum(next_stop, max(len(stop_keys) - 1, 0))] if len(stop_keys) else start_keys
+    complete = (next_stop < len(stop_keys)) & (stop_key // scale == start_keys // scale)
+
+    # only the most upstream start before each stop, i.e. the longest ORF
+    _, longest = np.unique((start_keys // scale) * (len(stop_keys) + 1) + next_stop, return_index=True)
+    start_keys, stop_key, complete = start_keys[longest], stop_key[longest], complete[longest]
+
+    orf_record = start_keys // scale // 3
+    orf_start = start_keys % scale
+    record_length = offsets[orf_record + 1] - offsets[orf_record]
+    coding_end = np.where(complete, stop_key % scale, orf_start + (record_length - orf_start) // 3 * 3)
+
+    keep = ((coding_end - orf_start) // 3 >= min_protein_length) & (complete | include_partial)
+    orf_record, orf_start, coding_end, complete = orf_record[keep], orf_start[keep], coding_end[keep], complete[keep]
+
+    translated = amino_acids[codon_index]
+    proteins = [translated[offset + start:offset + end:3].tobytes().decode("ascii")
+                for offset, start, end in zip(offsets[orf_record].tolist(), orf_start.tolist(), coding_end.tolist())]
+    return orf_record, orf_start, np.where(complete, coding_end + 3, coding_end), complete, proteins
+
+
+def find_orfs_batch(dna_sequences: SequenceBatch, genetic_code: Dict[str, Union[str, None]] = None,
+                    min_protein_length: int = 30, start_codons: Sequence[str] = ("ATG",),
+                    include_partial: bool = False) -> List[ORF]:
+    """
+    Finds ORFs in all six frames of every DNA sequence of a batch.
+
+    @param dna_sequences: A list of DNA sequences or a packed (buffer, offsets) pair.
+    @param genetic_code: A dictionary mapping codons to amino acids (None for stops),
+    defaults to the standard genetic code.
+    @param min_protein_length: Minimum ORF length in amino acids, not counting the stop codon.
+    @param start_codons: Codons that can start an ORF.
+    @param include_partial: Whether to report ORFs that run off the end of a sequence without a stop.
+    @return: A list of ORF namedtuples sorted by record, start and strand. `start` and `end` are 0-based,
+    end-exclusive forward-strand coordinates that include the stop codon; `frame` is 1 to 3 on the
+    plus strand and -1 to -3 on the minus strand; `protein` excludes the stop.
+    """
+    genetic_code = return_standard_genetic_code() if genetic_code is None else genetic_code
+    buffer, offsets = _as_packed(dna_sequences)
+    n_records = len(offsets) - 1
+    lengths = np.diff(offsets)
+
+    amino_acids = _codon_table(genetic_code).copy()
+    amino_acids[amino_acids == 0] = ord("X")
+    stops = _codon_mask([codon for codon, amino_acid in genetic_code.items() if amino_acid is None])
+    starts = _codon_mask(start_codons)
+
+    forward = _CODON_BASE_CODES[buffer].astype(np.intp)
+    # reverse complement of the whole batch: records come out in reverse order
+    reverse = np.where(forward[::-1] < 4, 3 - forward[::-1], 4)
+    reverse_offsets = len(buffer) - offsets[::-1]
+
+    orfs = []
+    for strand, codes, strand_offsets in (("+", forward, offsets), ("-", reverse, reverse_offsets)):
+        record, start, end, complete, proteins = _scan_strand(
+            codes, strand_offsets, amino_acids, stops, starts, min_protein_length, include_partial)
+        if strand == "-":
+            record = n_records - 1 - record
+            frame = -(start % 3 + 1)
+            start, end = lengths[record] - end, lengths[record] - start
+        else:
+            frame = start % 3 + 1
+        orfs.extend(ORF(*fields) for fields in zip(record.tolist(), [strand] * len(record), frame.tolist(),
+                                                   start.tolist(), end.tolist(), proteins, complete.tolist()))
+    return sorted(orfs, key=lambda orf: (orf.record, orf.start, orf.strand))
+
+
+def find_orfs(dna_sequence: str, genetic_code: Dict[str, Union[str, None]] = None,
+              min_protein_length: int = 30, start_codons: Sequence[str] = ("ATG",),
+              include_partial: bool = False) -> List[ORF]:
+    """
+    Finds ORFs in all six frames of a DNA sequence.
+
+    @param dna_sequence: The DNA sequence to scan.
+    @param genetic_code: A dictionary mapping codons to amino acids, defaults to the standard genetic code.
+    @param min_protein_length: Minimum ORF length in amino acids, not counting the stop codon.
+    @param start_codons: Codons that can start an ORF.
+    @param include_partial: Whether to report ORFs that run off the end of the sequence without a stop.
+    @return: A list of ORF namedtuples (see `find_orfs_batch`).
+    """
+    return find_orfs_batch([dna_sequence], genetic_code, min_protein_length, start_codons, include_partial)
@@ -0,0 +1,200 @@
+"""pipeline_utils.py
+Runs main.py's attribute calculation as a staged producer/consumer pipeline: a reader thread
+parses FASTA chunks, a process pool computes attributes, and a writer thread assembles finished
+rows. The stages are connected by bounded queues, so parsing the next chunk and writing finished
+rows overlap with computation, and a slow stage applies backpressure to the ones before it.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Tuple, TYPE_CHECKING
+from sequence_attributes.sequence_formats.fasta_format import iter_fasta_records
+from sequence_attributes.utils.seq_attribute_utils import (compute_sequence_attributes_chunk,
+                                                           assemble_sequence_attributes)
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from sequence_attributes.sequence_formats.header_format import FastaHeader
+
+_DONE = object()  # end-of-stream marker passed between stages
+
+
+class InstrumentedQueue(queue.Queue):
+    """
+    A bounded queue that records its peak depth and how often (and for how long)
+    producers were blocked because it was full.
+    """
+    def __init__(self, name: str, maxsize: int):
+        super().__init__(maxsize)
+        self.name = name
+        self.items = 0
+        self.max_depth = 0
+        self.put_stalls = 0
+        self.stall_seconds = 0.0
+
+    def put(self, item, block=True, timeout=None):
+        """Puts an item, counting a backpressure stall if the queue was full (the end marker is not counted)."""
+        try:
+            super().put(item, block=False)
+        except queue.Full:
+            self.put_stalls += 1
+            started = time.perf_counter()
+            super().put(item, block, timeout)
+            self.stall_seconds += time.perf_counter() - started
+        if item is not _DONE:
+            self.items += 1
+        self.max_depth = max(self.max_depth, self.qsize())
+
+    def report(self) -> str:
+        """
+        Summarizes the queue for the run report.
+
+        @return: A one-line description of depth and backpressure.
+        """
+        return (f"{self.name} queue: {self.items} chunks, max depth {self.max_depth}/{self.maxsize}, "
+                f"{self.put_stalls} backpressure stalls ({self.stall_seconds:.2f} s)")
+
+
+def _chunked(items: Iterable, chunk_size: int) -> Iterable[list]:
+    """Groups an iterable into lists of at most `chunk_size` items."""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_pipeline(records: Iterable, submit: Callable[[list], Any], consume: Callable[[Any], None],
+                 chunk_size: int = 256, queue_size: int = 8) -> List[InstrumentedQueue]:
+    """
+    Runs records through reader, compute and writer stages connected by bounded queues.
+
+    The reader thread chunks `records` into the read queue; the calling thread passes each
+    chunk to `submit` (which should start the computation, e.g. on a process pool, and return
+    without waiting) and queues the result; the writer thread passes those results, in input
+    order, to `consume`. An exception in any stage is re-raised in the calling thread.
+
+    @param records: An iterable of records, e.g. (header, sequence) tuples.
+    @param submit: Called with each chunk; returns a handle for `consume`.
+    @param consume: Called with each handle, in input order.
+    @param chunk_size: The number of records per chunk.
+    @param queue_size: The maximum number of chunks waiting in each queue.
+    @return: The read and write queues, for their reports.
+    """
+    read_queue = InstrumentedQueue("read", queue_size)
+    write_queue = InstrumentedQueue("write", queue_size)
+    errors = []
+    stop = threading.Event()
+
+    def reader():
+        try:
+            for chunk in _chunked(records, chunk_size):
+                if stop.is_set():
+                    break
+                read_queue.put(chunk)
+        except Exception as err:  # handed to the calling thread
+            errors.append(err)
+        finally:
+            read_queue.put(_DONE)
+
+    def writer():
+        while True:
+            handle = write_queue.get()
+            if handle is _DONE:
+                return
+            if errors:  # drain the queue after a failure so the dispatcher never blocks
+                continue
+            try:
+                consume(handle)
+            except Exception as err:  # handed to the calling thread
+                errors.append(err)
+
+    threads = [threading.Thread(target=reader, daemon=True), threading.Thread(target=writer, daemon=True)]
+    for thread in threads:
+        thread.start()
+    try:
+        while not errors:
+            chunk = read_queue.get()
+            if chunk is _DONE:
+                break
+            write_queue.put(submit(chunk))
+    finally:
+        stop.set()
+        write_queue.put(_DONE)
+        while threads[0].is_alive():  # unblock the reader if it is waiting on a full queue
+            try:
+                read_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+    return [read_queue, write_queue]
+
+
+def _completed(value) -> Future:
+    """Wraps an already computed value in a finished Future."""
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def compute_fasta_attributes_pipelined(
+        infile: str, attribute_df: 'pd.DataFrame', genetic_code: dict, cache=None, workers: int = 1,
+        chunk_size: int = 256, queue_size: int = 8, strand: str = "+",
+        parsed_headers: Dict[str, 'FastaHeader'] = None) -> Tuple[List[dict], List[InstrumentedQueue]]:
+    """
+    Computes the attributes of every record of a FASTA file with overlapped parsing,
+    computation and row assembly.
+
+    @param infile: Path to the FASTA file.
+    @param attribute_df: DataFrame containing additional gene information.
+    @param genetic_code: A dictionary mapping codons to amino acids.
+    @param cache: Optional AttributeCache or SequenceDeduplicator; cached sequences are not sent to
+    the workers. Duplicates of a sequence whose chunk is still being computed are computed again.
+    @param workers: The number of worker processes (0 computes in the calling thread).
+    @param chunk_size: The number of records per chunk.
+    @param queue_size: The maximum number of chunks waiting in each queue.
+    @param strand: '+' for the sequences as given, '-' for their reverse complements.
+    @param parsed_headers: Optional dictionary of header to its FastaHeader, so headers already
+    parsed by the caller are not parsed again.
+    @return: A tuple of (rows in FASTA order, as the dictionaries main.py builds its DataFrames from;
+    the pipeline queues, for the run report).
+    """
+    all_data = []
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+
+    def submit(chunk):
+        cached = [cache.get(dna_sequence, genetic_code, strand) if cache is not None else None
+                  for _, dna_sequence in chunk]
+        # identical sequences within a chunk are computed once
+        misses = list(dict.fromkeys(dna_sequence for (_, dna_sequence), hit in zip(chunk, cached) if hit is None))
+        if executor is None:
+            future = _completed(compute_sequence_attributes_chunk(misses, genetic_code, strand))
+        else:
+            future = executor.submit(compute_sequence_attributes_chunk, misses, genetic_code, strand)
+        return chunk, cached, misses, future
+
+    def consume(handle):
+        chunk, cached, misses, future = handle
+        computed = dict(zip(misses, future.result()))
+        if cache is not None:
+            for dna_sequence, attributes in computed.items():
+                cache.put(dna_sequence, genetic_code, attributes, strand)
+        for (header, dna_sequence), attributes in zip(chunk, cached):
+            if attributes is None:
+                attributes = computed[dna_sequence]
+            parsed_header = parsed_headers.get(header) if parsed_headers is not None else None
+            all_data.append(assemble_sequence_attributes(header, dna_sequence, attribute_df, attributes,
+                                                         parsed_header)._asdict())
+
+    try:
+        queues = run_pipeline(iter_fasta_records(infile), submit, consume, chunk_size, queue_size)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return all_data, queues
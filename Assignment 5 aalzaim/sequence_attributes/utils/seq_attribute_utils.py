@@ -5,11 +5,92 @@ and GC content. Additionally, it estimates DNA melting temperature,
 filters gene data by CCDS ID and chromosome, and compiles sequence
 attributes for genomic analysis.
 """
-import argparse
-from collections import namedtuple
-from typing import Tuple, List, Dict, Union
-from sequence_attributes.sequence_formats.fasta_format import get_fasta_lists
-import pandas as pd
+from collections import namedtuple, Counter
+from functools import lru_cache
+from typing import Tuple, List, Dict, Union, TYPE_CHECKING
+import numpy as np
+from sequence_attributes.sequence_formats.header_format import FastaHeader, parse_ccds_header
+from sequence_attributes.utils.strand_utils import check_strand, reverse_complement, reverse_complement_packed
+
+if TYPE_CHECKING:  # only the DataFrame lookups use pandas, and their callers import it
+    import pandas as pd
+
+WATER_MASS = 18.01528  # in Daltons, added once per peptide chain
+
+# a batch of sequences is either a list of strings or a packed (buffer, offsets) pair
+SequenceBatch = Union[List[str], Tuple[np.ndarray, np.ndarray]]
+
+
+def _byte_lookup(mapping: Dict[str, int], default: int) -> np.ndarray:
+    """
+    Builds a 256-entry table translating byte values to small integer codes.
+
+    @param mapping: A dictionary mapping single characters to codes.
+    @param default: The code given to every other byte value.
+    @return: A uint8 array indexed by byte value.
+    """
+    table = np.full(256, default, dtype=np.uint8)
+    for char, code in mapping.items():
+        table[ord(char)] = code
+    return table
+
+
+# upper-case A, C, G, T -> 0..3, as in the nearest-neighbor tables; anything else -> 4
+_BASE_CODES = _byte_lookup({"A": 0, "C": 1, "G": 2, "T": 3}, 4)
+# translation upper-cases and reads T as U, so both cases and both letters are accepted
+_CODON_BASE_CODES = _byte_lookup({"A": 0, "C": 1, "G": 2, "T": 3, "U": 3,
+                                  "a": 0, "c": 1, "g": 2, "t": 3, "u": 3}, 4)
+
+
+def pack_sequences(sequences: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Packs a list of sequences into one concatenated byte buffer plus record offsets.
+
+    @param sequences: A list of sequence strings.
+    @return: A tuple of (buffer, offsets) where record i is buffer[offsets[i]:offsets[i + 1]].
+    """
+    lengths = np.fromiter((len(seq) for seq in sequences), dtype=np.int64, count=len(sequences))
+    offsets = np.zeros(len(sequences) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    buffer = np.frombuffer("".join(sequences).encode("ascii", "replace"), dtype=np.uint8)
+    return buffer, offsets
+
+
+def _as_packed(sequences: SequenceBatch) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns a batch of sequences in packed form, packing it first if it is a list.
+
+    @param sequences: A list of sequence strings or a packed (buffer, offsets) pair.
+    @return: A tuple of (buffer, offsets).
+    """
+    if isinstance(sequences, tuple):
+        buffer, offsets = sequences
+        return np.asarray(buffer, dtype=np.uint8), np.asarray(offsets, dtype=np.int64)
+    return pack_sequences(sequences)
+
+
+def _record_index(offsets: np.ndarray) -> np.ndarray:
+    """
+    Returns, for every position of a packed buffer, the index of the record it belongs to.
+
+    @param offsets: Record offsets of a packed buffer.
+    @return: An array as long as the buffer.
+    """
+    return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+
+def _percentages(counts: np.ndarray, lengths: np.ndarray, round_to: Union[int, None]) -> np.ndarray:
+    """
+    Converts per-record counts to percentages of the record length, with 0.0 for empty records.
+
+    @param counts: An array of counts per record.
+    @param lengths: An array of record lengths.
+    @param round_to: The number of decimal places to round to, or None for unrounded values.
+    @return: An array of percentages.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percentages = np.where(lengths > 0, (counts / lengths) * 100, 0.0)
+    return percentages if round_to is None else np.round(percentages, round_to)
 
 
 def calculate_amino_acid_content(
@@ -24,15 +105,127 @@ def calculate_amino_acid_content(
        amino acid, rounded to `round_to` decimal places.
        """
 
-    amino_acid_count = protein_sequence.upper().count(amino_acid.upper())
-    total_length = len(protein_sequence)  # total length of the protein sequence
+    percentage = calculate_amino_acid_content_batch([protein_sequence], amino_acid)[0]
+    return round(float(percentage), round_to)
+# return rounded percentage
+
 
-    if total_length == 0:   # if sequence is empty
+def calculate_amino_acid_content_batch(
+        protein_sequences: SequenceBatch, amino_acid: str, round_to: Union[int, None] = None) -> np.ndarray:
+    """
+    Calculates the content of a specified amino acid in every protein of a batch.
+
+    @param protein_sequences: A list of protein sequences or a packed (buffer, offsets) pair.
+    @param amino_acid: The single-letter code of the amino acid to calculate the content for.
+    @param round_to: The number of decimal places to round to, or None for unrounded values.
+    @return: An array with the percentage of each protein composed of the specified amino acid.
+    """
+    if len(amino_acid) != 1:
+        raise ValueError(f"Expected a single-letter amino acid code, got {amino_acid!r}")
+    buffer, offsets = _as_packed(protein_sequences)
+    # case-insensitive match of the residue, like upper-casing both sides
+    matches = (buffer == ord(amino_acid.upper())) | (buffer == ord(amino_acid.lower()))
+    counts = np.bincount(_record_index(offsets), weights=matches, minlength=len(offsets) - 1)
+    return _percentages(counts, np.diff(offsets), round_to)
+
+
+def return_amino_acid_residue_masses() -> Dict[str, float]:
+    """
+    Returns the average residue masses of the 20 standard amino acids.
+
+    @return: A dictionary where each key is an amino acid single-letter code
+    and its value is the average mass (in Daltons) of that residue within a peptide chain.
+    """
+    # average residue masses (amino acid minus one water), ordered alphabetically by code
+    return {
+        "A": 71.0788, "C": 103.1388, "D": 115.0886, "E": 129.1155,
+        "F": 147.1766, "G": 57.0519, "H": 137.1411, "I": 113.1594,
+        "K": 128.1741, "L": 113.1594, "M": 131.1926, "N": 114.1038,
+        "P": 97.1167, "Q": 128.1307, "R": 156.1875, "S": 87.0782,
+        "T": 101.1051, "V": 99.1326, "W": 186.2132, "Y": 163.1760
+    }
+
+
+def _count_amino_acids(protein_sequence: str) -> Dict[str, int]:
+    """
+    Counts every residue of a protein sequence in a single pass.
+
+    @param protein_sequence: The protein sequence as a string.
+    @return: A dictionary mapping each residue found in the sequence to its count.
+    """
+    return Counter(protein_sequence.upper())
+
+
+def get_amino_acid_profile(protein_sequence: str, round_to: int = 2) -> Dict[str, float]:
+    """
+    Calculates the percentage content of all 20 standard amino acids in a protein sequence.
+
+    @param protein_sequence: The protein sequence as a string.
+    @param round_to: The number of decimal places to round each percentage to.
+    @return: A dictionary mapping each amino acid single-letter code to its percentage
+    of the protein sequence, matching `calculate_amino_acid_content` for every residue.
+    """
+    total_length = len(protein_sequence)
+    counts = _count_amino_acids(protein_sequence)  # one pass over the sequence
+
+    profile = {}
+    for amino_acid in return_amino_acid_residue_masses():
+        if total_length == 0:  # if sequence is empty
+            profile[amino_acid] = 0.0
+        else:
+            profile[amino_acid] = round((counts.get(amino_acid, 0) / total_length) * 100, round_to)
+    return profile
+
+
+def calculate_molecular_weight(protein_sequence: str, round_to: int = 2) -> float:
+    """
+    Calculates the molecular weight of a protein sequence from its residue masses.
+
+    @param protein_sequence: The protein sequence as a string.
+    @param round_to: The number of decimal places to round the result to.
+    @return: The molecular weight of the protein in Daltons. Residues outside the
+    20 standard amino acids contribute nothing to the weight.
+    """
+    if not protein_sequence:
         return 0.0
 
-    percentage = (amino_acid_count / total_length) * 100
-    return round(percentage, round_to)
-# return rounded percentage
+    residue_masses = return_amino_acid_residue_masses()
+    counts = _count_amino_acids(protein_sequence)
+    weight = sum(residue_masses[aa] * count for aa, count in counts.items() if aa in residue_masses)
+    # add one water for the free N- and C-termini
+    return round(weight + WATER_MASS, round_to)
+
+
+def get_amino_acid_profile_matrix(protein_sequences: SequenceBatch) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calculates amino acid percentages and molecular weights for a batch of protein sequences.
+
+    All proteins are counted together in one vectorized pass over their concatenated bytes.
+
+    @param protein_sequences: A list of protein sequences or a packed (buffer, offsets) pair.
+    @return: A tuple of (profiles, weights). `profiles` is an (n, 20) array of unrounded
+    percentages with columns ordered as `return_amino_acid_residue_masses()`, and `weights`
+    is an array of n molecular weights in Daltons.
+    """
+    residue_masses = return_amino_acid_residue_masses()
+    n_residues = len(residue_masses)
+    buffer, offsets = _as_packed(protein_sequences)
+    n_proteins = len(offsets) - 1
+    lengths = np.diff(offsets)
+
+    # lookup table from byte value to column index; anything else goes to an overflow column
+    lookup = _byte_lookup({aa: column for column, aa in enumerate(residue_masses)}, n_residues)
+    lookup[[ord(aa.lower()) for aa in residue_masses]] = np.arange(n_residues)
+
+    # one bincount over (record, residue) pairs gives every count for every protein
+    counts = np.bincount(_record_index(offsets) * (n_residues + 1) + lookup[buffer],
+                         minlength=n_proteins * (n_residues + 1))
+    counts = counts.reshape(n_proteins, n_residues + 1)[:, :n_residues]
+    profiles = _percentages(counts, lengths[:, None], None)
+
+    masses = np.fromiter(residue_masses.values(), dtype=np.float64, count=n_residues)
+    weights = np.where(lengths > 0, counts @ masses + WATER_MASS, 0.0)
+    return profiles, weights
 
 
 def return_standard_genetic_code() -> Dict[str, Union[str, None]]:
@@ -64,37 +257,112 @@ def return_standard_genetic_code() -> Dict[str, Union[str, None]]:
     }
 
 
-def protein_translation(dna_sequence: str, genetic_code: Dict[str, Union[str, None]]) -> str:
+def protein_translation(dna_sequence: str, genetic_code: Dict[str, Union[str, None]], strand: str = "+") -> str:
     """
     Translates a DNA sequence into a protein sequence using a provided genetic code.
 
     @param dna_sequence: The DNA sequence to be translated.
     @param genetic_code: A dictionary representing the genetic code, mapping codons to amino acids.
+    @param strand: '+' to translate the sequence as given, '-' to translate its reverse complement.
     @return: The protein sequence resulting from the translation of the input DNA sequence.
     """
 
-    protein_sequence = ""
-    # DNA to RNA conversion
-    rna_sequence = dna_sequence.upper().replace("T", "U")
-    for i in range(0, len(rna_sequence) - 2, 3):
-        codon = rna_sequence[i:i+3]  # extract a codon
-        # get the corresponding amino acid
-        amino_acid = genetic_code.get(codon)
-        if amino_acid:
-            protein_sequence += amino_acid
-        else:  # stop translation at stop codon
-            break
-    return protein_sequence
+    return protein_translation_batch([dna_sequence], genetic_code, strand)[0]
+
+
+def _codon_table(genetic_code: Dict[str, Union[str, None]]) -> np.ndarray:
+    """
+    Converts a genetic code dictionary into a lookup array indexed by codon code.
+
+    @param genetic_code: A dictionary representing the genetic code, mapping codons to amino acids.
+    @return: A uint8 array of 65 amino acid byte values; index 16*b1 + 4*b2 + b3 is the codon
+    with bases coded A=0, C=1, G=2, U=3, index 64 is any codon with a non-ACGU base,
+    and 0 marks stop codons.
+    """
+    return _codon_table_from_items(tuple(genetic_code.items()))
+
+
+@lru_cache(maxsize=16)
+def _codon_table_from_items(genetic_code_items: Tuple[Tuple[str, Union[str, None]], ...]) -> np.ndarray:
+    """Builds the codon lookup array once per distinct genetic code (see `_codon_table`)."""
+    table = np.zeros(65, dtype=np.uint8)
+    for codon, amino_acid in genetic_code_items:
+        codes = _CODON_BASE_CODES[np.frombuffer(codon.encode("ascii", "replace"), dtype=np.uint8)]
+        if amino_acid and len(codes) == 3 and codes.max() < 4:
+            table[codes[0] * 16 + codes[1] * 4 + codes[2]] = ord(amino_acid)
+    table.setflags(write=False)  # shared between calls through the cache
+    return table
+
+
+def _in_frame_codons(dna_sequences: SequenceBatch, strand: str = "+") -> Tuple[np.ndarray, ...]:
+    """
+    Codes every complete in-frame codon (from position 0) of every record of a batch.
+
+    @param dna_sequences: A list of DNA sequences or a packed (buffer, offsets) pair.
+    @param strand: '+' for the sequences as given, '-' for their reverse complements.
+    @return: A tuple of (codon_index, codon_record, codon_number, codon_offsets): the codon code of
+    every codon (16*b1 + 4*b2 + b3 with A=0, C=1, G=2, U/T=3, or 64 for a codon with any other
+    base), the record it belongs to, its position within the record, and the offsets of each
+    record's codons.
+    """
+    buffer, offsets = _as_packed(dna_sequences)
+    if check_strand(strand) == "-":
+        buffer, offsets = reverse_complement_packed(buffer, offsets)
+    n_records = len(offsets) - 1
+    codes = _CODON_BASE_CODES[buffer].astype(np.intp)
+
+    # position of every complete codon of every record in the packed buffer
+    n_codons = np.diff(offsets) // 3
+    codon_offsets = np.zeros(n_records + 1, dtype=np.int64)
+    np.cumsum(n_codons, out=codon_offsets[1:])
+    codon_record = np.repeat(np.arange(n_records), n_codons)
+    codon_number = np.arange(codon_offsets[-1]) - codon_offsets[codon_record]
+    starts = offsets[codon_record] + 3 * codon_number
+
+    first, second, third = codes[starts], codes[starts + 1], codes[starts + 2]
+    codon_index = np.where((first | second | third) > 3, 64, first * 16 + second * 4 + third)
+    return codon_index, codon_record, codon_number, codon_offsets
+
+
+def protein_translation_batch(
+        dna_sequences: SequenceBatch, genetic_code: Dict[str, Union[str, None]], strand: str = "+") -> np.ndarray:
+    """
+    Translates every DNA sequence of a batch into a protein sequence.
+
+    @param dna_sequences: A list of DNA sequences or a packed (buffer, offsets) pair.
+    @param genetic_code: A dictionary representing the genetic code, mapping codons to amino acids.
+    @param strand: '+' to translate the sequences as given, '-' to translate their reverse complements.
+    @return: An object array of protein sequences, each translated from position 0 up to
+    (not including) the first stop or unrecognised codon.
+    """
+    codon_index, codon_record, codon_number, codon_offsets = _in_frame_codons(dna_sequences, strand)
+    n_records = len(codon_offsets) - 1
+    n_codons = np.diff(codon_offsets)
+    amino_acids = _codon_table(genetic_code)[codon_index]
+
+    # each protein ends at the first stop (or unrecognised) codon of its record
+    protein_lengths = n_codons.copy()
+    stops = amino_acids == 0
+    np.minimum.at(protein_lengths, codon_record[stops], codon_number[stops])
+
+    translated = amino_acids.tobytes()
+    proteins = np.empty(n_records, dtype=object)
+    proteins[:] = [translated[start:start + length].decode("ascii")
+                   for start, length in zip(codon_offsets[:-1].tolist(), protein_lengths.tolist())]
+    return proteins
 
 
-def extract_kmers(dna_sequence: str, k: int) -> List[str]:
+def extract_kmers(dna_sequence: str, k: int, strand: str = "+") -> List[str]:
     """
     Extracts all possible k-mers of a specified length from a given DNA sequence.
 
     @param dna_sequence: The DNA sequence from which to extract k-mers.
     @param k: The length of each k-mer.
+    @param strand: '+' for k-mers of the sequence as given, '-' for those of its reverse complement.
     @return: A list of all possible k-mers of length k extracted from the input sequence.
     """
+    if check_strand(strand) == "-":
+        dna_sequence = reverse_complement(dna_sequence)
 
     k_mers = []
     for i in range(len(dna_sequence) - k + 1):
@@ -103,38 +371,70 @@ def extract_kmers(dna_sequence: str, k: int) -> List[str]:
     return k_mers
 
 
-def get_sequence_composition(dna_sequence: str) -> dict:
+def get_sequence_composition(dna_sequence: str, strand: str = "+") -> dict:
     """
     Calculates the nucleotide composition of a DNA sequence.
 
     @param dna_sequence: The DNA sequence to analyze.
+    @param strand: '+' for the sequence as given, '-' for its reverse complement.
     @return: A dictionary with nucleotide symbols as keys and their counts as values.
     """
-    # initialize nucleotide counts
-    composition = {"A": 0, "T": 0, "C": 0, "G": 0}
-    # iterate through each nucleotide in sequence
-    for nucleotide in dna_sequence:
-        if nucleotide in composition:
-            composition[nucleotide] += 1
-    return composition
+    counts = get_sequence_composition_batch([dna_sequence], strand)[0]
+    return {nucleotide: int(count) for nucleotide, count in zip("ATCG", counts)}
 
 
-def gc_content(dna_sequence: str) -> float:
+def get_sequence_composition_batch(dna_sequences: SequenceBatch, strand: str = "+") -> np.ndarray:
+    """
+    Calculates the nucleotide composition of every DNA sequence of a batch.
+
+    @param dna_sequences: A list of DNA sequences or a packed (buffer, offsets) pair.
+    @param strand: '+' for the sequences as given, '-' for their reverse complements.
+    @return: An (n, 4) integer array of the counts of 'A', 'T', 'C' and 'G' (in that column order).
+    Other symbols, including lower-case bases, are not counted.
+    """
+    buffer, offsets = _as_packed(dna_sequences)
+    n_records = len(offsets) - 1
+    columns = _byte_lookup({"A": 0, "T": 1, "C": 2, "G": 3}, 4)[buffer]
+    counts = np.bincount(_record_index(offsets) * 5 + columns, minlength=n_records * 5)
+    # the reverse complement has the A and T counts, and the C and G counts, swapped
+    order = [0, 1, 2, 3] if check_strand(strand) == "+" else [1, 0, 3, 2]
+    return counts.reshape(n_records, 5)[:, order]
+
+
+def gc_content(dna_sequence: str, strand: str = "+") -> float:
     """
     Calculates the GC content of a DNA sequence.
 
     @param dna_sequence: The DNA sequence to analyze.
+    @param strand: '+' or '-'; GC content is the same on both strands.
     @return: The GC content as a percentage of the total sequence length.
     """
+    check_strand(strand)
 
     if isinstance(dna_sequence, str) and dna_sequence:
-        # sum of g and c in dna sequence
-        g_c_count = sum(nuc in ['G', 'C'] for nuc in dna_sequence)
-        return round((g_c_count / len(dna_sequence)) * 100, 2)
+        return round(float(gc_content_batch([dna_sequence])[0]), 2)
     else:
         return 0.0
 
 
+def gc_content_batch(dna_sequences: SequenceBatch, round_to: Union[int, None] = None,
+                     strand: str = "+") -> np.ndarray:
+    """
+    Calculates the GC content of every DNA sequence of a batch.
+
+    @param dna_sequences: A list of DNA sequences or a packed (buffer, offsets) pair.
+    @param round_to: The number of decimal places to round to, or None for unrounded values.
+    @param strand: '+' or '-'; GC content is the same on both strands.
+    @return: An array of GC contents as percentages of each sequence length (0.0 for empty sequences).
+    """
+    check_strand(strand)
+    buffer, offsets = _as_packed(dna_sequences)
+    # sum of g and c in each dna sequence
+    g_c = (buffer == ord('G')) | (buffer == ord('C'))
+    counts = np.bincount(_record_index(offsets), weights=g_c, minlength=len(offsets) - 1)
+    return _percentages(counts, np.diff(offsets), round_to)
+
+
 """
 coded a version of the get_tm_from_dna_sequence function like the way it was coded in 
 the class example but could not get it to give me accurate/realist looking melting points
@@ -158,28 +458,30 @@ def get_tm_from_dna_sequence(dna_sequence: str) -> float:
 """
 
 
-def get_tm_from_dna_sequence(dna_sequence: str) -> float:
+def _ln(x, n_terms=100):
     """
-        Calculates the melting temperature (Tm) of a DNA sequence.
-
-        @param dna_sequence: The DNA sequence to analyze.
-        @return: The calculated melting temperature in degrees Celsius.
-        """
+    Logarithm function to compute ln(x) for the Tm calculation.
 
-    if not dna_sequence or len(dna_sequence) < 2:
+    @param x: A positive number.
+    @param n_terms: The number of series terms to sum.
+    @return: An approximation of the natural logarithm of x.
+    """
+    if x <= 0:
+        raise ValueError("x must be positive")
+    elif x == 1:
         return 0.0
+    else:  # approximation of ln(x) using Taylor series
+        x_transformed = (x - 1) / (x + 1)
+        return 2 * sum(x_transformed ** (2 * n + 1) / (2 * n + 1) for n in range(n_terms))
 
-    # logarithm function to compute ln(x) for Tm calculation
-    def ln(x, n_terms=100):
-        
-        if x <= 0:
-            raise ValueError("x must be positive")
-        elif x == 1:
-            return 0.0
-        else:  # approximation of ln(x) using Taylor series
-            x_transformed = (x - 1) / (x + 1)
-            return 2 * sum(x_transformed ** (2 * n + 1) / (2 * n + 1) for n in range(n_terms))
 
+def return_nearest_neighbor_parameters() -> Tuple[Dict[str, float], Dict[str, float]]:
+    """
+    Returns the nearest-neighbor thermodynamic parameters used for the Tm calculation.
+
+    @return: A tuple of two dictionaries, (delta H in kcal/mol, delta S in cal/(mol*K)),
+    each keyed by dinucleotide.
+    """
     # thermodynamic parameters for delta H (enthalpy) and delta S (entropy)
     delta_h = {
         'AA': -7.9, 'AC': -8.4, 'AG': -7.8, 'AT': -7.2,
@@ -194,17 +496,73 @@ def get_tm_from_dna_sequence(dna_sequence: str) -> float:
         'GA': -22.2, 'GC': -24.4, 'GG': -19.9, 'GT': -22.4,
         'TA': -21.3, 'TC': -22.2, 'TG': -22.7, 'TT': -22.2,
     }
-    # compute total delta H and S for the entire sequence
-    total_delta_h = sum(delta_h[dna_sequence[i:i + 2]] for i in range(len(dna_sequence) - 1))
-    total_delta_s = sum(delta_s[dna_sequence[i:i + 2]] for i in range(len(dna_sequence) - 1))
+    return delta_h, delta_s
 
-    # calculate Tm using the nearest-neighbor thermodynamic model
-    tm = (1000 * total_delta_h) / (total_delta_s + 1.987 * ln(50e-3)) - 273.15
 
-    return round(tm, 2)
+def get_tm_from_dna_sequence(dna_sequence: str, strand: str = "+") -> float:
+    """
+        Calculates the melting temperature (Tm) of a DNA sequence.
 
+        @param dna_sequence: The DNA sequence to analyze.
+        @param strand: '+' or '-'; the duplex, and so its Tm, is the same for both strands.
+        @return: The calculated melting temperature in degrees Celsius.
+        """
+    check_strand(strand)
 
-def lookup_by_ccds(ccds_id: str, df: pd.DataFrame, chrom: str = None) -> pd.DataFrame:
+    if not dna_sequence or len(dna_sequence) < 2:
+        return 0.0
+
+    tm = get_tm_from_dna_sequence_batch([dna_sequence])[0]
+    if np.isnan(tm):  # a dinucleotide without nearest-neighbor parameters
+        raise KeyError(f"Sequence contains a dinucleotide outside 'ACGT': {dna_sequence}")
+
+    return round(float(tm), 2)
+
+
+def get_tm_from_dna_sequence_batch(dna_sequences: SequenceBatch, round_to: Union[int, None] = None,
+                                   strand: str = "+") -> np.ndarray:
+    """
+    Calculates the melting temperature (Tm) of every DNA sequence of a batch.
+
+    @param dna_sequences: A list of DNA sequences or a packed (buffer, offsets) pair.
+    @param round_to: The number of decimal places to round to, or None for unrounded values.
+    @param strand: '+' or '-'; the nearest-neighbor parameters are symmetric under reverse
+    complement, so the Tm is the same for both strands.
+    @return: An array of melting temperatures in degrees Celsius; 0.0 for sequences shorter than
+    2 bases and NaN for sequences containing a dinucleotide outside upper-case 'ACGT'.
+    """
+    check_strand(strand)
+    buffer, offsets = _as_packed(dna_sequences)
+    n_records = len(offsets) - 1
+    lengths = np.diff(offsets)
+    codes = _BASE_CODES[buffer].astype(np.intp)
+
+    # dinucleotides start at every position except the last base of each record
+    record = _record_index(offsets)[:-1]
+    is_start = np.ones(len(record), dtype=bool)
+    is_start[offsets[1:][lengths > 0][:-1] - 1] = False
+    first, second = codes[:-1][is_start], codes[1:][is_start]
+    record = record[is_start]
+
+    invalid = (first > 3) | (second > 3)
+    has_invalid = np.bincount(record[invalid], minlength=n_records) > 0
+    dinucleotide_counts = np.bincount(record[~invalid] * 16 + first[~invalid] * 4 + second[~invalid],
+                                      minlength=n_records * 16).reshape(n_records, 16)
+
+    # compute total delta H and S for every sequence from its dinucleotide counts
+    delta_h, delta_s = return_nearest_neighbor_parameters()
+    order = [a + b for a in "ACGT" for b in "ACGT"]
+    total_delta_h = dinucleotide_counts @ np.array([delta_h[pair] for pair in order])
+    total_delta_s = dinucleotide_counts @ np.array([delta_s[pair] for pair in order])
+
+    # calculate Tm using the nearest-neighbor thermodynamic model
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tm = (1000 * total_delta_h) / (total_delta_s + 1.987 * _ln(50e-3)) - 273.15
+    tm = np.where(lengths < 2, 0.0, np.where(has_invalid, np.nan, tm))
+    return tm if round_to is None else np.round(tm, round_to)
+
+
+def lookup_by_ccds(ccds_id: str, df: 'pd.DataFrame', chrom: str = None) -> 'pd.DataFrame':
     """
     Filters a DataFrame for rows matching a specified CCDS ID and optionally a chromosome.
 
@@ -222,15 +580,60 @@ def lookup_by_ccds(ccds_id: str, df: pd.DataFrame, chrom: str = None) -> pd.Data
     return filtered_df
 
 
-def get_additional_sequence_attributes(
-        headers: str, dna_sequence: str, attribute_df: pd.DataFrame, genetic_code: dict) -> namedtuple:
+def compute_sequence_attributes(dna_sequence: str, genetic_code: dict, strand: str = "+") -> Dict[str, object]:
     """
-    Compiles various attributes of a DNA sequence into a structured format.
+    Calculates the attributes that depend only on the DNA sequence and the genetic code.
 
-    @param headers: Header information from the FASTA file.
     @param dna_sequence: The DNA sequence to analyze.
-    @param attribute_df: DataFrame containing additional gene information.
     @param genetic_code: A dictionary mapping codons to amino acids.
+    @param strand: '+' for the sequence as given, '-' for its reverse complement (e.g. a minus-strand
+    CCDS given in genomic orientation).
+    @return: A dictionary of the calculated attributes, keyed by their FastaAttributes field name.
+    """
+    if check_strand(strand) == "-":  # one C-level copy instead of one per attribute
+        dna_sequence = reverse_complement(dna_sequence)
+    protein_sequence = protein_translation(dna_sequence, genetic_code)
+    amino_acid_profile = get_amino_acid_profile(protein_sequence, 2)  # all 20 residues in one pass
+
+    return {
+        "dna_composition": get_sequence_composition(dna_sequence),
+        "dna_sequence_length": len(dna_sequence),
+        "protein_sequence": protein_sequence,
+        "protein_sequence_length": len(protein_sequence),
+        "gc_content_value": gc_content(dna_sequence),
+        "tm_value": get_tm_from_dna_sequence(dna_sequence),
+        "amino_acid_content_value": amino_acid_profile['P'],
+        "kmers_list": extract_kmers(dna_sequence, 3),
+        "proline_comp": amino_acid_profile['P'],
+        "amino_acid_profile": amino_acid_profile,
+        "molecular_weight": calculate_molecular_weight(protein_sequence, 2)
+    }
+
+
+def compute_sequence_attributes_chunk(dna_sequences: List[str], genetic_code: dict,
+                                      strand: str = "+") -> List[Dict[str, object]]:
+    """
+    Calculates the sequence-only attributes of a chunk of DNA sequences, e.g. in a worker process.
+
+    @param dna_sequences: A list of DNA sequences.
+    @param genetic_code: A dictionary mapping codons to amino acids.
+    @param strand: '+' for the sequences as given, '-' for their reverse complements.
+    @return: A list of attribute dictionaries, one per sequence (see `compute_sequence_attributes`).
+    """
+    return [compute_sequence_attributes(dna_sequence, genetic_code, strand) for dna_sequence in dna_sequences]
+
+
+def assemble_sequence_attributes(
+        headers: str, dna_sequence: str, attribute_df: 'pd.DataFrame', computed: Dict[str, object],
+        parsed_header: FastaHeader = None) -> namedtuple:
+    """
+    Combines already calculated sequence attributes with the gene information of their record.
+
+    @param headers: Header information from the FASTA file.
+    @param dna_sequence: The DNA sequence.
+    @param attribute_df: DataFrame containing additional gene information.
+    @param computed: The attribute dictionary returned by `compute_sequence_attributes`.
+    @param parsed_header: The FastaHeader of `headers`, if the caller has already parsed it.
     @return: A namedtuple containing various calculated and extracted sequence attributes.
     """
 
@@ -238,44 +641,50 @@ def get_additional_sequence_attributes(
         "headers", "dna_sequence", "dna_sequence_length", "protein_sequence",
         "protein_sequence_length", "gc_content_value",
         "tm_value", "amino_acid_content_value", "kmers_list",
-        "additional_gene_info", "dna_composition", "proline_comp"
+        "additional_gene_info", "dna_composition", "proline_comp",
+        "amino_acid_profile", "molecular_weight"
     ])
 
-    # split header info to extract CCDS ID and chromosome
-    parts = headers.split('|')
-    ccds_id = parts[0]
-    chrom = parts[1]
-    chrom = chrom.replace('chr', '')
-
-    gene_info = attribute_df.loc[attribute_df['ccds_id'] == ccds_id].iloc[0]
+    # take the CCDS ID from the parsed header, parsing it only if the caller has not
+    ccds_id = (parsed_header if parsed_header is not None else parse_ccds_header(headers)).id
 
-    # calculate sequence attributes
-    dna_composition = get_sequence_composition(dna_sequence)
-    protein_sequence = protein_translation(dna_sequence, genetic_code)
-    protein_sequence_length = len(protein_sequence)
-    dna_sequence_length = len(dna_sequence)
-    gc_content_value = gc_content(dna_sequence)
-    tm_value = get_tm_from_dna_sequence(dna_sequence)
-    amino_acid_content_value = calculate_amino_acid_content(protein_sequence, 'P', 2)
-    kmers_list = extract_kmers(dna_sequence, 3)
-    protein_sequence = protein_translation(dna_sequence, genetic_code)
-    proline_comp = calculate_amino_acid_content(protein_sequence, 'P', 2)
+    if attribute_df.index.name == 'ccds_id':  # indexed table, e.g. from load_merged_annotation
+        gene_info = attribute_df.loc[[ccds_id]].iloc[0]
+    else:
+        gene_info = attribute_df.loc[attribute_df['ccds_id'] == ccds_id].iloc[0]
 
     # assemble attributes into namedtuple
     attributes = FastaAttributes(
-
-        dna_composition=dna_composition,
         headers=headers,
         dna_sequence=dna_sequence,
-        dna_sequence_length=dna_sequence_length,
-        protein_sequence=protein_sequence,
-        protein_sequence_length=protein_sequence_length,
-        gc_content_value=gc_content_value,
-        tm_value=tm_value,
-        amino_acid_content_value=amino_acid_content_value,
-        kmers_list=kmers_list,
         additional_gene_info=gene_info.to_dict(),
-        proline_comp=proline_comp
+        **computed
     )
 
     return attributes
+
+
+def get_additional_sequence_attributes(
+        headers: str, dna_sequence: str, attribute_df: 'pd.DataFrame', genetic_code: dict,
+        cache=None, strand: str = "+", parsed_header: FastaHeader = None) -> namedtuple:
+    """
+    Compiles various attributes of a DNA sequence into a structured format.
+
+    @param headers: Header information from the FASTA file.
+    @param dna_sequence: The DNA sequence to analyze.
+    @param attribute_df: DataFrame containing additional gene information.
+    @param genetic_code: A dictionary mapping codons to amino acids.
+    @param cache: Optional AttributeCache; sequences already in it are not recomputed.
+    @param strand: '+' for the sequence as given, '-' for its reverse complement.
+    @param parsed_header: The FastaHeader of `headers`, if the caller has already parsed it.
+    @return: A namedtuple containing various calculated and extracted sequence attributes.
+    """
+
+    # calculate sequence attributes, reusing cached values for unchanged sequences
+    computed = cache.get(dna_sequence, genetic_code, strand) if cache is not None else None
+    if computed is None:
+        computed = compute_sequence_attributes(dna_sequence, genetic_code, strand)
+        if cache is not None:
+            cache.put(dna_sequence, genetic_code, computed, strand)
+
+    return assemble_sequence_attributes(headers, dna_sequence, attribute_df, computed, parsed_header)
@@ -0,0 +1,154 @@
+"""shard_utils.py
+Runs main.py's attribute calculation in shards, so a run over a large FASTA file can be split
+across processes or cluster jobs and resumed after a failure. The FASTA file is split into byte
+ranges at record boundaries; each shard writes its rows in checkpointed parts, and the completed
+shards are merged back into the rows of a single run, in input order.
+"""
+import json
+import os
+import pickle
+from typing import Callable, Iterator, List, Tuple
+from sequence_attributes.sequence_formats.fasta_format import get_record_boundaries, iter_fasta_records_in_range
+from sequence_attributes.utils.pipeline_utils import _chunked
+
+SHARD_SCHEMA_VERSION = 1
+
+
+def _write_atomic(path: str, data: bytes):
+    """Writes a file through a temporary file, so a crash never leaves a partial file behind."""
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(data)
+    os.replace(temporary, path)
+
+
+def _shard_dir(shard_root: str, shard_index: int) -> str:
+    """Returns the directory holding one shard's checkpoints."""
+    return os.path.join(shard_root, f"shard_{shard_index:04d}")
+
+
+def _read_progress(shard_root: str, shard_index: int) -> dict:
+    """Returns the progress of a shard (parts written, records done, whether it finished)."""
+    try:
+        with open(os.path.join(_shard_dir(shard_root, shard_index), 'progress.json'), encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {'parts': 0, 'records': 0, 'done': False}
+
+
+def prepare_shards(shard_root: str, infile: str, num_shards: int) -> List[Tuple[int, int]]:
+    """
+    Creates the shard directory and its manifest, or checks an existing manifest still
+    describes the same input and shard count, so shards of different runs are never mixed.
+
+    @param shard_root: The directory holding the manifest and one subdirectory per shard.
+    @param infile: Path to the FASTA file.
+    @param num_shards: The number of shards.
+    @return: The (start, end) byte range of every shard.
+    """
+    manifest = {
+        'schema_version': SHARD_SCHEMA_VERSION,
+        'infile': os.path.abspath(infile),
+        'size': os.path.getsize(infile),
+        'mtime_ns': os.stat(infile).st_mtime_ns,
+        'num_shards': num_shards,
+    }
+    manifest_path = os.path.join(shard_root, 'manifest.json')
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as file:
+            existing = json.load(file)
+        if {key: existing.get(key) for key in manifest} != manifest:
+            raise ValueError(f"{shard_root} holds shards of a different input or shard count; "
+                             f"use a new shard directory")
+        return [tuple(shard_range) for shard_range in existing['ranges']]
+    os.makedirs(shard_root, exist_ok=True)
+    manifest['ranges'] = get_record_boundaries(infile, num_shards)
+    _write_atomic(manifest_path, json.dumps(manifest, indent=2).encode('utf-8'))
+    return manifest['ranges']
+
+
+def run_shard(shard_root: str, shard_index: int, compute_rows: Callable[[List[Tuple[str, str]]], List[dict]],
+              checkpoint_every: int = 1000) -> int:
+    """
+    Computes the rows of one shard, writing a checkpoint every `checkpoint_every` records.
+    A shard that was interrupted resumes after its last checkpoint; a finished shard is skipped.
+
+    @param shard_root: The directory prepared by `prepare_shards`.
+    @param shard_index: The shard to run (0-based).
+    @param compute_rows: Called with each list of (header, sequence) records; returns their rows.
+    @param checkpoint_every: The number of records per checkpoint.
+    @return: The number of records computed by this call.
+    """
+    with open(os.path.join(shard_root, 'manifest.json'), encoding='utf-8') as file:
+        manifest = json.load(file)
+    if not 0 <= shard_index < manifest['num_shards']:
+        raise ValueError(f"Shard index {shard_index} is out of range for {manifest['num_shards']} shards")
+    progress = _read_progress(shard_root, shard_index)
+    if progress['done']:
+        return 0
+
+    directory = _shard_dir(shard_root, shard_index)
+    os.makedirs(directory, exist_ok=True)
+    start, end = manifest['ranges'][shard_index]
+    records = iter_fasta_records_in_range(manifest['infile'], start, end)
+    for _ in zip(range(progress['records']), records):  # skip the records already checkpointed
+        pass
+
+    n_computed = 0
+    for chunk in _chunked(records, checkpoint_every):
+        rows = compute_rows(chunk)
+        _write_atomic(os.path.join(directory, f"part_{progress['parts']:06d}.pkl"), pickle.dumps(rows))
+        progress['parts'] += 1
+        progress['records'] += len(chunk)
+        n_computed += len(chunk)
+        _write_atomic(os.path.join(directory, 'progress.json'), json.dumps(progress).encode('utf-8'))
+    progress['done'] = True
+    _write_atomic(os.path.join(directory, 'progress.json'), json.dumps(progress).encode('utf-8'))
+    return n_computed
+
+
+def _num_shards(shard_root: str) -> int:
+    """Returns the shard count recorded in the manifest."""
+    with open(os.path.join(shard_root, 'manifest.json'), encoding='utf-8') as file:
+        return json.load(file)['num_shards']
+
+
+def incomplete_shards(shard_root: str) -> List[int]:
+    """
+    Lists the shards that have not finished yet.
+
+    @param shard_root: The directory prepared by `prepare_shards`.
+    @return: The indices of unfinished shards.
+    """
+    return [index for index in range(_num_shards(shard_root)) if not _read_progress(shard_root, index)['done']]
+
+
+def _iter_shard_parts(shard_root: str, shard_index: int) -> Iterator[dict]:
+    """Streams the rows of one shard, one checkpoint part at a time."""
+    for part in range(_read_progress(shard_root, shard_index)['parts']):
+        with open(os.path.join(_shard_dir(shard_root, shard_index), f"part_{part:06d}.pkl"), 'rb') as file:
+            yield from pickle.load(file)
+
+
+def iter_shard_rows(shard_root: str) -> List[Iterator[dict]]:
+    """
+    Streams the rows of every shard without loading them all, e.g. to summarize a large run.
+
+    @param shard_root: The directory prepared by `prepare_shards`, with all shards finished.
+    @return: One iterator of row dictionaries per shard, in input order; each holds only one
+    checkpoint part in memory at a time.
+    """
+    missing = incomplete_shards(shard_root)
+    if missing:
+        raise ValueError(f"Shards {missing} of {shard_root} have not finished")
+    return [_iter_shard_parts(shard_root, index) for index in range(_num_shards(shard_root))]
+
+
+def load_shard_rows(shard_root: str) -> List[dict]:
+    """
+    Reads the rows of every shard in input order, as a single run would have produced them.
+
+    @param shard_root: The directory prepared by `prepare_shards`, with all shards finished.
+    @return: A list of row dictionaries.
+    """
+    return [row for shard_rows in iter_shard_rows(shard_root) for row in shard_rows]
@@ -0,0 +1,324 @@
+"""sketch_utils.py
+Approximate k-mer counting in bounded memory, for k up to 32 over inputs too large for the
+exact counts of `extract_kmers`. K-mers are 2-bit encoded with a vectorized rolling window
+over each record (long records are processed in windows), hashed with splitmix64, and fed to
+a count-min sketch (per-k-mer counts, never underestimated) and a HyperLogLog (number of
+distinct k-mers). Both structures are fixed-size arrays, so sketches built from different
+files or processes with the same parameters merge exactly.
+"""
+import math
+from collections import namedtuple
+from typing import Iterable, List, Tuple
+import numpy as np
+from sequence_attributes.utils.seq_attribute_utils import _CODON_BASE_CODES
+from sequence_attributes.utils.strand_utils import reverse_complement
+
+SketchErrors = namedtuple("SketchErrors", ["count_error", "count_confidence", "distinct_relative_error"])
+
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _splitmix64(values: np.ndarray) -> np.ndarray:
+    """Mixes uint64 values into well-distributed 64-bit hashes (the splitmix64 finalizer)."""
+    with np.errstate(over="ignore"):
+        z = values + _GOLDEN
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+def kmer_codes(dna_sequence: str, k: int, canonical: bool = False, window: int = 1 << 20) -> Iterable[np.ndarray]:
+    """
+    Encodes the k-mers of a DNA sequence as 2-bit packed integers (A=0, C=1, G=2, T=3), one
+    window of the sequence at a time; k-mers containing any other character are skipped.
+
+    @param dna_sequence: The DNA sequence, in either case (U is read as T).
+    @param k: The k-mer length, 1 to 32.
+    @param canonical: True to encode each k-mer as the smaller of itself and its reverse complement.
+    @param window: The number of k-mer start positions encoded per yielded array.
+    @return: An iterator of uint64 arrays of k-mer codes, in sequence order.
+    """
+    if not 1 <= k <= 32:
+        raise ValueError("k must be between 1 and 32")
+    data = dna_sequence.encode("ascii", "replace")
+    for start in range(0, max(len(data) - k + 1, 0), window):
+        codes = _CODON_BASE_CODES[np.frombuffer(data[start:start + window + k - 1], dtype=np.uint8)]
+        n_kmers = len(codes) - k + 1
+        invalid = np.concatenate(([0], np.cumsum(codes > 3)))
+        valid = (invalid[k:] - invalid[:-k]) == 0
+        bases = codes.astype(np.uint64) & np.uint64(3)
+        forward = np.zeros(n_kmers, dtype=np.uint64)
+        for offset in range(k):  # k vectorized passes instead of one Python step per base
+            forward = (forward << np.uint64(2)) | bases[offset:offset + n_kmers]
+        if canonical:
+            reverse = np.zeros(n_kmers, dtype=np.uint64)
+            for offset in range(k - 1, -1, -1):
+                reverse = (reverse << np.uint64(2)) | (np.uint64(3) - bases[offset:offset + n_kmers])
+            forward = np.minimum(forward, reverse)
+        yield forward[valid]
+
+
+def encode_kmer(kmer: str) -> int:
+    """
+    Encodes one k-mer like `kmer_codes`.
+
+    @param kmer: A k-mer of A, C, G and T.
+    @return: Its 2-bit packed integer code.
+    """
+    codes = next(kmer_codes(kmer, len(kmer)), np.zeros(0, dtype=np.uint64))
+    if len(codes) != 1:
+        raise ValueError(f"Not a valid k-mer: {kmer}")
+    return int(codes[0])
+
+
+class CountMinSketch:
+    """
+    A count-min sketch of `depth` rows of `width` uint32 counters. An estimate never falls below
+    the true count and, with probability 1 - exp(-depth), exceeds it by at most e / width times
+    the total number of items added.
+    """
+    def __init__(self, width: int, depth: int = 4, seed: int = 0):
+        if width < 1 or depth < 1:
+            raise ValueError("Width and depth must be positive")
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        self.total = 0
+        self.counters = np.zeros((depth, width), dtype=np.uint32)
+        self._seeds = _splitmix64(np.arange(seed * depth, (seed + 1) * depth, dtype=np.uint64))
+
+    def _columns(self, hashes: np.ndarray) -> np.ndarray:
+        """Returns the counter column of every hash in every row, shape (depth, n)."""
+        return (_splitmix64(hashes[None, :] ^ self._seeds[:, None]) % np.uint64(self.width)).astype(np.intp)
+
+    def add(self, hashes: np.ndarray):
+        """
+        Counts a batch of item hashes.
+
+        @param hashes: A uint64 array of item hashes.
+        """
+        if not len(hashes):
+            return
+        for row, columns in enumerate(self._columns(hashes)):
+            if len(columns) * 8 >= self.width:
+                self.counters[row] += np.bincount(columns, minlength=self.width).astype(np.uint32)
+            else:
+                unique, counts = np.unique(columns, return_counts=True)
+                self.counters[row, unique] += counts.astype(np.uint32)
+        self.total += len(hashes)
+
+    def estimate(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Estimates the counts of items.
+
+        @param hashes: A uint64 array of item hashes.
+        @return: A uint32 array of estimated counts.
+        """
+        columns = self._columns(hashes)
+        return self.counters[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+    def error(self) -> Tuple[float, float]:
+        """
+        Returns the error bound of the estimates.
+
+        @return: A tuple of (maximum overestimate, probability that it holds).
+        """
+        return math.e / self.width * self.total, 1 - math.exp(-self.depth)
+
+    def merge(self, other: 'CountMinSketch'):
+        """
+        Adds the counts of a sketch with the same width, depth and seed.
+
+        @param other: The sketch to merge into this one.
+        """
+        if (self.width, self.depth, self.seed) != (other.width, other.depth, other.seed):
+            raise ValueError("Only sketches with the same width, depth and seed can be merged")
+        self.counters += other.counters
+        self.total += other.total
+
+
+class HyperLogLog:
+    """
+    A HyperLogLog cardinality estimator with 2**precision one-byte registers; the relative
+    standard error of its estimate is about 1.04 / sqrt(2**precision).
+    """
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError("HyperLogLog precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, hashes: np.ndarray):
+        """
+        Adds a batch of item hashes.
+
+        @param hashes: A uint64 array of item hashes.
+        """
+        if not len(hashes):
+            return
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.intp)
+        remaining = (hashes << np.uint64(self.precision)) & _MASK64
+        # rank = position of the first 1 bit of the remaining bits, found exactly from the exponents
+        # of the high and low 32-bit halves (both are exact as float64)
+        high = (remaining >> np.uint64(32)).astype(np.float64)
+        low = (remaining & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        rank = np.where(high > 0, 33 - np.frexp(high)[1], 65 - np.frexp(low)[1])
+        rank = np.minimum(rank, 64 - self.precision + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def estimate(self) -> float:
+        """
+        Estimates the number of distinct items added, with linear counting for small cardinalities.
+
+        @return: The estimated number of distinct items.
+        """
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)
+        return float(raw)
+
+    def relative_error(self) -> float:
+        """Returns the relative standard error of the estimate."""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def merge(self, other: 'HyperLogLog'):
+        """
+        Combines the registers of a HyperLogLog with the same precision.
+
+        @param other: The HyperLogLog to merge into this one.
+        """
+        if self.precision != other.precision:
+            raise ValueError("Only HyperLogLogs with the same precision can be merged")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+
+class KmerSketch:
+    """
+    Approximate k-mer counts (count-min sketch) and distinct k-mer count (HyperLogLog) of
+    any number of sequences, in memory fixed at construction.
+    """
+    def __init__(self, k: int, width: int = 1 << 22, depth: int = 4, precision: int = 14,
+                 canonical: bool = False, seed: int = 0):
+        self.k = k
+        self.canonical = canonical
+        self.counts = CountMinSketch(width, depth, seed)
+        self.distinct = HyperLogLog(precision)
+
+    @classmethod
+    def from_memory(cls, k: int, max_bytes: int, depth: int = 4, precision: int = 14,
+                    canonical: bool = False, seed: int = 0) -> 'KmerSketch':
+        """
+        Creates a sketch whose counters use at most `max_bytes` (besides the 2**precision
+        HyperLogLog registers); the width, and so the count accuracy, grows with the budget.
+
+        @param k: The k-mer length, 1 to 32.
+        @param max_bytes: The memory budget of the count-min sketch counters.
+        @param depth: The number of count-min sketch rows.
+        @param precision: The HyperLogLog precision.
+        @param canonical: True to count k-mers and their reverse complements together.
+        @param seed: The hash seed; only sketches with equal seeds merge.
+        @return: A new KmerSketch.
+        """
+        return cls(k, max(max_bytes // (4 * depth), 1), depth, precision, canonical, seed)
+
+    def _hashes(self, codes: np.ndarray) -> np.ndarray:
+        """Hashes k-mer codes, mixing in k so different k-mer lengths never collide by code."""
+        return _splitmix64(codes ^ np.uint64(self.k << 58))
+
+    def add_sequence(self, dna_sequence: str):
+        """
+        Counts the k-mers of one DNA sequence.
+
+        @param dna_sequence: The DNA sequence.
+        """
+        for codes in kmer_codes(dna_sequence, self.k, self.canonical):
+            hashes = self._hashes(codes)
+            self.counts.add(hashes)
+            self.distinct.add(hashes)
+
+    def add_records(self, records: Iterable[Tuple[str, str]]) -> int:
+        """
+        Counts the k-mers of streamed FASTA records.
+
+        @param records: An iterable of (header, sequence) tuples, e.g. from `iter_fasta_records`.
+        @return: The number of records counted.
+        """
+        n_records = 0
+        for _, dna_sequence in records:
+            self.add_sequence(dna_sequence)
+            n_records += 1
+        return n_records
+
+    def estimate(self, kmers: List[str]) -> np.ndarray:
+        """
+        Estimates the counts of k-mers (never below their true counts).
+
+        @param kmers: A list of k-mers of length k.
+        @return: A uint32 array of estimated counts.
+        """
+        wrong_length = [kmer for kmer in kmers if len(kmer) != self.k]
+        if wrong_length:
+            raise ValueError(f"Query k-mers must have length {self.k}: {', '.join(wrong_length[:5])}")
+        codes = np.array([encode_kmer(kmer) for kmer in kmers], dtype=np.uint64)
+        if self.canonical:
+            codes = np.minimum(codes, np.array([encode_kmer(reverse_complement(kmer)) for kmer in kmers],
+                                               dtype=np.uint64))
+        return self.counts.estimate(self._hashes(codes))
+
+    def distinct_count(self) -> float:
+        """Returns the estimated number of distinct k-mers."""
+        return self.distinct.estimate()
+
+    def errors(self) -> SketchErrors:
+        """
+        Returns the error bounds of the estimates.
+
+        @return: A SketchErrors namedtuple: the maximum overestimate of a k-mer count and the
+        probability that it holds, and the relative standard error of the distinct count.
+        """
+        count_error, confidence = self.counts.error()
+        return SketchErrors(count_error=count_error, count_confidence=confidence,
+                            distinct_relative_error=self.distinct.relative_error())
+
+    def merge(self, other: 'KmerSketch'):
+        """
+        Adds the counts of another sketch built with the same parameters, e.g. from another
+        file or process.
+
+        @param other: The sketch to merge into this one.
+        """
+        if (self.k, self.canonical) != (other.k, other.canonical):
+            raise ValueError("Only sketches with the same k and canonical setting can be merged")
+        self.counts.merge(other.counts)
+        self.distinct.merge(other.distinct)
+
+    def save(self, path: str):
+        """
+        Saves the sketch to a .npz file.
+
+        @param path: The output path.
+        """
+        np.savez_compressed(path, counters=self.counts.counters, registers=self.distinct.registers,
+                            params=np.array([self.k, self.counts.depth, self.distinct.precision,
+                                             int(self.canonical), self.counts.seed, self.counts.total],
+                                            dtype=np.int64))
+
+    @classmethod
+    def load(cls, path: str) -> 'KmerSketch':
+        """
+        Loads a sketch saved with `save`.
+
+        @param path: The .npz file.
+        @return: The KmerSketch.
+        """
+        with np.load(path) as data:
+            k, depth, precision, canonical, seed, total = data['params'].tolist()
+            sketch = cls(k, data['counters'].shape[1], depth, precision, bool(canonical), seed)
+            sketch.counts.counters[:] = data['counters']
+            sketch.counts.total = total
+            sketch.distinct.registers[:] = data['registers']
+        return sketch
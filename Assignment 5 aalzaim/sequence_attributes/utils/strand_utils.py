@@ -0,0 +1,113 @@
+"""strand_utils.py
+Strand-aware sequence operations: IUPAC-aware complement and reverse complement, case
+normalization and masking. Single sequences go through `bytes.translate` and packed batches
+through 256-entry NumPy lookup tables, so no operation loops over characters in Python.
+"""
+from typing import Iterable, Tuple
+import numpy as np
+
+STRANDS = ("+", "-")
+
+# IUPAC complement of every byte value, preserving case; unknown symbols map to themselves
+_IUPAC_COMPLEMENT = np.arange(256, dtype=np.uint8)
+for _symbol, _complement in zip("ACGTURYSWKMBDHVN", "TGCAAYRSWMKVHDBN"):
+    _IUPAC_COMPLEMENT[ord(_symbol)] = ord(_complement)
+    _IUPAC_COMPLEMENT[ord(_symbol.lower())] = ord(_complement.lower())
+_COMPLEMENT_BYTES = _IUPAC_COMPLEMENT.tobytes()
+
+_UPPER_BYTES = bytes.maketrans(b"abcdefghijklmnopqrstuvwxyz", b"ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_LOWER_BYTES = bytes.maketrans(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ", b"abcdefghijklmnopqrstuvwxyz")
+
+
+def check_strand(strand: str) -> str:
+    """
+    Validates a strand flag.
+
+    @param strand: '+' for the sequence as given, '-' for its reverse complement.
+    @return: The strand, unchanged.
+    """
+    if strand not in STRANDS:
+        raise ValueError(f"Strand must be '+' or '-', not {strand!r}")
+    return strand
+
+
+def complement(sequence: str) -> str:
+    """
+    Complements a DNA or RNA sequence base by base, including IUPAC ambiguity codes.
+
+    @param sequence: The sequence to complement.
+    @return: The complement, with case preserved (U complements to A).
+    """
+    return sequence.encode('ascii', 'replace').translate(_COMPLEMENT_BYTES).decode('ascii')
+
+
+def reverse_complement(sequence: str) -> str:
+    """
+    Returns the reverse complement of a DNA or RNA sequence, including IUPAC ambiguity codes.
+
+    @param sequence: The sequence to reverse complement.
+    @return: The reverse complement, with case preserved.
+    """
+    return sequence.encode('ascii', 'replace').translate(_COMPLEMENT_BYTES)[::-1].decode('ascii')
+
+
+def reverse_complement_packed(buffer: np.ndarray, offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reverse complements every record of a packed (buffer, offsets) batch in one vectorized pass.
+
+    @param buffer: The concatenated sequence bytes.
+    @param offsets: Record offsets; record i is buffer[offsets[i]:offsets[i + 1]].
+    @return: A new (buffer, offsets) pair with every record reverse complemented in place,
+    so records keep their order and offsets.
+    """
+    record = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    # position j of a record takes the complement of position (length - 1 - j)
+    source = offsets[record] + offsets[record + 1] - 1 - np.arange(len(buffer))
+    return _IUPAC_COMPLEMENT[buffer[source]], offsets
+
+
+def normalize_case(sequence: str, upper: bool = True) -> str:
+    """
+    Converts a sequence to upper or lower case, e.g. to ignore soft-masking.
+
+    @param sequence: The sequence.
+    @param upper: True for upper case, False for lower case.
+    @return: The converted sequence.
+    """
+    table = _UPPER_BYTES if upper else _LOWER_BYTES
+    return sequence.encode('ascii', 'replace').translate(table).decode('ascii')
+
+
+def hard_mask(sequence: str, mask_char: str = "N") -> str:
+    """
+    Replaces soft-masked (lower-case) bases with a mask character.
+
+    @param sequence: The sequence, with repeats or low-complexity regions in lower case.
+    @param mask_char: The single character written over masked bases.
+    @return: The hard-masked sequence.
+    """
+    table = bytes.maketrans(b"abcdefghijklmnopqrstuvwxyz", mask_char.encode('ascii') * 26)
+    return sequence.encode('ascii', 'replace').translate(table).decode('ascii')
+
+
+def mask_intervals(sequence: str, intervals: Iterable[Tuple[int, int]], soft: bool = False,
+                   mask_char: str = "N") -> str:
+    """
+    Masks intervals of a sequence, either hard (mask character) or soft (lower case).
+
+    @param sequence: The sequence.
+    @param intervals: 0-based, end-exclusive (start, end) intervals to mask.
+    @param soft: True to lower-case the intervals instead of replacing them.
+    @param mask_char: The single character written over hard-masked bases.
+    @return: The masked sequence.
+    """
+    masked = bytearray(sequence.encode('ascii', 'replace'))
+    for start, end in intervals:
+        start, end = max(start, 0), min(end, len(masked))
+        if start >= end:
+            continue
+        if soft:
+            masked[start:end] = masked[start:end].translate(_LOWER_BYTES)
+        else:
+            masked[start:end] = mask_char.encode('ascii') * (end - start)
+    return masked.decode('ascii')
@@ -0,0 +1,135 @@
+"""topk_utils.py
+Selects the first and last K rows of a sort order from a stream of rows without sorting, or
+even keeping, the whole table. Two bounded heaps hold the K smallest and K largest sort keys
+seen so far, so memory is O(K) and each row costs O(log K). The sort keys follow
+`DataFrame.sort_values`: any mix of ascending and descending columns, missing values (None
+or NaN) last in either direction, and ties kept in input order (as sorting by several columns,
+or with kind='stable', does). Selectors of separate shards merge into the selector of the
+whole input.
+"""
+import heapq
+import numbers
+from itertools import count
+from typing import Any, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+
+class _Descending:
+    """Wraps a value so that it sorts in reverse, for descending keys that cannot be negated."""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+class _Reversed:
+    """Wraps a sort key so that heapq's min-heap keeps the largest keys on top."""
+    __slots__ = ("key", "row")
+
+    def __init__(self, key, row):
+        self.key = key
+        self.row = row
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+
+class TopKSelector:
+    """
+    Keeps the first k and the last k rows of the order `sorted(rows, key=columns, ascending)`
+    would give, seeing each row once.
+    """
+    def __init__(self, k: int, columns: Sequence[str], ascending: Union[bool, Sequence[bool]] = True):
+        if k < 0:
+            raise ValueError("k must not be negative")
+        self.k = k
+        self.columns = list(columns)
+        self.ascending = [ascending] * len(self.columns) if isinstance(ascending, bool) else list(ascending)
+        if len(self.ascending) != len(self.columns):
+            raise ValueError("ascending needs one value per sort column")
+        self._head = []  # max-heap (through _Reversed) of the k smallest keys
+        self._tail = []  # min-heap of the k largest keys
+        self._positions = count()
+        self.rows_seen = 0
+
+    def _sort_key(self, row: Mapping[str, Any], position) -> Tuple:
+        """Builds the key of a row: (missing, value) per column, then the input position for ties."""
+        return tuple([(1, 0) if value is None or value != value else  # None or NaN
+                      (0, value) if ascending else
+                      (0, -value if isinstance(value, (int, float, numbers.Real)) else _Descending(value))
+                      for value, ascending in zip(map(row.__getitem__, self.columns), self.ascending)] + [position])
+
+    def _push(self, key: Tuple, row):
+        """Offers a keyed row to both heaps; once they are full, most rows fail both comparisons."""
+        head, tail, k = self._head, self._tail, self.k
+        if len(head) < k:
+            heapq.heappush(head, _Reversed(key, row))
+        elif k and key < head[0].key:
+            heapq.heapreplace(head, _Reversed(key, row))
+        if len(tail) < k:
+            heapq.heappush(tail, (key, row))
+        elif k and tail[0][0] < key:
+            heapq.heapreplace(tail, (key, row))
+
+    def add(self, row: Mapping[str, Any], position=None):
+        """
+        Adds one row.
+
+        @param row: A mapping with the sort columns, e.g. a row dictionary.
+        @param position: The row's position in the whole input, used to break ties; rows are
+        numbered in the order they are added if None. Positions must be comparable with each
+        other, e.g. (shard, index) tuples for selectors that are merged later.
+        """
+        self.rows_seen += 1
+        self._push(self._sort_key(row, next(self._positions) if position is None else position), row)
+
+    def add_rows(self, rows: Iterable[Mapping[str, Any]]):
+        """
+        Adds rows in input order.
+
+        @param rows: An iterable of row mappings.
+        """
+        for row in rows:
+            self.add(row)
+
+    def merge(self, other: 'TopKSelector') -> 'TopKSelector':
+        """
+        Adds the rows kept by another selector with the same k, columns and directions, e.g. the
+        selector of another shard. The positions of both must belong to one order.
+
+        @param other: The other TopKSelector.
+        @return: This selector.
+        """
+        if (other.k, other.columns, other.ascending) != (self.k, self.columns, self.ascending):
+            raise ValueError("Only selectors with equal k, columns and directions can be merged")
+        candidates = {id(row): (key, row) for key, row in other._tail}
+        candidates.update((id(item.row), (item.key, item.row)) for item in other._head)
+        for key, row in candidates.values():
+            self._push(key, row)
+        self.rows_seen += other.rows_seen
+        return self
+
+    def head(self, k: Optional[int] = None) -> List[Mapping[str, Any]]:
+        """
+        Returns the first rows of the sort order, like `sort_values(...).head(k)`.
+
+        @param k: The number of rows, at most the selector's k (all kept rows if None).
+        @return: A list of rows in sort order.
+        """
+        rows = [item.row for item in sorted(self._head, key=lambda item: item.key)]
+        return rows if k is None else rows[:k]
+
+    def tail(self, k: Optional[int] = None) -> List[Mapping[str, Any]]:
+        """
+        Returns the last rows of the sort order, like `sort_values(...).tail(k)`.
+
+        @param k: The number of rows, at most the selector's k (all kept rows if None).
+        @return: A list of rows in sort order.
+        """
+        rows = [row for _, row in sorted(self._tail, key=lambda item: item[0])]
+        return rows if k is None else rows[len(rows) - min(k, len(rows)):]
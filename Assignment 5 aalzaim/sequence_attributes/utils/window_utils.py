@@ -0,0 +1,142 @@
+"""window_utils.py
+Profiles GC content and melting temperature (Tm) along sequences in sliding windows.
+Both profiles use prefix sums, so the cost is O(L) per sequence whatever the window size,
+and the Tm profile uses the same nearest-neighbor parameters as get_tm_from_dna_sequence.
+Profiles can be streamed to bedGraph or TSV files one record at a time.
+"""
+from collections import namedtuple
+from typing import Iterable, Tuple
+import numpy as np
+from sequence_attributes.utils.seq_attribute_utils import (return_nearest_neighbor_parameters, _ln,
+                                                           _BASE_CODES)
+
+WindowProfile = namedtuple("WindowProfile", ["starts", "ends", "gc_content", "tm"])
+
+# nearest-neighbor parameters are scaled to integers so prefix sums stay exact on long sequences
+_PARAMETER_SCALE = 1000
+
+
+def _window_starts(length: int, window: int, step: int) -> np.ndarray:
+    """
+    Returns the start coordinate of every full window along a sequence.
+
+    @param length: The sequence length.
+    @param window: The window size.
+    @param step: The distance between consecutive window starts.
+    @return: An array of 0-based window starts.
+    """
+    if window < 1 or step < 1:
+        raise ValueError("Window size and step must be positive")
+    return np.arange(0, max(length - window + 1, 0), step, dtype=np.int64)
+
+
+def _prefix_sum(values: np.ndarray) -> np.ndarray:
+    """Returns the prefix sums of an array with a leading zero."""
+    prefix = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(values, out=prefix[1:])
+    return prefix
+
+
+def gc_content_windows(dna_sequence: str, window: int, step: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calculates the GC content of every window along a DNA sequence.
+
+    @param dna_sequence: The DNA sequence to profile.
+    @param window: The window size in bases.
+    @param step: The distance between consecutive window starts.
+    @return: A tuple of (window starts, GC content percentages), matching `gc_content` of each window.
+    """
+    raw = np.frombuffer(dna_sequence.encode('ascii', 'replace'), dtype=np.uint8)
+    starts = _window_starts(len(raw), window, step)
+    g_c = _prefix_sum((raw == ord('G')) | (raw == ord('C')))
+    return starts, (g_c[starts + window] - g_c[starts]) / window * 100
+
+
+def tm_windows(dna_sequence: str, window: int, step: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calculates the nearest-neighbor melting temperature of every window along a DNA sequence.
+
+    @param dna_sequence: The DNA sequence to profile.
+    @param window: The window size in bases.
+    @param step: The distance between consecutive window starts.
+    @return: A tuple of (window starts, Tm values in degrees Celsius), matching
+    `get_tm_from_dna_sequence` of each window; windows containing a base outside
+    upper-case 'ACGT' are NaN and windows shorter than 2 bases are 0.0.
+    """
+    raw = np.frombuffer(dna_sequence.encode('ascii', 'replace'), dtype=np.uint8)
+    starts = _window_starts(len(raw), window, step)
+    if window < 2:
+        return starts, np.zeros(len(starts))
+
+    # rolling dinucleotide parameters: dinucleotide i covers bases i and i + 1
+    codes = _BASE_CODES[raw].astype(np.intp)
+    first, second = codes[:-1], codes[1:]
+    invalid = (first > 3) | (second > 3)
+    dinucleotide = np.where(invalid, 0, first * 4 + second)
+
+    delta_h, delta_s = return_nearest_neighbor_parameters()
+    order = [a + b for a in "ACGT" for b in "ACGT"]
+    scaled_h = np.array([round(delta_h[pair] * _PARAMETER_SCALE) for pair in order], dtype=np.int64)
+    scaled_s = np.array([round(delta_s[pair] * _PARAMETER_SCALE) for pair in order], dtype=np.int64)
+    prefix_h = _prefix_sum(np.where(invalid, 0, scaled_h[dinucleotide]))
+    prefix_s = _prefix_sum(np.where(invalid, 0, scaled_s[dinucleotide]))
+    prefix_invalid = _prefix_sum(invalid)
+
+    # a window [start, start + W) holds dinucleotides start .. start + W - 2
+    ends = starts + window - 1
+    total_delta_h = (prefix_h[ends] - prefix_h[starts]) / _PARAMETER_SCALE
+    total_delta_s = (prefix_s[ends] - prefix_s[starts]) / _PARAMETER_SCALE
+    tm = (1000 * total_delta_h) / (total_delta_s + 1.987 * _ln(50e-3)) - 273.15
+    return starts, np.where(prefix_invalid[ends] - prefix_invalid[starts] > 0, np.nan, tm)
+
+
+def profile_windows(dna_sequence: str, window: int, step: int = 1) -> WindowProfile:
+    """
+    Calculates both the GC content and the Tm of every window along a DNA sequence.
+
+    @param dna_sequence: The DNA sequence to profile.
+    @param window: The window size in bases.
+    @param step: The distance between consecutive window starts.
+    @return: A WindowProfile namedtuple of aligned arrays (starts, ends, gc_content, tm).
+    """
+    starts, gc_values = gc_content_windows(dna_sequence, window, step)
+    _, tm_values = tm_windows(dna_sequence, window, step)
+    return WindowProfile(starts=starts, ends=starts + window, gc_content=gc_values, tm=tm_values)
+
+
+def write_window_profiles(records: Iterable[Tuple[str, str]], outfile, window: int, step: int = 1,
+                          output_format: str = "tsv", metric: str = "gc", round_to: int = 2) -> int:
+    """
+    Streams window profiles of many records to a bedGraph or TSV file, one record at a time.
+
+    @param records: An iterable of (header, sequence) tuples, e.g. from `iter_fasta_records`.
+    @param outfile: An open, writable text file.
+    @param window: The window size in bases.
+    @param step: The distance between consecutive window starts.
+    @param output_format: 'tsv' (chrom, start, end, gc_content, tm with a header line) or
+    'bedgraph' (chrom, start, end and the single value selected by `metric`).
+    @param metric: 'gc' or 'tm', the value written to bedGraph files.
+    @param round_to: The number of decimal places written.
+    @return: The number of windows written.
+    """
+    if output_format not in ("tsv", "bedgraph"):
+        raise ValueError(f"Unknown output format: {output_format}")
+    if metric not in ("gc", "tm"):
+        raise ValueError(f"Unknown metric: {metric}")
+
+    if output_format == "tsv":
+        outfile.write("chrom\tstart\tend\tgc_content\ttm\n")
+    n_windows = 0
+    for header, sequence in records:
+        chrom = header.split()[0] if header.strip() else header
+        profile = profile_windows(sequence, window, step)
+        gc_values = np.round(profile.gc_content, round_to).tolist()
+        tm_values = np.round(profile.tm, round_to).tolist()
+        rows = zip(profile.starts.tolist(), profile.ends.tolist(), gc_values, tm_values)
+        if output_format == "tsv":
+            outfile.writelines(f"{chrom}\t{start}\t{end}\t{gc}\t{tm}\n" for start, end, gc, tm in rows)
+        else:
+            outfile.writelines(f"{chrom}\t{start}\t{end}\t{gc if metric == 'gc' else tm}\n"
+                               for start, end, gc, tm in rows)
+        n_windows += len(profile.starts)
+    return n_windows
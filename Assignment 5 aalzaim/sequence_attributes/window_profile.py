@@ -0,0 +1,50 @@
+"""window_profile.py
+Writes sliding-window GC content and melting temperature profiles of the sequences
+in a FASTA file to a bedGraph or TSV file, for primer and probe design.
+Usage:
+python -m sequence_attributes.window_profile --infile <FASTA file>
+--outfile <output file> --window <size> [--step <step>]
+[--format tsv|bedgraph] [--metric gc|tm] [--lint]
+"""
+import argparse
+import sys
+from sequence_attributes.sequence_formats.fasta_format import iter_fasta_records
+from sequence_attributes.sequence_formats.fasta_lint import check_fasta
+from sequence_attributes.utils.io_utils import FileHandler
+from sequence_attributes.utils.window_utils import write_window_profiles
+
+
+def get_cli_args():
+    """
+        Parses and returns command-line arguments for window profiling.
+
+        @return: The parsed arguments from the command line.
+        """
+    parser = argparse.ArgumentParser(description="Profile GC content and Tm in sliding windows.")
+    parser.add_argument("--infile", required=True, help="Path to the FASTA file.")
+    parser.add_argument("--outfile", required=True, help="Path for the bedGraph or TSV output file.")
+    parser.add_argument("--window", type=int, required=True, help="Window size in bases.")
+    parser.add_argument("--step", type=int, default=1, help="Distance between window starts.")
+    parser.add_argument("--format", dest="output_format", choices=["tsv", "bedgraph"], default="tsv",
+                        help="Output format.")
+    parser.add_argument("--metric", choices=["gc", "tm"], default="gc",
+                        help="Value written to bedGraph output.")
+    parser.add_argument("--lint", action="store_true",
+                        help="Check the FASTA file for duplicate IDs, empty records and non-ACGTN "
+                             "characters before running.")
+    return parser.parse_args()
+
+
+def main():
+    """Streams every FASTA record through the window profiler into the output file."""
+    args = get_cli_args()
+    if args.lint:
+        check_fasta(args.infile, alphabet="dna")
+    with FileHandler(args.outfile, mode='w') as outfile:
+        n_windows = write_window_profiles(iter_fasta_records(args.infile), outfile, args.window, args.step,
+                                          args.output_format, args.metric)
+    print(f"Wrote {n_windows} windows to {args.outfile}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()